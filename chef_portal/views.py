@@ -2,15 +2,15 @@ from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import JsonResponse
+from django.http import Http404, JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
-from django.core.paginator import Paginator
 from django.db.models import Q, Sum, Count, Avg
 from django.db import models
 from django.utils import timezone
 # Removed GIS import - using regular coordinates
 from core.models import User, ChefProfile, MenuItem, Order, OrderItem, Review
+from core.pagination import keyset_page
 from decimal import Decimal
 import json
 
@@ -162,6 +162,11 @@ def chef_profile(request):
         return redirect('client_portal:home')
     
     if request.method == 'POST':
+        cuisine_type = request.POST.get('cuisine_type', chef_profile.cuisine_type)
+        if cuisine_type and cuisine_type not in dict(ChefProfile.CUISINE_CHOICES):
+            messages.error(request, 'Please choose a cuisine from the list.')
+            return redirect('chef_portal:profile')
+        
         # Update user info
         user = request.user
         user.first_name = request.POST.get('first_name', '')
@@ -171,6 +176,7 @@ def chef_profile(request):
         
         # Update chef profile
         chef_profile.bio = request.POST.get('bio', '')
+        chef_profile.cuisine_type = cuisine_type
         chef_profile.address = request.POST.get('address', '')
         chef_profile.instagram_url = request.POST.get('instagram_url', '')
         chef_profile.facebook_url = request.POST.get('facebook_url', '')
@@ -272,12 +278,11 @@ def order_management(request):
     if status_filter != 'all':
         orders = orders.filter(status=status_filter)
     
-    orders = orders.order_by('-created_at')
-    
-    # Pagination
-    paginator = Paginator(orders, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Keyset pagination: no COUNT or OFFSET, so deep pages cost the same as the first
+    try:
+        page_obj = keyset_page(orders, ('-created_at', '-id'), 20, request.GET.get('cursor'), with_total=True)
+    except ValueError:
+        raise Http404("Invalid cursor")
     
     # Status counts for filter tabs
     status_counts = {}
@@ -479,6 +484,10 @@ def ajax_update_profile(request):
         user = request.user
         chef_profile = user.chef_profile
         
+        cuisine_type = request.POST.get('cuisine_type', '')
+        if cuisine_type and cuisine_type not in dict(ChefProfile.CUISINE_CHOICES):
+            return JsonResponse({'success': False, 'error': 'Unknown cuisine type'})
+        
         # Update user fields
         user.first_name = request.POST.get('first_name', '')
         user.last_name = request.POST.get('last_name', '')
@@ -488,7 +497,7 @@ def ajax_update_profile(request):
         chef_profile.phone_number = request.POST.get('phone', '')
         chef_profile.bio = request.POST.get('bio', '')
         chef_profile.business_name = request.POST.get('business_name', '')
-        chef_profile.cuisine_type = request.POST.get('cuisine_type', '')
+        chef_profile.cuisine_type = cuisine_type
         chef_profile.address = request.POST.get('address', '')
         chef_profile.delivery_radius_km = request.POST.get('delivery_radius', 5)
         chef_profile.minimum_order_amount = request.POST.get('min_order', 0)
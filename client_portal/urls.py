@@ -35,4 +35,5 @@ urlpatterns = [
     # AJAX endpoints for dynamic functionality
     path('ajax/chef-menu/<int:chef_id>/', views.get_chef_menu_ajax, name='ajax_chef_menu'),
     path('ajax/submit-review/', views.submit_review_ajax, name='ajax_submit_review'),
+    path('ajax/typeahead/', views.typeahead, name='ajax_typeahead'),
 ]
\ No newline at end of file
@@ -3,31 +3,40 @@ from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import JsonResponse, HttpResponseRedirect
+from django.http import Http404, JsonResponse, HttpResponseRedirect
 from django.urls import reverse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.core.paginator import Paginator
-from django.db.models import Q, Avg, Count
+from django.db import transaction
+from django.db.models import Avg, Count
 from django.conf import settings
 # Removed GIS imports - using regular coordinates for development
 from core.models import User, ChefProfile, MenuItem, Order, OrderItem, Review
+from core import dietary
+from core.discovery import chefs_delivering_to
+from core.facets import facet_counts, filter_by_facet
+from core.geo import KM_PER_MILE, cells_for_radius, nearest_within
+from core.pagination import keyset_page
+from core.pricing import delivery_fee as get_delivery_fee
+from core.search import search_chef_ids
+from core.search_cache import cached_results, normalize_filters
+from core.snapshot import chef_snapshot
+from core.typeahead import DEFAULT_LIMIT, MAX_LIMIT, typeahead_index
 import json
 from decimal import Decimal
 
 
 def home(request):
     """Homepage with chef discovery"""
-    # Get featured chefs (top rated, active)
-    featured_chefs = ChefProfile.objects.filter(
-        is_available=True,
-        is_verified=True,
-        average_rating__gte=4.0
-    ).order_by('-average_rating')[:6]
+    # Get featured chefs (top rated, active) from the in-process snapshot
+    featured_ids = chef_snapshot.top_rated(6, min_rating=4.0)
+    featured_by_id = ChefProfile.objects.select_related('user').in_bulk(featured_ids)
+    featured_chefs = [featured_by_id[chef_id] for chef_id in featured_ids if chef_id in featured_by_id]
     
     # Get some stats for the homepage
     stats = {
-        'total_chefs': ChefProfile.objects.filter(is_verified=True).count(),
+        'total_chefs': chef_snapshot.count(verified=True),
         'total_orders': Order.objects.filter(status='delivered').count(),
         'avg_rating': Review.objects.aggregate(avg=Avg('rating'))['avg'] or 4.9,
         #'cities': ChefProfile.objects.values('city').distinct().count(),
@@ -40,73 +49,108 @@ def home(request):
     return render(request, 'client_portal/home.html', context)
 
 
-def chef_list(request):
-    """List all available chefs with filtering"""
-    # (no-op) chef_list is intentionally public and returns 200 for all users
-    chefs = ChefProfile.objects.filter(
-        is_verified=True
-    ).select_related('user').prefetch_related('menu_items')
+def _discover_chefs(filters):
+    """Ordered chef ids, distances (km) and facet counts for a normalized filter set"""
+    chefs = ChefProfile.objects.filter(is_verified=True)
     
-    # Search functionality
-    query = request.GET.get('q', '')
-    if query:
-        chefs = chefs.filter(
-            Q(user__first_name__icontains=query) |
-            Q(user__last_name__icontains=query) |
-            #Q(cuisine_specialty__icontains=query) |
-            Q(bio__icontains=query) |
-            Q(menu_items__name__icontains=query)
-        ).distinct()
+    # Search functionality (ranked full-text index over names, bios and menus)
+    search_rank = {}
+    if filters['q']:
+        matched_ids = search_chef_ids(filters['q'])
+        search_rank = {chef_id: rank for rank, chef_id in enumerate(matched_ids)}
+        chefs = chefs.filter(id__in=matched_ids)
     
     # Location filtering
-    city = request.GET.get('city', '')
-    state = request.GET.get('state', '')
-    cuisine = request.GET.get('cuisine', '')
-    rating = request.GET.get('rating', '')
-    available_now = request.GET.get('available_now', '')
+    if filters['city']:
+        chefs = chefs.filter(region__city=filters['city'])
+    if filters['state']:
+        chefs = chefs.filter(region__state=filters['state'])
     
-    if city:
-        chefs = chefs.filter(address__icontains=city)
-    if state:
-        chefs = chefs.filter(address__icontains=state)
-    if cuisine:
-        chefs = chefs.filter(cuisine_specialty__icontains=cuisine)
-    if available_now:
-        chefs = chefs.filter(is_available=True)
+    # Distance filtering (lat/lng come from browser geolocation, distance is in miles).
+    # Only chefs whose delivery radius covers the client are shown.
+    distances = {}
+    if filters['lat'] is not None:
+        lat, lng = filters['lat'], filters['lng']
+        radius_km = filters['distance'] * KM_PER_MILE
+        candidates = chefs_delivering_to(
+            lat, lng, chefs.filter(geo_cell__in=cells_for_radius(lat, lng, radius_km))
+        )
+        distances = dict(nearest_within(
+            lat, lng, candidates.values_list('id', 'latitude', 'longitude'), radius_km
+        ))
+        chefs = chefs.filter(id__in=distances.keys())
     
-    # Filter by rating using existing field
-    if rating:
-        try:
-            min_rating = float(rating)
-            chefs = chefs.filter(average_rating__gte=min_rating)
-        except (ValueError, TypeError):
-            pass
+    # Sidebar counts for the search and location results, from the precomputed facet index
+    counts = facet_counts(chefs)
+    
+    # Facet filters
+    if filters['cuisine']:
+        chefs = chefs.filter(cuisine_type=filters['cuisine'])
+    if filters['category']:
+        chefs = filter_by_facet(chefs, 'category', filters['category'])
+    chefs = dietary.filter_chefs(chefs, filters['dietary'])
+    if filters['available_now']:
+        chefs = chefs.filter(is_available=True)
+    if filters['rating'] is not None:
+        chefs = chefs.filter(average_rating__gte=filters['rating'])
     
     # Sorting
-    sort_by = request.GET.get('sort', '')
+    sort_by = filters['sort']
     if sort_by == 'rating':
-        chefs = chefs.order_by('-average_rating', '-total_reviews')
+        ids = chefs.order_by('-average_rating', '-total_reviews', 'id')
     elif sort_by == 'reviews':
-        chefs = chefs.order_by('-total_reviews')
+        ids = chefs.order_by('-total_reviews', 'id')
     else:
-        chefs = chefs.order_by('-average_rating', '-is_available')
+        ids = chefs.order_by('-average_rating', '-is_available', 'id')
+    ids = list(ids.values_list('id', flat=True))
+    if sort_by == 'distance' and distances:
+        ids.sort(key=distances.get)
+    elif search_rank and not sort_by:
+        ids.sort(key=search_rank.get)
     
-    # Pagination
-    paginator = Paginator(chefs, 12)
+    return {'ids': ids, 'distances': distances, 'counts': counts}
+
+
+def chef_list(request):
+    """List all available chefs with filtering"""
+    # (no-op) chef_list is intentionally public and returns 200 for all users
+    # Results are cached as ordered id lists per normalized filter set
+    filters = normalize_filters(request.GET)
+    results = cached_results(filters, lambda: _discover_chefs(filters))
+    distances, counts = results['distances'], results['counts']
+    
+    # Pagination over ids; only the current page's chefs are loaded
+    paginator = Paginator(results['ids'], 12)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
+    chefs_by_id = ChefProfile.objects.select_related('user').prefetch_related('menu_items').in_bulk(
+        page_obj.object_list
+    )
+    page_obj.object_list = [chefs_by_id[chef_id] for chef_id in page_obj.object_list if chef_id in chefs_by_id]
+    for chef in page_obj:
+        if chef.id in distances:
+            chef.distance = distances[chef.id] / KM_PER_MILE
     
-    # Get unique cuisine types for filter
-    # cuisine_types = ChefProfile.objects.filter(
-    #     is_verified=True
-    # ).values_list('cuisine_specialty', flat=True).distinct().order_by('cuisine_specialty')
-    
+    diets = request.GET.getlist('dietary')
     context = {
         'chefs': page_obj,
         'page_obj': page_obj,
         'is_paginated': page_obj.has_other_pages(),
-        #'cuisine_types': cuisine_types,
-        'query': query,
+        'cuisine_types': [
+            (value, label, counts['cuisine'][value])
+            for value, label in ChefProfile.CUISINE_CHOICES if value in counts['cuisine']
+        ],
+        'categories': [
+            (value, label, counts['category'][value])
+            for value, label in MenuItem.CATEGORY_CHOICES if value in counts['category']
+        ],
+        'dietary_options': [
+            (name, name.replace('_', ' ').title(), counts['dietary'].get(name, 0), name in diets)
+            for name in dietary.FLAGS
+        ],
+        'rating_options': [(bucket, counts['rating'].get(bucket, 0)) for bucket in ('4', '4.5')],
+        'available_count': counts['availability'].get('available', 0),
+        'query': request.GET.get('q', ''),
     }
     return render(request, 'client_portal/chef_list.html', context)
 
@@ -151,6 +195,24 @@ def search_chefs(request):
     return chef_list(request)
 
 
+def typeahead(request):
+    """Autocomplete suggestions for the search box, served from memory"""
+    try:
+        limit = min(int(request.GET.get('limit', DEFAULT_LIMIT)), MAX_LIMIT)
+    except ValueError:
+        limit = DEFAULT_LIMIT
+    
+    suggestions = typeahead_index.suggest(request.GET.get('q', ''), max(limit, 1))
+    for suggestion in suggestions:
+        if suggestion['type'] == 'category':
+            suggestion['url'] = reverse('client_portal:chef_list') + f"?category={suggestion['id']}"
+        else:
+            chef_id = suggestion['chef_id'] if suggestion['type'] == 'item' else suggestion['id']
+            suggestion['url'] = reverse('client_portal:chef_detail', args=[chef_id])
+    
+    return JsonResponse({'success': True, 'results': suggestions})
+
+
 def login_view(request):
     """User login"""
     if request.method == 'POST':
@@ -232,11 +294,13 @@ def client_dashboard(request):
 @login_required
 def order_history(request):
     """Complete order history"""
-    orders = Order.objects.filter(client=request.user).order_by('-created_at')
+    orders = Order.objects.filter(client=request.user)
     
-    paginator = Paginator(orders, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Keyset pagination: no COUNT or OFFSET, so deep pages cost the same as the first
+    try:
+        page_obj = keyset_page(orders, ('-created_at', '-id'), 10, request.GET.get('cursor'), with_total=True)
+    except ValueError:
+        raise Http404("Invalid cursor")
     
     context = {'page_obj': page_obj}
     return render(request, 'client_portal/order_history.html', context)
@@ -576,45 +640,56 @@ def create_order(request):
         if not delivery_address:
             return JsonResponse({'success': False, 'error': 'Delivery address is required'}, status=400)
         
-        # Get the first item to determine the chef (assuming single chef per order for now)
-        first_item = MenuItem.objects.get(id=items[0]['id'])
-        chef_profile = first_item.chef_profile
+        # Every cart item in one query; the chef (and the user the new order signal notifies) come joined
+        menu_items = {
+            str(pk): menu_item
+            for pk, menu_item in MenuItem.objects.select_related('chef_profile__user').in_bulk(
+                [item_data['id'] for item_data in items]
+            ).items()
+        }
+        if any(str(item_data['id']) not in menu_items for item_data in items):
+            return JsonResponse({'success': False, 'error': 'Menu item not found'}, status=400)
+        
+        # The first item determines the chef (assuming single chef per order for now)
+        chef_profile = menu_items[str(items[0]['id'])].chef_profile
         
         # Calculate totals
         subtotal = Decimal('0.00')
         for item_data in items:
-            menu_item = MenuItem.objects.get(id=item_data['id'])
-            item_total = menu_item.price * item_data['quantity']
-            subtotal += item_total
+            subtotal += menu_items[str(item_data['id'])].price * item_data['quantity']
         
-        delivery_fee = Decimal('5.00')
+        delivery_fee = get_delivery_fee(
+            chef_profile, delivery_address, data.get('delivery_lat'), data.get('delivery_lng')
+        )
         platform_fee = subtotal * Decimal('0.10')  # 10% platform fee
         total_amount = subtotal + delivery_fee + platform_fee - Decimal(str(promo_discount))
         
-        # Create the order
-        order = Order.objects.create(
-            client=request.user,
-            chef_profile=chef_profile,
-            delivery_address=delivery_address,
-            delivery_instructions=delivery_instructions,
-            subtotal=subtotal,
-            delivery_fee=delivery_fee,
-            platform_fee=platform_fee,
-            total_amount=total_amount,
-            status='pending'
-        )
-        
-        # Create order items
-        for item_data in items:
-            menu_item = MenuItem.objects.get(id=item_data['id'])
-            OrderItem.objects.create(
-                order=order,
-                menu_item=menu_item,
-                quantity=item_data['quantity'],
-                price=menu_item.price,
-                subtotal=menu_item.price * item_data['quantity'],
-                special_instructions=item_data.get('special_instructions', '')
+        # The order and all of its items are written together or not at all
+        with transaction.atomic():
+            order = Order.objects.create(
+                client=request.user,
+                chef_profile=chef_profile,
+                delivery_address=delivery_address,
+                delivery_instructions=delivery_instructions,
+                subtotal=subtotal,
+                delivery_fee=delivery_fee,
+                platform_fee=platform_fee,
+                total_amount=total_amount,
+                status='pending'
             )
+            OrderItem.objects.bulk_create([
+                OrderItem(
+                    order=order,
+                    menu_item=menu_items[str(item_data['id'])],
+                    quantity=item_data['quantity'],
+                    unit_price=menu_items[str(item_data['id'])].price,
+                    customizations=(
+                        {'special_instructions': item_data['special_instructions']}
+                        if item_data.get('special_instructions') else {}
+                    )
+                )
+                for item_data in items
+            ])
         
         return JsonResponse({
             'success': True,
@@ -0,0 +1,39 @@
+"""
+Helpers for turning free-form chef addresses into structured region fields
+"""
+import re
+
+
+_STATE_POSTAL_RE = re.compile(r'^(?P<state>[A-Za-z][A-Za-z .]*?)\s*(?P<postal>\d{5})?(?:-\d{4})?$')
+
+
+def normalize_city(city):
+    return ' '.join((city or '').split()).title()
+
+
+def normalize_state(state):
+    return ' '.join((state or '').split()).upper()
+
+
+def parse_address(address):
+    """
+    Extract (city, state, postal_code) from a US-style address.
+
+    Expects the usual "street, city, STATE 12345" layout; returns None when
+    no city and state can be found.
+    """
+    parts = [part.strip() for part in (address or '').split(',') if part.strip()]
+    if len(parts) < 2:
+        return None
+    if parts[-1].upper() in ('USA', 'US', 'UNITED STATES'):
+        parts = parts[:-1]
+        if len(parts) < 2:
+            return None
+    match = _STATE_POSTAL_RE.match(parts[-1])
+    if not match:
+        return None
+    return (
+        normalize_city(parts[-2]),
+        normalize_state(match.group('state')),
+        match.group('postal') or '',
+    )
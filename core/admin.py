@@ -1,8 +1,9 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from .pricing import rebuild_zone_tables
 from .models import (
-    User, ChefProfile, MenuItem, Order, OrderItem, 
-    Review, ChefAvailabilitySchedule, ChefUnavailableDate
+    User, Region, ChefProfile, DeliveryZone, MenuItem, Order, OrderItem, 
+    PaymentIntentOutbox, Review, ChefAvailabilitySchedule, ChefUnavailableDate
 )
 
 
@@ -22,6 +23,28 @@ class UserAdmin(BaseUserAdmin):
     )
 
 
+@admin.register(Region)
+class RegionAdmin(admin.ModelAdmin):
+    list_display = ('city', 'state', 'postal_code', 'latitude', 'longitude')
+    list_filter = ('state',)
+    search_fields = ('city', 'state', 'postal_code')
+
+
+@admin.register(DeliveryZone)
+class DeliveryZoneAdmin(admin.ModelAdmin):
+    list_display = ('name', 'latitude', 'longitude', 'radius_km', 'is_active')
+    list_filter = ('is_active',)
+    search_fields = ('name',)
+    
+    actions = ['rebuild_fee_matrix']
+    
+    def rebuild_fee_matrix(self, request, queryset):
+        cell_count, fee_count = rebuild_zone_tables()
+        self.message_user(request, f"Mapped {cell_count} cells and priced {fee_count} zone pairs.")
+    
+    rebuild_fee_matrix.short_description = "Rebuild delivery fee matrix (all zones)"
+
+
 class MenuItemInline(admin.TabularInline):
     model = MenuItem
     extra = 0
@@ -37,7 +60,7 @@ class ChefAvailabilityScheduleInline(admin.TabularInline):
 @admin.register(ChefProfile)
 class ChefProfileAdmin(admin.ModelAdmin):
     list_display = ('user', 'is_available', 'is_verified', 'average_rating', 'total_reviews', 'created_at')
-    list_filter = ('is_available', 'is_verified', 'created_at')
+    list_filter = ('is_available', 'is_verified', 'cuisine_type', 'region__state', 'created_at')
     search_fields = ('user__username', 'user__email', 'user__first_name', 'user__last_name', 'address')
     readonly_fields = ('average_rating', 'total_reviews', 'created_at', 'updated_at')
     inlines = [MenuItemInline, ChefAvailabilityScheduleInline]
@@ -47,10 +70,10 @@ class ChefProfileAdmin(admin.ModelAdmin):
             'fields': ('user', 'is_verified')
         }),
         ('Profile Details', {
-            'fields': ('bio', 'profile_picture', 'header_image')
+            'fields': ('bio', 'cuisine_type', 'profile_picture', 'header_image')
         }),
         ('Location', {
-            'fields': ('address', 'latitude', 'longitude', 'delivery_radius_km')
+            'fields': ('address', 'region', 'latitude', 'longitude', 'delivery_radius_km')
         }),
         ('Social Media', {
             'fields': ('instagram_url', 'facebook_url', 'tiktok_url', 'instagram_embed_code'),
@@ -141,6 +164,14 @@ class OrderItemAdmin(admin.ModelAdmin):
     readonly_fields = ('total_price',)
 
 
+@admin.register(PaymentIntentOutbox)
+class PaymentIntentOutboxAdmin(admin.ModelAdmin):
+    list_display = ('order', 'status', 'amount', 'attempts', 'next_attempt_at', 'sent_at')
+    list_filter = ('status',)
+    search_fields = ('order__id',)
+    readonly_fields = ('idempotency_key', 'client_secret', 'created_at', 'sent_at')
+
+
 @admin.register(Review)
 class ReviewAdmin(admin.ModelAdmin):
     list_display = ('client', 'chef_profile', 'rating', 'is_approved', 'is_flagged', 'created_at')
@@ -0,0 +1,42 @@
+"""
+Sync and async GraphQL resolvers side by side.
+
+Subscription resolvers are `async def` and run on the WebSocket consumer's
+event loop (core.consumers.GraphQLConsumer); the fields below them stay
+sync. When a sync resolver would run on an event loop ResolverThreadMiddleware
+hands it to Django's thread-sensitive worker with sync_to_async, where ORM
+access is allowed. Scalar fields only read attributes of rows that are
+already loaded, so they resolve inline without the thread hop. With no
+running loop, as in the HTTP view, every resolver is simply called.
+
+Async resolvers should return lists rather than QuerySets: LoaderMiddleware
+only sees the coroutine, not its result.
+"""
+import asyncio
+from inspect import isawaitable
+
+from asgiref.sync import sync_to_async
+from graphql import get_named_type, is_leaf_type
+
+
+def _in_event_loop():
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+class ResolverThreadMiddleware:
+    """Keeps sync resolvers off the event loop; must come last (outermost) in GRAPHENE['MIDDLEWARE']"""
+
+    def resolve(self, next, root, info, **args):
+        if not _in_event_loop() or is_leaf_type(get_named_type(info.return_type)):
+            return next(root, info, **args)
+        return self._resolve_in_thread(next, root, info, args)
+
+    async def _resolve_in_thread(self, next, root, info, args):
+        result = await sync_to_async(next)(root, info, **args)
+        if isawaitable(result):
+            result = await result
+        return result
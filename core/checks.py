@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+
+# Backends whose entries are private to one process
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    The snapshot, typeahead, search and resolver caches coordinate workers
+    through version counters in the default cache
+    """
+    backend = settings.CACHES['default']['BACKEND']
+    if backend in PROCESS_LOCAL_CACHES:
+        return [
+            Error(
+                f'The default cache ({backend}) is not shared between worker processes.',
+                hint='Set USE_REDIS=1 or point CACHES at Redis or Memcached.',
+                id='core.E001',
+            )
+        ]
+    return []
@@ -1,8 +1,19 @@
+import asyncio
 import json
-from channels.generic.websocket import AsyncWebsocketConsumer
+from collections import Counter, defaultdict
+from inspect import isawaitable
+from channels.generic.websocket import AsyncJsonWebsocketConsumer, AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 from django.contrib.auth import get_user_model
+from graphene_django.settings import graphene_settings
+from graphene_django.views import instantiate_middleware
+from graphql import (
+    ExecutionResult, GraphQLError, OperationType, create_source_event_stream, execute, get_operation_ast, parse,
+)
+from graphql.execution.middleware import MiddlewareManager
+from graphql.validation import specified_rules, validate
 from .models import Order, ChefProfile
+from .query_cost import query_cost_rule
 
 User = get_user_model()
 
@@ -138,4 +149,187 @@ class ClientConsumer(AsyncWebsocketConsumer):
             'order_id': event['order_id'],
             'status': event['status'],
             'chef_name': event.get('chef_name'),
-        }))
\ No newline at end of file
+        }))
+    
+    async def payment_ready(self, event):
+        """Tell the client an order can be paid; the client secret is fetched over GraphQL"""
+        await self.send(text_data=json.dumps({
+            'type': 'payment_ready',
+            'message': event['message'],
+            'order_id': event['order_id'],
+        }))
+
+
+GRAPHQL_TRANSPORT_WS = 'graphql-transport-ws'
+
+
+class GraphQLContext:
+    """
+    info.context for operations over a WebSocket
+
+    A fresh context is made for every execution, so per-request loaders never
+    serve rows cached by an earlier event.
+    """
+    
+    def __init__(self, consumer):
+        self.consumer = consumer
+        self.user = consumer.scope['user']
+
+
+class GraphQLConsumer(AsyncJsonWebsocketConsumer):
+    """
+    GraphQL over WebSocket, speaking the graphql-transport-ws protocol
+    
+    Subscriptions listen on the channel-layer groups the order signals
+    already publish to (`client_<id>`, `chef_<id>`), so every pushed event is
+    one order delta rather than a re-fetched order list. Queries and
+    mutations sent over the socket run once and complete.
+    """
+    
+    async def connect(self):
+        self.operations = {}  # operation id -> asyncio.Task
+        self.listeners = defaultdict(set)  # channel-layer message type -> queues
+        self.group_listeners = Counter()
+        self.initialized = False
+        self.middleware = MiddlewareManager(*instantiate_middleware(graphene_settings.MIDDLEWARE))
+        if GRAPHQL_TRANSPORT_WS not in self.scope.get('subprotocols', []):
+            await self.close()
+            return
+        await self.accept(subprotocol=GRAPHQL_TRANSPORT_WS)
+    
+    async def disconnect(self, close_code):
+        for task in self.operations.values():
+            task.cancel()
+        for group in self.group_listeners:
+            await self.channel_layer.group_discard(group, self.channel_name)
+        self.group_listeners.clear()
+    
+    async def receive_json(self, content):
+        message_type = content.get('type')
+        if message_type == 'connection_init':
+            if self.initialized:
+                await self.close(code=4429)  # Too many initialisation requests
+                return
+            self.initialized = True
+            await self.send_json({'type': 'connection_ack'})
+        elif message_type == 'ping':
+            await self.send_json({'type': 'pong'})
+        elif message_type == 'pong':
+            pass
+        elif not self.initialized:
+            await self.close(code=4401)  # Unauthorized
+        elif message_type == 'subscribe':
+            if not isinstance(content.get('id'), str):
+                await self.close(code=4400)  # Invalid message
+                return
+            if content['id'] in self.operations:
+                await self.close(code=4409)  # Subscriber already exists
+                return
+            await self.start_operation(content['id'], content.get('payload') or {})
+        elif message_type == 'complete':
+            task = self.operations.pop(content.get('id'), None)
+            if task is not None:
+                task.cancel()
+        else:
+            await self.close(code=4400)
+    
+    async def dispatch(self, message):
+        # Channel-layer events go to the subscriptions listening for them;
+        # other group traffic (e.g. review notifications) has no subscriber here
+        if message['type'].startswith('websocket.'):
+            await super().dispatch(message)
+            return
+        for queue in self.listeners.get(message['type'], ()):
+            queue.put_nowait(message)
+    
+    async def listen(self, group, message_type):
+        """
+        Join `group` and return an async iterator over its `message_type`
+        messages; closing the iterator leaves the group again.
+        """
+        queue = asyncio.Queue()
+        self.listeners[message_type].add(queue)
+        self.group_listeners[group] += 1
+        if self.group_listeners[group] == 1:
+            await self.channel_layer.group_add(group, self.channel_name)
+        return self._drain(queue, group, message_type)
+    
+    async def _drain(self, queue, group, message_type):
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self.listeners[message_type].discard(queue)
+            if self.group_listeners[group]:
+                self.group_listeners[group] -= 1
+                if not self.group_listeners[group]:
+                    del self.group_listeners[group]
+                    await self.channel_layer.group_discard(group, self.channel_name)
+    
+    async def start_operation(self, operation_id, payload):
+        """
+        Validate an operation and, for subscriptions, join its event stream
+        before returning, so events sent after the next message are delivered.
+        """
+        schema = graphene_settings.SCHEMA.graphql_schema
+        try:
+            document = parse(payload.get('query') or '')
+        except GraphQLError as error:
+            await self.send_error(operation_id, [error])
+            return
+        errors = validate(schema, document, (*specified_rules, query_cost_rule()))
+        if errors:
+            await self.send_error(operation_id, errors)
+            return
+        
+        variables = payload.get('variables')
+        operation_name = payload.get('operationName')
+        operation = get_operation_ast(document, operation_name)
+        if operation is not None and operation.operation == OperationType.SUBSCRIPTION:
+            stream = await create_source_event_stream(
+                schema, document,
+                context_value=GraphQLContext(self),
+                variable_values=variables,
+                operation_name=operation_name,
+            )
+            if isinstance(stream, ExecutionResult):
+                await self.send_error(operation_id, stream.errors)
+                return
+            runner = self.stream_results(operation_id, stream, document, variables, operation_name)
+        else:
+            runner = self.execute_once(operation_id, document, variables, operation_name)
+        self.operations[operation_id] = asyncio.create_task(runner)
+    
+    async def execute(self, document, variables, operation_name, root_value=None):
+        result = execute(
+            graphene_settings.SCHEMA.graphql_schema, document,
+            root_value=root_value,
+            context_value=GraphQLContext(self),
+            variable_values=variables,
+            operation_name=operation_name,
+            middleware=self.middleware,
+        )
+        if isawaitable(result):
+            result = await result
+        return result
+    
+    async def stream_results(self, operation_id, stream, document, variables, operation_name):
+        try:
+            async for event in stream:
+                result = await self.execute(document, variables, operation_name, root_value=event)
+                await self.send_json({'type': 'next', 'id': operation_id, 'payload': result.formatted})
+        finally:
+            await stream.aclose()
+        await self.complete(operation_id)
+    
+    async def execute_once(self, operation_id, document, variables, operation_name):
+        result = await self.execute(document, variables, operation_name)
+        await self.send_json({'type': 'next', 'id': operation_id, 'payload': result.formatted})
+        await self.complete(operation_id)
+    
+    async def complete(self, operation_id):
+        if self.operations.pop(operation_id, None) is not None:
+            await self.send_json({'type': 'complete', 'id': operation_id})
+    
+    async def send_error(self, operation_id, errors):
+        await self.send_json({'type': 'error', 'id': operation_id, 'payload': [error.formatted for error in errors]})
@@ -0,0 +1,110 @@
+"""
+Per-chef dietary capability bitmasks.
+
+A bit is set on ChefProfile.dietary_flags when the chef has at least one
+available menu item satisfying it, so dietary search is a single bitwise
+predicate on the chef row rather than a scan of every menu item's JSON.
+
+Bits are aggregated per chef, not per dish: "vegan, nut_free" matches a
+chef with some vegan dish and some nut-free dish, which need not be the
+same dish. The filter answers "can this chef cater to each requirement",
+and the menu page shows which dishes meet which.
+
+A bitmask test cannot seek in a B-tree, so the index on (is_verified,
+is_available, dietary_flags) does not jump to matching chefs. Instead it
+narrows the search to discoverable chefs and lets the test run on index
+entries without reading chef rows.
+"""
+from django.db.models import F
+
+# Diets
+VEGETARIAN = 1 << 0
+VEGAN = 1 << 1
+GLUTEN_FREE = 1 << 2
+
+# Allergen-free capabilities: "<allergen>_free" means at least one item without it
+ALLERGENS = ['nuts', 'peanuts', 'dairy', 'eggs', 'soy', 'wheat', 'fish', 'shellfish', 'sesame']
+
+ALLERGEN_ALIASES = {
+    'tree nuts': 'nuts',
+    'tree_nuts': 'nuts',
+    'nut': 'nuts',
+    'peanut': 'peanuts',
+    'milk': 'dairy',
+    'lactose': 'dairy',
+    'egg': 'eggs',
+    'soya': 'soy',
+    'gluten': 'wheat',
+    'shrimp': 'shellfish',
+    'crustaceans': 'shellfish',
+}
+
+FLAGS = {
+    'vegetarian': VEGETARIAN,
+    'vegan': VEGAN,
+    'gluten_free': GLUTEN_FREE,
+}
+FLAGS.update({f'{allergen}_free': 1 << (3 + i) for i, allergen in enumerate(ALLERGENS)})
+
+
+def normalize_allergen(allergen):
+    name = ' '.join(str(allergen).lower().replace('-', ' ').split())
+    return ALLERGEN_ALIASES.get(name, name)
+
+
+def item_flags(is_vegetarian, is_vegan, is_gluten_free, allergens):
+    """Capability bits satisfied by a single menu item"""
+    flags = 0
+    if is_vegetarian or is_vegan:
+        flags |= VEGETARIAN
+    if is_vegan:
+        flags |= VEGAN
+    if is_gluten_free:
+        flags |= GLUTEN_FREE
+    present = {normalize_allergen(allergen) for allergen in allergens or []}
+    for allergen in ALLERGENS:
+        if allergen not in present:
+            flags |= FLAGS[f'{allergen}_free']
+    return flags
+
+
+def chef_flags(chef_profile_id):
+    """Compute a chef's capability bits from their available menu items"""
+    from .models import MenuItem
+
+    flags = 0
+    for row in MenuItem.objects.filter(chef_profile_id=chef_profile_id, is_available=True).values_list(
+        'is_vegetarian', 'is_vegan', 'is_gluten_free', 'allergens'
+    ):
+        flags |= item_flags(*row)
+    return flags
+
+
+def update_chef_flags(chef_profile_id):
+    from .models import ChefProfile
+
+    ChefProfile.objects.filter(pk=chef_profile_id).update(dietary_flags=chef_flags(chef_profile_id))
+
+
+def parse_filter(dietary_filter):
+    """
+    Turn a comma separated filter such as "vegan, nut_free" into a bitmask.
+
+    Raises ValueError for unknown names.
+    """
+    mask = 0
+    for name in (dietary_filter or '').split(','):
+        name = name.strip().lower().replace('-', '_').replace(' ', '_')
+        if not name:
+            continue
+        if name not in FLAGS:
+            raise ValueError(f"Unknown dietary filter '{name}'. Choose from: {', '.join(FLAGS)}")
+        mask |= FLAGS[name]
+    return mask
+
+
+def filter_chefs(queryset, mask):
+    """Restrict a ChefProfile queryset to chefs with every bit in mask, each met by some dish"""
+    if not mask:
+        return queryset
+    return queryset.alias(dietary_match=F('dietary_flags').bitand(mask)).filter(dietary_match=mask)
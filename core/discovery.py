@@ -0,0 +1,87 @@
+"""
+Database-backed chef discovery queries shared by the GraphQL API and the client portal
+"""
+import base64
+import math
+
+from .geo import (
+    COVERAGE_CELL_DEGREES, grid_cell, haversine_km, nearest_within,
+    ring_cells, ring_distance_bounds, rings_for_radius,
+)
+from .models import ChefCoverageCell, ChefProfile
+
+
+def chef_ids_delivering_to(lat, lng):
+    """Return ids of chefs whose delivery radius covers the given point"""
+    coverage = ChefCoverageCell.objects.filter(
+        cell=grid_cell(lat, lng, COVERAGE_CELL_DEGREES)
+    ).values_list(
+        'chef_profile_id', 'fully_covered',
+        'chef_profile__latitude', 'chef_profile__longitude', 'chef_profile__delivery_radius_km',
+    )
+    # Only cells on the edge of a delivery radius need an exact distance check
+    return {
+        chef_id
+        for chef_id, fully_covered, chef_lat, chef_lng, radius_km in coverage
+        if fully_covered or haversine_km(lat, lng, chef_lat, chef_lng) <= radius_km
+    }
+
+
+def chefs_delivering_to(lat, lng, queryset=None):
+    """Restrict a ChefProfile queryset to chefs who deliver to the given point"""
+    if queryset is None:
+        queryset = ChefProfile.objects.all()
+    return queryset.filter(id__in=chef_ids_delivering_to(lat, lng))
+
+
+def encode_distance_cursor(distance_km, chef_id):
+    """Opaque cursor for a position in a nearest-first result stream"""
+    return base64.urlsafe_b64encode(f"{distance_km!r}:{chef_id}".encode()).decode()
+
+
+def decode_distance_cursor(cursor):
+    """Return (distance_km, chef_id) from a cursor, raising ValueError if malformed"""
+    try:
+        distance, chef_id = base64.urlsafe_b64decode(cursor.encode()).decode().split(':')
+        return float(distance), int(chef_id)
+    except ValueError as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def nearest_chefs_page(lat, lng, radius_km, first, after=None, queryset=None):
+    """
+    Return (chefs, has_next_page) for the next `first` chefs nearest to a point.
+    
+    Grid rings are scanned outward from the point's cell and the scan stops as
+    soon as the next ring cannot hold anything closer than what was found.
+    When resuming from an `after` cursor, rings that lie entirely closer than
+    the cursor are skipped, so earlier pages are not recomputed. Each returned
+    chef has `_distance_km` set.
+    """
+    if queryset is None:
+        queryset = ChefProfile.objects.all()
+    after_key = decode_distance_cursor(after) if after else None
+    
+    start_ring = 0
+    if after_key:
+        # First ring whose farthest point could still lie beyond the cursor
+        start_ring = max(math.floor(after_key[0] / ring_distance_bounds(lat, 0)[1]) - 1, 0)
+    last_ring = rings_for_radius(lat, radius_km)
+    
+    found = []
+    for ring in range(start_ring, last_ring + 1):
+        chefs = {chef.id: chef for chef in queryset.filter(geo_cell__in=ring_cells(lat, lng, ring))}
+        for chef_id, distance in nearest_within(
+            lat, lng, ((c.id, c.latitude, c.longitude) for c in chefs.values()), radius_km
+        ):
+            if after_key is None or (distance, chef_id) > after_key:
+                chefs[chef_id]._distance_km = distance
+                found.append(chefs[chef_id])
+        
+        # Stop once one more than a page is closer than anything in the next ring
+        next_ring_min = ring_distance_bounds(lat, ring + 1)[0]
+        if sum(1 for chef in found if chef._distance_km <= next_ring_min) > first:
+            break
+    
+    found.sort(key=lambda chef: (chef._distance_km, chef.id))
+    return found[:first], len(found) > first
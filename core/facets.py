@@ -0,0 +1,97 @@
+"""
+Precomputed facets for the chef search sidebar.
+
+Each chef has one ChefFacet row per (facet, value) it matches, so counts for
+every facet over any set of chefs come from a single GROUP BY instead of one
+COUNT per option. Rows are rewritten from signals whenever a chef or their
+menu changes, and `rebuild_facets` can regenerate them all on a schedule.
+
+Rating buckets are cumulative so they match the "4+ Stars" style filters: a
+4.6 chef has rows for 3, 4 and 4.5.
+"""
+from django.db import transaction
+from django.db.models import Count
+
+from . import dietary
+
+
+FACETS = ('cuisine', 'category', 'dietary', 'rating', 'availability')
+
+RATING_BUCKETS = ('3', '4', '4.5')
+
+
+def facet_values(cuisine_type, categories, dietary_flags, average_rating, is_available):
+    """Return the (facet, value) pairs for one chef"""
+    values = []
+    if cuisine_type:
+        values.append(('cuisine', cuisine_type))
+    values += [('category', category) for category in sorted(set(categories))]
+    values += [('dietary', name) for name, bit in dietary.FLAGS.items() if dietary_flags & bit]
+    values += [('rating', bucket) for bucket in RATING_BUCKETS if float(average_rating or 0) >= float(bucket)]
+    if is_available:
+        values.append(('availability', 'available'))
+    return values
+
+
+def update_chef_facets(chef_profile_id):
+    """Rewrite a chef's facet rows from the database"""
+    from .models import ChefFacet, ChefProfile, MenuItem
+
+    chef = ChefProfile.objects.filter(pk=chef_profile_id).values_list(
+        'cuisine_type', 'dietary_flags', 'average_rating', 'is_available'
+    ).first()
+    ChefFacet.objects.filter(chef_profile_id=chef_profile_id).delete()
+    if chef is None:
+        return
+    cuisine_type, dietary_flags, average_rating, is_available = chef
+    categories = MenuItem.objects.filter(
+        chef_profile_id=chef_profile_id, is_available=True
+    ).values_list('category', flat=True)
+    ChefFacet.objects.bulk_create([
+        ChefFacet(chef_profile_id=chef_profile_id, facet=facet, value=value)
+        for facet, value in facet_values(cuisine_type, categories, dietary_flags, average_rating, is_available)
+    ])
+
+
+@transaction.atomic
+def rebuild_facets():
+    """Regenerate every chef's facet rows; returns the number of rows written"""
+    from .models import ChefFacet, ChefProfile, MenuItem
+
+    categories = {}
+    for chef_id, category in MenuItem.objects.filter(is_available=True).values_list('chef_profile_id', 'category'):
+        categories.setdefault(chef_id, []).append(category)
+
+    rows = [
+        ChefFacet(chef_profile_id=chef_id, facet=facet, value=value)
+        for chef_id, *chef in ChefProfile.objects.values_list(
+            'id', 'cuisine_type', 'dietary_flags', 'average_rating', 'is_available'
+        )
+        for facet, value in facet_values(chef[0], categories.get(chef_id, []), *chef[1:])
+    ]
+    ChefFacet.objects.all().delete()
+    ChefFacet.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def facet_counts(chefs):
+    """
+    Count chefs per facet value over a ChefProfile queryset, in one query.
+
+    Returns {facet: {value: count}}.
+    """
+    from .models import ChefFacet
+
+    counts = {facet: {} for facet in FACETS}
+    for facet, value, count in ChefFacet.objects.filter(
+        chef_profile__in=chefs.order_by().values('id')
+    ).values_list('facet', 'value').annotate(count=Count('id')).order_by():
+        counts[facet][value] = count
+    return counts
+
+
+def filter_by_facet(chefs, facet, value):
+    """Restrict a ChefProfile queryset to chefs with the given facet value"""
+    from .models import ChefFacet
+
+    return chefs.filter(id__in=ChefFacet.objects.filter(facet=facet, value=value).values('chef_profile_id'))
@@ -0,0 +1,179 @@
+"""
+Geospatial helpers for chef discovery (plain lat/lng, no GIS backend required)
+"""
+import math
+
+import numpy as np
+
+
+EARTH_RADIUS_KM = 6371
+KM_PER_DEGREE_LAT = 111.32
+KM_PER_MILE = 1.609344
+
+# Fixed lat/lng grid used to index chef locations. 0.1 degrees is roughly
+# 11km north-south, so a typical 10km discovery radius touches a 3x3 block.
+GRID_CELL_DEGREES = 0.1
+
+# Finer grid for delivery coverage, so most covered cells lie entirely inside
+# a chef's delivery radius and need no distance check at query time.
+COVERAGE_CELL_DEGREES = 0.02
+
+
+def _grid_row(lat, size):
+    return math.floor(lat / size)
+
+
+def _grid_col(lng, size):
+    # Wrap into [-180, 180) so cells are stable across the antimeridian
+    columns = int(round(360 / size))
+    col = math.floor(lng / size)
+    return (col + columns // 2) % columns - columns // 2
+
+
+def grid_cell(lat, lng, size=GRID_CELL_DEGREES):
+    """Return the grid cell key containing the given coordinates"""
+    if lat is None or lng is None:
+        return None
+    return f"{_grid_row(lat, size)}:{_grid_col(lng, size)}"
+
+
+def bounding_box(lat, lng, radius_km):
+    """Return (min_lat, max_lat, min_lng, max_lng) enclosing a radius around a point"""
+    delta_lat = radius_km / KM_PER_DEGREE_LAT
+    # Longitude degrees shrink towards the poles; clamp to avoid dividing by ~0
+    cos_lat = max(math.cos(math.radians(lat)), 0.01)
+    delta_lng = min(radius_km / (KM_PER_DEGREE_LAT * cos_lat), 180)
+    return (
+        max(lat - delta_lat, -90),
+        min(lat + delta_lat, 90),
+        lng - delta_lng,
+        lng + delta_lng,
+    )
+
+
+def _grid_block(lat, lng, radius_km, size):
+    """Yield (row, unwrapped_col) for every cell in the bounding box of a radius"""
+    min_lat, max_lat, min_lng, max_lng = bounding_box(lat, lng, radius_km)
+    columns = int(round(360 / size))
+    first_col = math.floor(min_lng / size)
+    last_col = min(math.floor(max_lng / size), first_col + columns - 1)
+    for row in range(_grid_row(min_lat, size), _grid_row(max_lat, size) + 1):
+        for col in range(first_col, last_col + 1):
+            yield row, col
+
+
+def cells_for_radius(lat, lng, radius_km, size=GRID_CELL_DEGREES):
+    """Return the grid cell keys covering the bounding box of a radius around a point"""
+    return list(dict.fromkeys(
+        f"{row}:{_grid_col(col * size + size / 2, size)}"
+        for row, col in _grid_block(lat, lng, radius_km, size)
+    ))
+
+
+def coverage_cells(lat, lng, radius_km, size=COVERAGE_CELL_DEGREES):
+    """
+    Return (cell, fully_covered) for every grid cell a delivery radius reaches.
+    
+    Cells whose nearest point is outside the radius are skipped. A cell is
+    fully covered when all of its corners are within the radius.
+    """
+    cells = {}
+    for row, col in _grid_block(lat, lng, radius_km, size):
+        lat_lo, lat_hi = row * size, (row + 1) * size
+        lng_lo, lng_hi = col * size, (col + 1) * size
+        nearest = haversine_km(
+            lat, lng, min(max(lat, lat_lo), lat_hi), min(max(lng, lng_lo), lng_hi)
+        )
+        if nearest > radius_km:
+            continue
+        farthest = max(
+            haversine_km(lat, lng, corner_lat, corner_lng)
+            for corner_lat in (lat_lo, lat_hi) for corner_lng in (lng_lo, lng_hi)
+        )
+        key = f"{row}:{_grid_col(col * size + size / 2, size)}"
+        cells[key] = cells.get(key, False) or farthest <= radius_km
+    return list(cells.items())
+
+
+def ring_cells(lat, lng, ring, size=GRID_CELL_DEGREES):
+    """Return the grid cell keys exactly `ring` cells away (Chebyshev) from the point's cell"""
+    row0, col0 = _grid_row(lat, size), math.floor(lng / size)
+    max_row = _grid_row(90, size)
+    if ring == 0:
+        offsets = [(0, 0)]
+    else:
+        offsets = [(dr, dc) for dr in (-ring, ring) for dc in range(-ring, ring + 1)]
+        offsets += [(dr, dc) for dc in (-ring, ring) for dr in range(-ring + 1, ring)]
+    return list(dict.fromkeys(
+        f"{row0 + dr}:{_grid_col((col0 + dc) * size + size / 2, size)}"
+        for dr, dc in offsets
+        if -max_row - 1 <= row0 + dr <= max_row
+    ))
+
+
+def ring_distance_bounds(lat, ring, size=GRID_CELL_DEGREES):
+    """
+    Return (min_km, max_km) distance from a point to anything in a grid ring.
+    
+    Bounds are conservative so ring-by-ring nearest-neighbour search can stop
+    as soon as the next ring cannot contain anything closer.
+    """
+    cell_height = size * KM_PER_DEGREE_LAT
+    # Cells are narrowest at the highest latitude the ring reaches
+    cell_width = cell_height * math.cos(math.radians(min(abs(lat) + size * (ring + 1), 90)))
+    min_km = max(ring - 1, 0) * cell_width
+    max_km = (ring + 1) * cell_height * math.sqrt(2)
+    return min_km, max_km
+
+
+def rings_for_radius(lat, radius_km, size=GRID_CELL_DEGREES):
+    """Return the number of grid rings needed to cover a radius around a point"""
+    ring = 0
+    while ring * size < 180 and ring_distance_bounds(lat, ring + 1, size)[0] <= radius_km:
+        ring += 1
+    return ring
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Calculate distance between two coordinates in kilometers"""
+    lat1_rad = math.radians(lat1)
+    lat2_rad = math.radians(lat2)
+    delta_lat = math.radians(lat2 - lat1)
+    delta_lon = math.radians(lon2 - lon1)
+
+    a = (math.sin(delta_lat / 2) * math.sin(delta_lat / 2) +
+         math.cos(lat1_rad) * math.cos(lat2_rad) *
+         math.sin(delta_lon / 2) * math.sin(delta_lon / 2))
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+    return EARTH_RADIUS_KM * c
+
+
+def haversine_km_many(lat, lng, lats, lngs):
+    """Calculate distances in kilometers from one point to arrays of coordinates"""
+    lat1 = np.radians(lat)
+    lat2 = np.radians(np.asarray(lats, dtype=np.float64))
+    delta_lat = lat2 - lat1
+    delta_lon = np.radians(np.asarray(lngs, dtype=np.float64) - lng)
+
+    a = (np.sin(delta_lat / 2) ** 2 +
+         np.cos(lat1) * np.cos(lat2) * np.sin(delta_lon / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def nearest_within(lat, lng, points, radius_km=None):
+    """
+    Rank (id, latitude, longitude) points by distance from a location.
+    
+    Returns a list of (id, distance_km) sorted nearest first, optionally cut
+    off at radius_km. Distances for every point are computed in one NumPy call.
+    """
+    points = list(points)
+    if not points:
+        return []
+    ids, lats, lngs = zip(*points)
+    distances = haversine_km_many(lat, lng, lats, lngs)
+    order = np.argsort(distances, kind='stable')
+    if radius_km is not None:
+        order = order[distances[order] <= radius_km]
+    return [(ids[i], float(distances[i])) for i in order]
@@ -0,0 +1,143 @@
+"""
+Per-request batching loaders for nested GraphQL fields.
+
+Resolving `myOrders { chefProfile { user } items { menuItem } }` naively runs
+one query per order, per item and per related object. Instead, type
+resolvers ask a loader for the related rows, and the loader fetches them for
+every sibling at once: the first order to ask for its chef profile loads the
+chef profiles of all orders in the list, and later orders are served from the
+loader's cache. Query count therefore depends on the depth of the query, not
+on the length of its lists.
+
+Siblings are announced by LoaderMiddleware, which tags each model instance in
+a list result with the list it came from; rows returned by a loader batch are
+tagged with the whole batch, so grandchildren batch across parents too.
+Loaders live on the request for the duration of one GraphQL operation.
+"""
+from django.db.models import Model, QuerySet
+
+import graphene
+
+from .models import ChefProfile, MenuItem, Order, OrderItem, PaymentIntentOutbox, Review, User
+
+
+SIBLINGS_ATTR = '_loader_siblings'
+
+
+def _by_id(model):
+    def batch(keys):
+        return model.objects.in_bulk(keys)
+    return batch
+
+
+def _grouped(model, field):
+    def batch(keys):
+        groups = {key: [] for key in keys}
+        for row in model.objects.filter(**{f'{field}__in': keys}).order_by('pk'):
+            groups[getattr(row, field)].append(row)
+        return groups
+    return batch
+
+
+def _by_unique(model, field):
+    def batch(keys):
+        return {getattr(row, field): row for row in model.objects.filter(**{f'{field}__in': keys})}
+    return batch
+
+
+def tag_siblings(instances):
+    """Mark model instances as one batch so per-instance loads are fetched together"""
+    group = [instance for instance in instances if isinstance(instance, Model)]
+    for instance in group:
+        if not hasattr(instance, SIBLINGS_ATTR):
+            setattr(instance, SIBLINGS_ATTR, group)
+    return group
+
+
+class Loader:
+    """Cache of keyed lookups that loads every pending sibling key in one batch"""
+
+    def __init__(self, batch, many=False):
+        self.batch = batch
+        self.many = many
+        self._cache = {}
+
+    def load(self, key, sibling_keys=()):
+        if key not in self._cache:
+            keys = list({key, *sibling_keys} - self._cache.keys() - {None})
+            found = self.batch(keys) if keys else {}
+            loaded = []
+            for k in keys:
+                value = found.get(k, [] if self.many else None)
+                self._cache[k] = value
+                loaded.extend(value if self.many else [value])
+            tag_siblings(loaded)
+        return self._cache.get(key, [] if self.many else None)
+
+
+class Loaders:
+    """The loaders for one request"""
+
+    def __init__(self):
+        self.users = Loader(_by_id(User))
+        self.chef_profiles = Loader(_by_id(ChefProfile))
+        self.menu_items = Loader(_by_id(MenuItem))
+        self.orders = Loader(_by_id(Order))
+        self.menu_items_by_chef = Loader(_grouped(MenuItem, 'chef_profile_id'), many=True)
+        self.order_items_by_order = Loader(_grouped(OrderItem, 'order_id'), many=True)
+        self.reviews_by_chef = Loader(_grouped(Review, 'chef_profile_id'), many=True)
+        self.review_by_order = Loader(_by_unique(Review, 'order_id'))
+        self.payment_by_order = Loader(_by_unique(PaymentIntentOutbox, 'order_id'))
+
+
+def get_loaders(info):
+    """Loaders stored on the request, created on first use"""
+    context = info.context
+    if context is None:
+        return Loaders()
+    loaders = getattr(context, '_graphql_loaders', None)
+    if loaders is None:
+        loaders = Loaders()
+        context._graphql_loaders = loaders
+    return loaders
+
+
+def reset_loaders(context):
+    """Drop the loaders (and their cached rows) stored on a request"""
+    context._graphql_loaders = None
+
+
+def load_related(info, loader_name, instance, key_attr):
+    """
+    Load the rows related to `instance` through `key_attr`, batching its siblings.
+
+    e.g. load_related(info, 'users', order, 'client_id')
+
+    A forward relation already joined by select_related (see
+    core.projection) is returned from the join, and the joined rows of all
+    siblings become a batch of their own.
+    """
+    siblings = getattr(instance, SIBLINGS_ATTR, ())
+    field = instance._meta.get_field(key_attr)
+    if field.is_relation and field.is_cached(instance):
+        related = field.get_cached_value(instance)
+        if related is not None and not hasattr(related, SIBLINGS_ATTR):
+            tag_siblings([field.get_cached_value(sibling) for sibling in siblings if field.is_cached(sibling)])
+        return related
+    return getattr(get_loaders(info), loader_name).load(
+        getattr(instance, key_attr), [getattr(sibling, key_attr) for sibling in siblings]
+    )
+
+
+class LoaderMiddleware:
+    """Announces list results to the loaders by tagging their items as siblings"""
+
+    def resolve(self, next, root, info, **args):
+        result = next(root, info, **args)
+        if isinstance(result, QuerySet):
+            result = list(result)
+        if isinstance(result, list):
+            tag_siblings(result)
+        elif isinstance(result, graphene.relay.Connection):
+            tag_siblings([edge.node for edge in result.edges])
+        return result
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from core import search_cache, snapshot
+from core.models import ChefProfile, Region
+from core.resolver_cache import invalidate_tags
+from core.versions import bump_shared_version
+
+
+class Command(BaseCommand):
+    help = 'Parse chef addresses into structured regions for indexed location filters'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Re-parse every chef, not only those without a region',
+        )
+
+    def handle(self, *args, **options):
+        chefs = ChefProfile.objects.only('id', 'address', 'region')
+        if not options['all']:
+            chefs = chefs.filter(region__isnull=True)
+
+        updated = []
+        unparsed = 0
+        for chef in chefs.iterator():
+            region = Region.for_address(chef.address)
+            if region is None:
+                unparsed += 1
+                continue
+            if chef.region_id != region.id:
+                ChefProfile.objects.filter(pk=chef.pk).update(region=region)
+                updated.append(chef.pk)
+
+        # update() sends no signals, so expire what the ChefProfile receivers would have
+        if updated:
+            search_cache.invalidate_chefs()
+            invalidate_tags('chefs', *(f'chef:{chef_id}' for chef_id in updated))
+            bump_shared_version(snapshot.VERSION_CACHE_KEY)
+
+        self.stdout.write(self.style.SUCCESS(f'Assigned regions to {len(updated)} chefs'))
+        if unparsed:
+            self.stdout.write(self.style.WARNING(f'{unparsed} addresses could not be parsed'))
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from core.geo import haversine_km, nearest_within
+import random
+import timeit
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the vectorized chef distance engine against the scalar haversine loop'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chefs', type=int, default=10000, help='Number of chef coordinates')
+        parser.add_argument('--radius', type=float, default=10, help='Search radius in kilometers')
+        parser.add_argument('--repeat', type=int, default=20, help='Timed runs per implementation')
+
+    def handle(self, *args, **options):
+        rng = random.Random(42)
+        origin = (40.7128, -74.0060)
+        points = [
+            (i, origin[0] + rng.uniform(-0.5, 0.5), origin[1] + rng.uniform(-0.5, 0.5))
+            for i in range(options['chefs'])
+        ]
+        radius = options['radius']
+
+        def scalar_loop():
+            nearby = []
+            for chef_id, lat, lng in points:
+                distance = haversine_km(origin[0], origin[1], lat, lng)
+                if distance <= radius:
+                    nearby.append((chef_id, distance))
+            nearby.sort(key=lambda x: x[1])
+            return nearby
+
+        def vectorized():
+            return nearest_within(origin[0], origin[1], points, radius)
+
+        if [c for c, _ in scalar_loop()] != [c for c, _ in vectorized()]:
+            self.stderr.write(self.style.ERROR('Implementations disagree on results'))
+            return
+
+        scalar = min(timeit.repeat(scalar_loop, number=1, repeat=options['repeat']))
+        vector = min(timeit.repeat(vectorized, number=1, repeat=options['repeat']))
+
+        self.stdout.write(f"Chefs: {options['chefs']}, radius: {radius}km, matches: {len(vectorized())}")
+        self.stdout.write(f'Scalar loop:  {scalar * 1000:.2f} ms')
+        self.stdout.write(f'Vectorized:   {vector * 1000:.2f} ms')
+        self.stdout.write(self.style.SUCCESS(f'Speedup: {scalar / vector:.1f}x'))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from core.pricing import rebuild_zone_tables
+
+
+class Command(BaseCommand):
+    help = 'Precompute the delivery zone cell map and zone-to-zone fee matrix'
+
+    def handle(self, *args, **options):
+        cell_count, fee_count = rebuild_zone_tables()
+        self.stdout.write(self.style.SUCCESS(
+            f'Mapped {cell_count} grid cells and priced {fee_count} zone pairs'
+        ))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from core.payment_outbox import drain
+import time
+
+
+class Command(BaseCommand):
+    help = 'Send queued Stripe PaymentIntents, retrying failures with backoff (see core.payment_outbox)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help='Rows claimed per query')
+        parser.add_argument('--loop', action='store_true', help='Keep draining until interrupted')
+        parser.add_argument('--interval', type=float, default=1.0, help='Seconds between passes with --loop')
+
+    def handle(self, *args, **options):
+        while True:
+            counts = drain(options['batch_size'])
+            if any(counts.values()) or not options['loop']:
+                self.stdout.write(self.style.SUCCESS(
+                    f"Sent {counts['sent']}, will retry {counts['pending']}, failed {counts['failed']}"
+                ))
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from core.facets import rebuild_facets
+
+
+class Command(BaseCommand):
+    help = 'Regenerate the precomputed chef search facets (safe to run on a schedule)'
+
+    def handle(self, *args, **options):
+        row_count = rebuild_facets()
+        self.stdout.write(self.style.SUCCESS(f'Wrote {row_count} facet rows'))
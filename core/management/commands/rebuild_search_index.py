@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from core.search import rebuild_index, search_backend
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index for chefs and menu items'
+
+    def handle(self, *args, **options):
+        if search_backend() is None:
+            self.stdout.write(self.style.WARNING('This database has no full-text index; nothing to do'))
+            return
+        count = rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} chefs'))
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-17 02:07
+
+from django.db import migrations, models
+
+from core.geo import grid_cell
+
+
+def backfill_geo_cells(apps, schema_editor):
+    ChefProfile = apps.get_model('core', 'ChefProfile')
+    for chef in ChefProfile.objects.only('id', 'latitude', 'longitude').iterator():
+        ChefProfile.objects.filter(pk=chef.pk).update(
+            geo_cell=grid_cell(chef.latitude, chef.longitude)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_remove_chefprofile_city_remove_chefprofile_state_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chefprofile',
+            name='geo_cell',
+            field=models.CharField(blank=True, editable=False, help_text='Spatial grid cell derived from latitude/longitude (see core.geo)', max_length=16, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='chefprofile',
+            index=models.Index(fields=['geo_cell', 'is_available', 'is_verified'], name='core_chefpr_geo_cel_208029_idx'),
+        ),
+        migrations.RunPython(backfill_geo_cells, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.30 on 2026-10-17 02:09
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from core.geo import coverage_cells
+
+
+def backfill_coverage_cells(apps, schema_editor):
+    ChefProfile = apps.get_model('core', 'ChefProfile')
+    ChefCoverageCell = apps.get_model('core', 'ChefCoverageCell')
+    for chef in ChefProfile.objects.only('id', 'latitude', 'longitude', 'delivery_radius_km').iterator():
+        ChefCoverageCell.objects.bulk_create([
+            ChefCoverageCell(chef_profile_id=chef.id, cell=cell, fully_covered=full)
+            for cell, full in coverage_cells(chef.latitude, chef.longitude, chef.delivery_radius_km)
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_chefprofile_geo_cell'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChefCoverageCell',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cell', models.CharField(max_length=16)),
+                ('fully_covered', models.BooleanField(default=False, help_text='Whole cell lies inside the delivery radius (no distance check needed)')),
+                ('chef_profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='coverage_cells', to='core.chefprofile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['cell'], name='core_chefco_cell_54f11a_idx')],
+                'unique_together': {('chef_profile', 'cell')},
+            },
+        ),
+        migrations.RunPython(backfill_coverage_cells, migrations.RunPython.noop),
+    ]
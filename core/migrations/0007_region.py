@@ -0,0 +1,32 @@
+# Generated by Django 4.2.30 on 2026-10-17 02:14
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_chefcoveragecell'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Region',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('city', models.CharField(max_length=100)),
+                ('state', models.CharField(max_length=50)),
+                ('postal_code', models.CharField(blank=True, max_length=10)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['state'], name='core_region_state_321ddd_idx')],
+                'unique_together': {('city', 'state', 'postal_code')},
+            },
+        ),
+        migrations.AddField(
+            model_name='chefprofile',
+            name='region',
+            field=models.ForeignKey(blank=True, help_text='Structured location parsed from the address', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='chefs', to='core.region'),
+        ),
+    ]
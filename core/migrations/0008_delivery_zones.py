@@ -0,0 +1,46 @@
+# Generated by Django 4.2.30 on 2026-10-17 02:16
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_region'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeliveryZone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('latitude', models.FloatField(help_text='Zone centroid latitude')),
+                ('longitude', models.FloatField(help_text='Zone centroid longitude')),
+                ('radius_km', models.PositiveIntegerField(default=25, help_text='Area served by this zone')),
+                ('is_active', models.BooleanField(default=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DeliveryZoneCell',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cell', models.CharField(max_length=16, unique=True)),
+                ('zone', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cells', to='core.deliveryzone')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DeliveryZoneFee',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('distance_km', models.FloatField()),
+                ('fee', models.DecimalField(decimal_places=2, max_digits=6)),
+                ('destination', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fees_to', to='core.deliveryzone')),
+                ('origin', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fees_from', to='core.deliveryzone')),
+            ],
+            options={
+                'unique_together': {('origin', 'destination')},
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.30 on 2026-10-17 02:17
+
+from django.db import migrations
+
+from core.search import build_document, create_index, drop_index, write_document
+
+
+def create_search_index(apps, schema_editor):
+    create_index(schema_editor)
+    if schema_editor.connection.vendor not in ('sqlite', 'postgresql'):
+        return
+
+    ChefProfile = apps.get_model('core', 'ChefProfile')
+    MenuItem = apps.get_model('core', 'MenuItem')
+    menus = {}
+    for chef_id, name, description in MenuItem.objects.filter(is_available=True).values_list(
+        'chef_profile_id', 'name', 'description'
+    ):
+        menus.setdefault(chef_id, []).append((name, description))
+
+    with schema_editor.connection.cursor() as cursor:
+        for chef_id, first_name, last_name, bio in ChefProfile.objects.values_list(
+            'id', 'user__first_name', 'user__last_name', 'bio'
+        ):
+            document = build_document(first_name, last_name, bio, menus.get(chef_id, []))
+            write_document(cursor, schema_editor.connection.vendor, chef_id, document)
+
+
+def drop_search_index(apps, schema_editor):
+    drop_index(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_delivery_zones'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
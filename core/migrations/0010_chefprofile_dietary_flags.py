@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-17 02:19
+
+from django.db import migrations, models
+
+from core.dietary import item_flags
+
+
+def backfill_dietary_flags(apps, schema_editor):
+    ChefProfile = apps.get_model('core', 'ChefProfile')
+    MenuItem = apps.get_model('core', 'MenuItem')
+    flags = {}
+    for chef_id, *item in MenuItem.objects.filter(is_available=True).values_list(
+        'chef_profile_id', 'is_vegetarian', 'is_vegan', 'is_gluten_free', 'allergens'
+    ):
+        flags[chef_id] = flags.get(chef_id, 0) | item_flags(*item)
+    for chef_id, chef_flags in flags.items():
+        ChefProfile.objects.filter(pk=chef_id).update(dietary_flags=chef_flags)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_chef_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chefprofile',
+            name='dietary_flags',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Dietary capability bitmask derived from the menu (see core.dietary)'),
+        ),
+        migrations.RunPython(backfill_dietary_flags, migrations.RunPython.noop),
+    ]
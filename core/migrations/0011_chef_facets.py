@@ -0,0 +1,53 @@
+# Generated by Django 4.2.30 on 2026-10-17 02:23
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from core.facets import facet_values
+
+
+def backfill_facets(apps, schema_editor):
+    ChefProfile = apps.get_model('core', 'ChefProfile')
+    ChefFacet = apps.get_model('core', 'ChefFacet')
+    MenuItem = apps.get_model('core', 'MenuItem')
+    categories = {}
+    for chef_id, category in MenuItem.objects.filter(is_available=True).values_list('chef_profile_id', 'category'):
+        categories.setdefault(chef_id, []).append(category)
+    ChefFacet.objects.bulk_create([
+        ChefFacet(chef_profile_id=chef_id, facet=facet, value=value)
+        for chef_id, cuisine_type, dietary_flags, average_rating, is_available in ChefProfile.objects.values_list(
+            'id', 'cuisine_type', 'dietary_flags', 'average_rating', 'is_available'
+        )
+        for facet, value in facet_values(
+            cuisine_type, categories.get(chef_id, []), dietary_flags, average_rating, is_available
+        )
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_chefprofile_dietary_flags'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chefprofile',
+            name='cuisine_type',
+            field=models.CharField(blank=True, choices=[('american', 'American'), ('italian', 'Italian'), ('mexican', 'Mexican'), ('chinese', 'Chinese'), ('indian', 'Indian'), ('japanese', 'Japanese'), ('thai', 'Thai'), ('french', 'French'), ('mediterranean', 'Mediterranean'), ('asian', 'Asian'), ('fusion', 'Fusion'), ('other', 'Other')], help_text='Primary cuisine', max_length=20),
+        ),
+        migrations.CreateModel(
+            name='ChefFacet',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('facet', models.CharField(max_length=20)),
+                ('value', models.CharField(max_length=30)),
+                ('chef_profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='facets', to='core.chefprofile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['facet', 'value'], name='core_cheffa_facet_1cf284_idx')],
+                'unique_together': {('chef_profile', 'facet', 'value')},
+            },
+        ),
+        migrations.RunPython(backfill_facets, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-17 02:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_chef_facets'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['client', 'created_at', 'id'], name='core_order_client__87eb06_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['chef_profile', 'created_at', 'id'], name='core_order_chef_pr_ee974b_idx'),
+        ),
+    ]
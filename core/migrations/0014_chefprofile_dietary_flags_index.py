@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-17 03:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_payment_intent_outbox'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='chefprofile',
+            index=models.Index(fields=['is_verified', 'is_available', 'dietary_flags'], name='core_chefpr_is_veri_49f6c8_idx'),
+        ),
+    ]
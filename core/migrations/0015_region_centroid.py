@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-17 03:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_chefprofile_dietary_flags_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='region',
+            name='latitude',
+            field=models.FloatField(blank=True, help_text='Centroid used to price deliveries (set by staff)', null=True),
+        ),
+        migrations.AddField(
+            model_name='region',
+            name='longitude',
+            field=models.FloatField(blank=True, help_text='Centroid used to price deliveries (set by staff)', null=True),
+        ),
+    ]
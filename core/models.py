@@ -1,9 +1,13 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.utils import timezone
 from decimal import Decimal
 import uuid
 
+from .addresses import parse_address
+from .geo import coverage_cells, grid_cell
+
 
 class User(AbstractUser):
     """
@@ -23,14 +27,76 @@ class User(AbstractUser):
     
     def __str__(self):
         return f"{self.username} ({self.get_role_display()})"
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Chef names are indexed for search; remember them to skip unrelated saves
+        if {'first_name', 'last_name'} <= instance.__dict__.keys():
+            instance._loaded_name = (instance.first_name, instance.last_name)
+        return instance
+
+
+class Region(models.Model):
+    """
+    Normalized city/state/postal area that chef addresses resolve to
+    """
+    city = models.CharField(max_length=100)
+    state = models.CharField(max_length=50)
+    postal_code = models.CharField(max_length=10, blank=True)
+    latitude = models.FloatField(null=True, blank=True, help_text="Centroid used to price deliveries (set by staff)")
+    longitude = models.FloatField(null=True, blank=True, help_text="Centroid used to price deliveries (set by staff)")
+    
+    def __str__(self):
+        return f"{self.city}, {self.state} {self.postal_code}".strip()
+    
+    @classmethod
+    def for_address(cls, address):
+        """Return the region an address belongs to, creating it if needed"""
+        parsed = parse_address(address)
+        if parsed is None:
+            return None
+        city, state, postal_code = parsed
+        region, _ = cls.objects.get_or_create(city=city, state=state, postal_code=postal_code)
+        return region
+    
+    class Meta:
+        unique_together = ['city', 'state', 'postal_code']
+        indexes = [
+            models.Index(fields=['state']),
+        ]
 
 
 class ChefProfile(models.Model):
     """
     Chef profile model containing all chef-specific information
     """
+    CUISINE_CHOICES = [
+        ('american', 'American'),
+        ('italian', 'Italian'),
+        ('mexican', 'Mexican'),
+        ('chinese', 'Chinese'),
+        ('indian', 'Indian'),
+        ('japanese', 'Japanese'),
+        ('thai', 'Thai'),
+        ('french', 'French'),
+        ('mediterranean', 'Mediterranean'),
+        ('asian', 'Asian'),
+        ('fusion', 'Fusion'),
+        ('other', 'Other'),
+    ]
+    
+    # Columns read by chef discovery and search (see core.search_cache)
+    DISCOVERY_FIELDS = (
+        'bio', 'cuisine_type', 'latitude', 'longitude', 'region_id', 'is_available', 'is_verified',
+        'delivery_radius_km', 'average_rating', 'total_reviews',
+    )
+    # Columns copied into each worker's discovery snapshot (see core.snapshot)
+    SNAPSHOT_FIELDS = ('latitude', 'longitude', 'average_rating', 'total_reviews', 'is_available', 'is_verified')
+    
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='chef_profile')
     bio = models.TextField(help_text="Chef's personal story and background")
+    cuisine_type = models.CharField(max_length=20, choices=CUISINE_CHOICES, blank=True, help_text="Primary cuisine")
     profile_picture = models.ImageField(upload_to='chef_profiles/', blank=True, null=True)
     header_image = models.ImageField(upload_to='chef_headers/', blank=True, null=True)
     
@@ -38,6 +104,21 @@ class ChefProfile(models.Model):
     latitude = models.FloatField(help_text="Chef's latitude coordinate")
     longitude = models.FloatField(help_text="Chef's longitude coordinate")
     address = models.CharField(max_length=255)
+    region = models.ForeignKey(
+        Region,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='chefs',
+        help_text="Structured location parsed from the address"
+    )
+    geo_cell = models.CharField(
+        max_length=16,
+        blank=True,
+        null=True,
+        editable=False,
+        help_text="Spatial grid cell derived from latitude/longitude (see core.geo)"
+    )
     
     # Social media integration
     instagram_url = models.URLField(blank=True, null=True)
@@ -58,6 +139,11 @@ class ChefProfile(models.Model):
         default=Decimal('0.00'),
         help_text="Minimum order amount required"
     )
+    dietary_flags = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Dietary capability bitmask derived from the menu (see core.dietary)"
+    )
     
     # Ratings and reviews
     average_rating = models.DecimalField(
@@ -82,13 +168,141 @@ class ChefProfile(models.Model):
     def __str__(self):
         return f"Chef: {self.user.get_full_name() or self.user.username}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Read loaded values directly so deferred fields are not fetched here
+        loaded = instance.__dict__
+        if {'latitude', 'longitude', 'delivery_radius_km'} <= loaded.keys():
+            instance._loaded_coverage_key = instance.coverage_key
+        if set(cls.DISCOVERY_FIELDS) <= loaded.keys():
+            instance._loaded_discovery_key = instance.discovery_key
+        if set(cls.SNAPSHOT_FIELDS) <= loaded.keys():
+            instance._loaded_snapshot_key = instance.snapshot_key
+        instance._loaded_address = loaded.get('address')
+        instance._loaded_is_verified = loaded.get('is_verified')
+        return instance
+    
+    @property
+    def coverage_key(self):
+        """Inputs that determine the delivery coverage cells"""
+        return (self.latitude, self.longitude, float(self.delivery_radius_km or 0))
+    
+    @property
+    def discovery_key(self):
+        """Values that can change which chefs a discovery search returns, or their order"""
+        return tuple(getattr(self, field) for field in self.DISCOVERY_FIELDS)
+    
+    @property
+    def snapshot_key(self):
+        """Values held in the discovery snapshot"""
+        return tuple(getattr(self, field) for field in self.SNAPSHOT_FIELDS)
+    
+    def rebuild_coverage(self):
+        """Recompute the delivery coverage cells for this chef"""
+        self.coverage_cells.all().delete()
+        if self.latitude is not None and self.longitude is not None:
+            ChefCoverageCell.objects.bulk_create([
+                ChefCoverageCell(chef_profile=self, cell=cell, fully_covered=full)
+                for cell, full in coverage_cells(
+                    self.latitude, self.longitude, float(self.delivery_radius_km or 0)
+                )
+            ])
+        self._loaded_coverage_key = self.coverage_key
+    
+    def save(self, *args, **kwargs):
+        # Keep the spatial grid cell in sync with the coordinates
+        self.geo_cell = grid_cell(self.latitude, self.longitude)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'latitude', 'longitude'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'geo_cell'}
+        
+        # Resolve the structured region whenever the address changes
+        if self._state.adding or self.address != getattr(self, '_loaded_address', None):
+            self.region = Region.for_address(self.address)
+            self._loaded_address = self.address
+            if update_fields is not None and 'address' in update_fields:
+                kwargs['update_fields'] = set(kwargs['update_fields']) | {'region'}
+        super().save(*args, **kwargs)
+    
     class Meta:
         indexes = [
             models.Index(fields=['is_available']),
             models.Index(fields=['is_verified']),
+            models.Index(fields=['geo_cell', 'is_available', 'is_verified']),
+            # Dietary search tests the bitmask on index entries of discoverable chefs (see core.dietary)
+            models.Index(fields=['is_verified', 'is_available', 'dietary_flags']),
+        ]
+
+
+class ChefCoverageCell(models.Model):
+    """
+    Precomputed delivery coverage: one row per grid cell a chef delivers to
+    """
+    chef_profile = models.ForeignKey(ChefProfile, on_delete=models.CASCADE, related_name='coverage_cells')
+    cell = models.CharField(max_length=16)
+    fully_covered = models.BooleanField(
+        default=False,
+        help_text="Whole cell lies inside the delivery radius (no distance check needed)"
+    )
+    
+    class Meta:
+        unique_together = ['chef_profile', 'cell']
+        indexes = [
+            models.Index(fields=['cell']),
+        ]
+
+
+class ChefFacet(models.Model):
+    """
+    Precomputed search facets: one row per (facet, value) a chef matches
+    """
+    chef_profile = models.ForeignKey(ChefProfile, on_delete=models.CASCADE, related_name='facets')
+    facet = models.CharField(max_length=20)
+    value = models.CharField(max_length=30)
+    
+    class Meta:
+        unique_together = ['chef_profile', 'facet', 'value']
+        indexes = [
+            models.Index(fields=['facet', 'value']),
         ]
 
 
+class DeliveryZone(models.Model):
+    """
+    Pricing zone defined by a centroid; delivery fees are looked up per zone pair
+    """
+    name = models.CharField(max_length=100, unique=True)
+    latitude = models.FloatField(help_text="Zone centroid latitude")
+    longitude = models.FloatField(help_text="Zone centroid longitude")
+    radius_km = models.PositiveIntegerField(default=25, help_text="Area served by this zone")
+    is_active = models.BooleanField(default=True)
+    
+    def __str__(self):
+        return self.name
+
+
+class DeliveryZoneCell(models.Model):
+    """
+    Precomputed grid cell to nearest delivery zone mapping
+    """
+    cell = models.CharField(max_length=16, unique=True)
+    zone = models.ForeignKey(DeliveryZone, on_delete=models.CASCADE, related_name='cells')
+
+
+class DeliveryZoneFee(models.Model):
+    """
+    Precomputed zone-to-zone distance and delivery fee matrix
+    """
+    origin = models.ForeignKey(DeliveryZone, on_delete=models.CASCADE, related_name='fees_from')
+    destination = models.ForeignKey(DeliveryZone, on_delete=models.CASCADE, related_name='fees_to')
+    distance_km = models.FloatField()
+    fee = models.DecimalField(max_digits=6, decimal_places=2)
+    
+    class Meta:
+        unique_together = ['origin', 'destination']
+
+
 class MenuItem(models.Model):
     """
     Individual menu items that chefs offer
@@ -134,6 +348,25 @@ class MenuItem(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # Columns read by chef search and facets (see core.search_cache)
+    SEARCH_FIELDS = (
+        'chef_profile_id', 'name', 'description', 'category', 'allergens',
+        'is_vegetarian', 'is_vegan', 'is_gluten_free', 'is_available',
+    )
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if set(cls.SEARCH_FIELDS) <= instance.__dict__.keys():
+            instance._loaded_search_key = instance.search_key
+        return instance
+    
+    @property
+    def search_key(self):
+        # Copy JSON lists so in-place edits still register as changes
+        values = (getattr(self, field) for field in self.SEARCH_FIELDS)
+        return tuple(tuple(value) if isinstance(value, list) else value for value in values)
+    
     def __str__(self):
         return f"{self.name} - {self.chef_profile.user.username}"
     
@@ -193,6 +426,12 @@ class Order(models.Model):
     confirmed_at = models.DateTimeField(null=True, blank=True)
     completed_at = models.DateTimeField(null=True, blank=True)
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
+    
     def __str__(self):
         return f"Order #{str(self.id)[:8]} - {self.client.username} from {self.chef_profile.user.username}"
     
@@ -206,6 +445,9 @@ class Order(models.Model):
             models.Index(fields=['client', 'status']),
             models.Index(fields=['chef_profile', 'status']),
             models.Index(fields=['created_at']),
+            # Keyset pagination of order lists (see core.pagination)
+            models.Index(fields=['client', 'created_at', 'id']),
+            models.Index(fields=['chef_profile', 'created_at', 'id']),
         ]
 
 
@@ -237,6 +479,42 @@ class OrderItem(models.Model):
         return f"{self.quantity}x {self.menu_item.name}"
 
 
+class PaymentIntentOutbox(models.Model):
+    """
+    Stripe PaymentIntent to create for an order, written in the order's
+    transaction and sent by drain_payment_outbox (see core.payment_outbox)
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+    
+    order = models.OneToOneField(Order, on_delete=models.CASCADE, related_name='payment')
+    idempotency_key = models.UUIDField(default=uuid.uuid4, editable=False)
+    amount = models.PositiveIntegerField(help_text="Amount in cents")
+    currency = models.CharField(max_length=3, default='usd')
+    metadata = models.JSONField(default=dict, blank=True)
+    
+    # Delivery state
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    client_secret = models.CharField(max_length=255, blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    
+    def __str__(self):
+        return f"PaymentIntent for order #{str(self.order_id)[:8]} ({self.status})"
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+
 class Review(models.Model):
     """
     Review and rating system for orders
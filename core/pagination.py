@@ -0,0 +1,127 @@
+"""
+Keyset (seek) pagination for long, append-heavy lists such as orders.
+
+Pages are fetched with `WHERE (created_at, id) < (last seen)` against an
+index instead of COUNT(*) plus OFFSET, so page 500 costs the same as page 1.
+Cursors are opaque base64 tokens holding the boundary row's ordering values
+and the direction of travel. Totals are optional and approximate: they are
+counted once and cached briefly.
+"""
+import base64
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+APPROXIMATE_TOTAL_TIMEOUT = 60
+
+
+def encode_cursor(values, backwards=False):
+    payload = json.dumps([str(value) for value in values] + ['p' if backwards else 'n'])
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Return (values, backwards) from a cursor, raising ValueError if malformed"""
+    try:
+        *values, direction = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    if direction not in ('n', 'p') or not values:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return values, direction == 'p'
+
+
+def _seek(ordering, values, backwards):
+    """Q selecting rows strictly after `values` in `ordering` (before, if backwards)"""
+    condition = Q()
+    for i in reversed(range(len(ordering))):
+        field = ordering[i].lstrip('-')
+        descending = ordering[i].startswith('-')
+        lookup = 'lt' if descending != backwards else 'gt'
+        step = Q(**{f'{field}__{lookup}': values[i]})
+        if i < len(ordering) - 1:
+            step |= Q(**{field: values[i]}) & condition
+        condition = step
+    return condition
+
+
+def approximate_total(queryset):
+    """Row count for a queryset, cached for APPROXIMATE_TOTAL_TIMEOUT seconds"""
+    key = 'core:approximate_total:' + hashlib.sha1(str(queryset.query).encode()).hexdigest()
+    total = cache.get(key)
+    if total is None:
+        total = queryset.count()
+        cache.set(key, total, timeout=APPROXIMATE_TOTAL_TIMEOUT)
+    return total
+
+
+class KeysetPage:
+    """One page of a keyset-paginated queryset; iterates like a Paginator page"""
+
+    def __init__(self, object_list, has_next, has_previous, next_cursor, previous_cursor, total=None):
+        self.object_list = object_list
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.approximate_total = total
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+
+def keyset_page(queryset, ordering, per_page, cursor=None, with_total=False):
+    """
+    Return the KeysetPage following (or preceding) `cursor`.
+
+    `ordering` must end in a unique column, e.g. ('-created_at', '-id').
+    Raises ValueError for a malformed cursor or one that does not match
+    `ordering`, rather than silently restarting from the first page.
+    """
+    values, backwards = decode_cursor(cursor) if cursor else (None, False)
+    if values is not None and len(values) != len(ordering):
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+    rows = queryset
+    if values is not None:
+        try:
+            rows = rows.filter(_seek(ordering, values, backwards))
+        except (ValidationError, TypeError, ValueError) as e:
+            raise ValueError(f"Invalid cursor: {cursor}") from e
+    if backwards:
+        rows = rows.order_by(*[field[1:] if field.startswith('-') else f'-{field}' for field in ordering])
+    else:
+        rows = rows.order_by(*ordering)
+    rows = list(rows[:per_page + 1])
+
+    more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backwards:
+        rows.reverse()
+
+    def boundary(row):
+        return [getattr(row, field.lstrip('-')) for field in ordering]
+
+    has_next = more if not backwards else True
+    has_previous = values is not None and (more if backwards else True)
+    return KeysetPage(
+        rows,
+        has_next=bool(rows) and has_next,
+        has_previous=bool(rows) and has_previous,
+        next_cursor=encode_cursor(boundary(rows[-1])) if rows else None,
+        previous_cursor=encode_cursor(boundary(rows[0]), backwards=True) if rows else None,
+        total=approximate_total(queryset) if with_total else None,
+    )
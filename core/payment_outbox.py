@@ -0,0 +1,129 @@
+"""
+Transactional outbox for Stripe PaymentIntents.
+
+createOrder does not call Stripe while the client waits. It writes a
+PaymentIntentOutbox row in the same transaction as the order, so either
+both exist or neither does, and `drain_payment_outbox` sends the pending
+rows afterwards. Every row carries an idempotency key, so a retry after a
+timeout gets back the intent Stripe already created rather than a second one.
+
+Failed sends are retried with exponential backoff, starting at
+PAYMENT_OUTBOX_RETRY_SECONDS, up to PAYMENT_OUTBOX_MAX_ATTEMPTS; requests
+Stripe rejects as invalid fail at once. Once the intent exists its client
+secret is stored on the row, where the order's client can read it
+(`Order.payment` in GraphQL), and a `payment_ready` message is pushed to
+the client's channel group.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+import stripe
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Order, PaymentIntentOutbox
+
+
+CENT = Decimal('0.01')
+
+# Longest wait between two attempts at the same row, in seconds
+MAX_RETRY_DELAY = 3600
+
+stripe.api_key = settings.STRIPE_SECRET_KEY
+
+
+def enqueue_payment_intent(order):
+    """Queue the PaymentIntent for an order; call inside the transaction that saves it"""
+    return PaymentIntentOutbox.objects.create(
+        order=order,
+        # In cents, rounded the way the saved total_amount is
+        amount=int(order.total_amount.quantize(CENT) * 100),
+        currency='usd',
+        metadata={
+            'order_id': str(order.id),
+            'chef_id': str(order.chef_profile_id),
+            'client_id': str(order.client_id),
+        },
+    )
+
+
+def claim_due(batch_size):
+    """
+    Return up to `batch_size` pending rows that are due, leasing them for
+    PAYMENT_OUTBOX_LEASE_SECONDS so a concurrent drain skips them.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        entries = list(
+            PaymentIntentOutbox.objects.select_for_update(skip_locked=True, of=('self',))
+            .filter(status='pending', next_attempt_at__lte=now)
+            .order_by('next_attempt_at')[:batch_size]
+        )
+        PaymentIntentOutbox.objects.filter(pk__in=[entry.pk for entry in entries]).update(
+            next_attempt_at=now + timedelta(seconds=settings.PAYMENT_OUTBOX_LEASE_SECONDS)
+        )
+    return entries
+
+
+def _fail(entry, error):
+    with transaction.atomic():
+        entry.status = 'failed'
+        entry.last_error = str(error)
+        entry.save(update_fields=['status', 'attempts', 'last_error'])
+        Order.objects.filter(pk=entry.order_id).update(payment_status='failed')
+
+
+def send(entry):
+    """Create the PaymentIntent for a claimed row; return its new status"""
+    entry.attempts += 1
+    try:
+        intent = stripe.PaymentIntent.create(
+            amount=entry.amount,
+            currency=entry.currency,
+            metadata=entry.metadata,
+            idempotency_key=str(entry.idempotency_key),
+        )
+    except stripe.error.InvalidRequestError as e:
+        _fail(entry, e)
+        return entry.status
+    except Exception as e:
+        if entry.attempts >= settings.PAYMENT_OUTBOX_MAX_ATTEMPTS:
+            _fail(entry, e)
+            return entry.status
+        delay = min(settings.PAYMENT_OUTBOX_RETRY_SECONDS * 2 ** (entry.attempts - 1), MAX_RETRY_DELAY)
+        entry.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+        entry.last_error = str(e)
+        entry.save(update_fields=['attempts', 'next_attempt_at', 'last_error'])
+        return entry.status
+
+    with transaction.atomic():
+        entry.status = 'sent'
+        entry.client_secret = intent.client_secret
+        entry.last_error = ''
+        entry.sent_at = timezone.now()
+        entry.save(update_fields=['status', 'attempts', 'client_secret', 'last_error', 'sent_at'])
+        Order.objects.filter(pk=entry.order_id).update(stripe_payment_intent=intent.id)
+
+    async_to_sync(get_channel_layer().group_send)(
+        f"client_{entry.metadata['client_id']}",
+        {
+            'type': 'payment_ready',
+            'message': f'Payment ready for order #{str(entry.order_id)[:8]}',
+            'order_id': str(entry.order_id),
+        }
+    )
+    return entry.status
+
+
+def drain(batch_size=100):
+    """Send every due row, a batch at a time; return the number of rows per resulting status"""
+    counts = {'sent': 0, 'pending': 0, 'failed': 0}
+    while True:
+        entries = claim_due(batch_size)
+        if not entries:
+            return counts
+        for entry in entries:
+            counts[send(entry)] += 1
@@ -0,0 +1,102 @@
+"""
+Persisted GraphQL queries and the parsed-document cache.
+
+Clients may send `extensions.persistedQuery.sha256Hash` (the Apollo
+automatic persisted query protocol) instead of the query text. Documents are
+parsed and validated once, then kept in a bounded LRU keyed by the SHA-256 of
+their text, so repeat requests skip both steps whether they arrive by hash or
+in full.
+
+With GRAPHQL_PERSISTED_QUERIES_ONLY enabled, only documents listed in the
+GRAPHQL_PERSISTED_QUERY_MANIFEST file are executed; everything else is
+refused before parsing. The manifest is a JSON object whose values are query
+texts (keys are free-form, e.g. operation names); entries are addressed by
+the SHA-256 of their text.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+
+PERSISTED_QUERY_NOT_FOUND = 'PersistedQueryNotFound'
+PERSISTED_QUERY_NOT_ALLOWED = 'PersistedQueryNotAllowed'
+
+
+def query_hash(query):
+    return hashlib.sha256(query.encode()).hexdigest()
+
+
+def requested_hash(request, data):
+    """The sha256Hash of a persisted query request, or None"""
+    extensions = request.GET.get('extensions') or data.get('extensions')
+    if isinstance(extensions, str):
+        try:
+            extensions = json.loads(extensions)
+        except ValueError:
+            return None
+    persisted = (extensions or {}).get('persistedQuery') or {}
+    return persisted.get('sha256Hash') if isinstance(persisted, dict) else None
+
+
+class DocumentCache:
+    """Thread-safe LRU of validated documents keyed by query hash"""
+
+    def __init__(self, max_size=None):
+        self._max_size = max_size
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    @property
+    def max_size(self):
+        return self._max_size if self._max_size is not None else settings.GRAPHQL_DOCUMENT_CACHE_SIZE
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_manifest = None
+_manifest_lock = threading.Lock()
+
+
+def manifest():
+    """Allow-listed queries by hash, loaded once from GRAPHQL_PERSISTED_QUERY_MANIFEST"""
+    global _manifest
+    if _manifest is None:
+        with _manifest_lock:
+            if _manifest is None:
+                path = settings.GRAPHQL_PERSISTED_QUERY_MANIFEST
+                queries = {}
+                if path:
+                    with open(path) as f:
+                        queries = json.load(f)
+                _manifest = {query_hash(query): query for query in queries.values()}
+    return _manifest
+
+
+def reset_manifest():
+    global _manifest
+    _manifest = None
+
+
+document_cache = DocumentCache()
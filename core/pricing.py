@@ -0,0 +1,136 @@
+"""
+Order pricing: distance-based delivery fees from the precomputed zone matrix
+"""
+from decimal import Decimal, ROUND_HALF_UP
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+
+from .addresses import parse_address
+from .geo import GRID_CELL_DEGREES, cells_for_radius, grid_cell, haversine_km, haversine_km_many
+from .models import DeliveryZone, DeliveryZoneCell, DeliveryZoneFee, Region
+
+
+def zone_fee(distance_km):
+    """Delivery fee for a centroid-to-centroid distance"""
+    fee = settings.DELIVERY_FEE_BASE + settings.DELIVERY_FEE_PER_KM * Decimal(str(distance_km))
+    return fee.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+
+def delivery_coordinates(lat, lng):
+    """
+    Coerce client-supplied coordinates to floats; None when either is missing.
+
+    Raises ValueError for values that are not numbers or are out of range.
+    """
+    if lat in (None, '') or lng in (None, ''):
+        return None
+    try:
+        lat, lng = float(lat), float(lng)
+    except (TypeError, ValueError):
+        raise ValueError('Delivery coordinates must be numbers')
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        raise ValueError('Delivery coordinates are out of range')
+    return lat, lng
+
+
+def address_location(address):
+    """
+    Location of a delivery address: the staff-maintained centroid of its
+    region, preferring the postal code's own region over other regions in the
+    city. None when the address cannot be parsed or no centroid is set.
+    """
+    parsed = parse_address(address)
+    if parsed is None:
+        return None
+    city, state, postal_code = parsed
+    centroids = {
+        code: (lat, lng)
+        for code, lat, lng in Region.objects.filter(
+            city=city, state=state, latitude__isnull=False, longitude__isnull=False,
+        ).order_by('id').values_list('postal_code', 'latitude', 'longitude')
+    }
+    if not centroids:
+        return None
+    return centroids.get(postal_code) or next(iter(centroids.values()))
+
+
+def delivery_destination(address, lat=None, lng=None):
+    """
+    Where an order is priced to, derived on the server from its address.
+
+    Client coordinates only refine the address's location when they lie
+    within DELIVERY_LOCATION_TOLERANCE_KM of it, so they cannot move an
+    order into a cheaper zone. Returns None when the address is unknown.
+    """
+    claimed = delivery_coordinates(lat, lng)
+    located = address_location(address)
+    if located is None:
+        return None
+    if claimed is not None and haversine_km(*located, *claimed) <= settings.DELIVERY_LOCATION_TOLERANCE_KM:
+        return claimed
+    return located
+
+
+def delivery_fee(chef_profile, address, lat=None, lng=None):
+    """
+    Price delivery from a chef to a delivery address with one indexed lookup.
+
+    Both ends are mapped to zones through the precomputed cell table. Falls
+    back to DEFAULT_DELIVERY_FEE when the address cannot be located or
+    either end is outside every zone.
+    """
+    destination = delivery_destination(address, lat, lng)
+    if destination is None:
+        return settings.DEFAULT_DELIVERY_FEE
+    origin_cell = chef_profile.geo_cell or grid_cell(chef_profile.latitude, chef_profile.longitude)
+    fee = DeliveryZoneFee.objects.filter(
+        origin__cells__cell=origin_cell,
+        destination__cells__cell=grid_cell(*destination),
+    ).values_list('fee', flat=True).first()
+    return fee if fee is not None else settings.DEFAULT_DELIVERY_FEE
+
+
+@transaction.atomic
+def rebuild_zone_tables():
+    """
+    Recompute the cell-to-zone map and the zone-to-zone fee matrix.
+
+    Returns (cell_count, fee_count).
+    """
+    zones = list(DeliveryZone.objects.filter(is_active=True))
+    DeliveryZoneCell.objects.all().delete()
+    DeliveryZoneFee.objects.all().delete()
+    if not zones:
+        return 0, 0
+
+    centroid_lats = np.array([zone.latitude for zone in zones])
+    centroid_lngs = np.array([zone.longitude for zone in zones])
+
+    # Assign each cell in any zone's service area to its nearest centroid
+    cells = {}
+    for zone in zones:
+        for cell in cells_for_radius(zone.latitude, zone.longitude, zone.radius_km):
+            if cell in cells:
+                continue
+            row, col = (int(part) for part in cell.split(':'))
+            center_lat = (row + 0.5) * GRID_CELL_DEGREES
+            center_lng = (col + 0.5) * GRID_CELL_DEGREES
+            distances = haversine_km_many(center_lat, center_lng, centroid_lats, centroid_lngs)
+            cells[cell] = zones[int(np.argmin(distances))]
+    DeliveryZoneCell.objects.bulk_create(
+        [DeliveryZoneCell(cell=cell, zone=zone) for cell, zone in cells.items()],
+        batch_size=1000,
+    )
+
+    fees = []
+    for origin in zones:
+        for destination in zones:
+            distance = haversine_km(origin.latitude, origin.longitude, destination.latitude, destination.longitude)
+            fees.append(DeliveryZoneFee(
+                origin=origin, destination=destination,
+                distance_km=round(distance, 2), fee=zone_fee(distance),
+            ))
+    DeliveryZoneFee.objects.bulk_create(fees, batch_size=1000)
+    return len(cells), len(fees)
@@ -0,0 +1,100 @@
+"""
+Column projection for GraphQL list resolvers.
+
+The object types expose every column (`fields = '__all__'`), so a plain
+queryset reads `bio`, `instagram_embed_code` and `verification_documents`
+even for `{ id distanceKm }`. `project()` walks the field's selection set,
+maps the requested GraphQL fields to model columns and narrows the queryset
+with only(). Forward relations whose own selection is understood are joined
+with select_related() and projected the same way; load_related() then
+serves them from the join instead of a batch query.
+
+Fields that are not columns must be listed in COMPUTED_FIELDS with the
+columns they read. A selection naming anything else (a resolver this module
+does not know about) leaves the queryset unprojected rather than risk a
+deferred-column query per row.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import ForeignObjectRel
+from graphene.utils.str_converters import to_snake_case
+from graphql import FieldNode, FragmentSpreadNode, InlineFragmentNode
+
+from .models import ChefProfile, Order, OrderItem
+
+
+# GraphQL fields that are not model columns, and the columns their resolvers read
+COMPUTED_FIELDS = {
+    ChefProfile: {'distance_km': ()},
+    Order: {'payment': ('client',)},  # Only the paying client sees it
+    OrderItem: {'total_price': ('quantity', 'unit_price')},
+}
+
+# Forward relations are joined at most this deep; deeper ones go through the loaders
+MAX_JOIN_DEPTH = 2
+
+
+def _fields(info, selection_set):
+    """Field nodes of a selection set, with fragments expanded"""
+    for selection in selection_set.selections:
+        if isinstance(selection, FieldNode):
+            yield selection
+        elif isinstance(selection, InlineFragmentNode):
+            yield from _fields(info, selection.selection_set)
+        elif isinstance(selection, FragmentSpreadNode):
+            yield from _fields(info, info.fragments[selection.name.value].selection_set)
+
+
+def selected_fields(info, path=()):
+    """Field nodes selected at `path` (e.g. ('edges', 'node')) below the field being resolved"""
+    nodes = list(info.field_nodes)
+    for name in (*path, None):
+        nodes = [
+            field
+            for node in nodes if node.selection_set
+            for field in _fields(info, node.selection_set)
+            if name is None or field.name.value == name
+        ]
+    return nodes
+
+
+def _lookups(info, model, fields, prefix='', depth=0):
+    """(only, select_related) lookups covering `fields`, or None if one is not understood"""
+    only, related = {prefix + model._meta.pk.name}, set()
+    computed = COMPUTED_FIELDS.get(model, {})
+    for node in fields:
+        if node.name.value == '__typename':
+            continue
+        name = to_snake_case(node.name.value)
+        if name in computed:
+            only.update(prefix + column for column in computed[name])
+            continue
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return None
+        if isinstance(field, ForeignObjectRel) or field.many_to_many:
+            # Reverse and many-to-many relations are loaded separately by primary key
+            continue
+        only.add(prefix + name)
+        if field.is_relation and node.selection_set and depth < MAX_JOIN_DEPTH:
+            nested = _lookups(
+                info, field.related_model, list(_fields(info, node.selection_set)), f'{prefix}{name}__', depth + 1
+            )
+            if nested is not None:
+                only |= nested[0]
+                related |= {prefix + name, *nested[1]}
+    return only, related
+
+
+def project(queryset, info, path=(), required=()):
+    """
+    Narrow `queryset` to the columns requested at `path` below the current
+    field, plus `required` columns the resolver itself reads.
+    """
+    lookups = _lookups(info, queryset.model, selected_fields(info, path))
+    if lookups is None:
+        return queryset
+    only, related = lookups
+    if related:
+        queryset = queryset.select_related(*related)
+    return queryset.only(*only, *required)
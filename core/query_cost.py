@@ -0,0 +1,149 @@
+"""
+Validation-stage cost and depth limits for GraphQL documents.
+
+Every field costs one point. A list field multiplies the cost of its
+selection by its page size: the literal `first`/`last`/`limit` argument, the
+argument's schema default, or GRAPHQL_LIST_SIZE when nothing bounds it.
+Fields listed in MAX_PAGE_SIZES are priced at the page they actually serve:
+literal sizes are capped at the field's maximum, and a size passed as a
+variable, unknown during validation, is priced at the maximum. A
+paginated field that returns an object (a Relay connection) hands its page
+size to the list beneath it, so `nearbyChefs(first: 5) { edges { node } }`
+counts five edges rather than 5 x GRAPHQL_LIST_SIZE.
+
+Documents deeper than GRAPHQL_MAX_DEPTH or costlier than GRAPHQL_MAX_COST are
+rejected during validation, before any resolver runs. Introspection fields
+are free so GraphiQL keeps working.
+"""
+from django.conf import settings
+from graphql import GraphQLError, ValidationRule
+from graphql.language import FieldNode, FragmentSpreadNode, InlineFragmentNode, IntValueNode, VariableNode
+from graphql.type import get_named_type, get_nullable_type, is_list_type
+
+
+PAGE_SIZE_ARGUMENTS = ('first', 'last', 'limit')
+
+# Largest page each paginated field serves, by schema coordinate ('Query.myOrders'); filled in by core.schema
+MAX_PAGE_SIZES = {}
+
+
+def _page_size(field_node, field_def, max_size=None):
+    """
+    Literal or default page size argument of a field capped at `max_size`,
+    `max_size` for a variable page size, or None
+    """
+    literals = {argument.name.value: argument.value for argument in field_node.arguments or ()}
+    for name in PAGE_SIZE_ARGUMENTS:
+        value = literals.get(name)
+        if isinstance(value, IntValueNode):
+            size = max(int(value.value), 0)
+        elif isinstance(value, VariableNode) and max_size is not None:
+            return max_size
+        elif value is None and name in field_def.args and isinstance(field_def.args[name].default_value, int):
+            size = field_def.args[name].default_value
+        else:
+            continue
+        return size if max_size is None else min(size, max_size)
+    return None
+
+
+class QueryCost:
+    """Computes (cost, depth) for the selection sets of one document"""
+
+    def __init__(self, context):
+        self.context = context
+        self.schema = context.schema
+
+    def operation(self, operation):
+        root = self.schema.get_root_type(operation.operation)
+        if root is None:
+            return 0, 0
+        return self.selection_set(operation.selection_set, root, None, frozenset())
+
+    def selection_set(self, selection_set, parent_type, inherited_size, fragments):
+        cost = depth = 0
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode):
+                field_cost, field_depth = self.field(selection, parent_type, inherited_size, fragments)
+            elif isinstance(selection, InlineFragmentNode):
+                fragment_type = (
+                    self.schema.get_type(selection.type_condition.name.value)
+                    if selection.type_condition else parent_type
+                )
+                field_cost, field_depth = self.selection_set(
+                    selection.selection_set, fragment_type, inherited_size, fragments
+                )
+            elif isinstance(selection, FragmentSpreadNode):
+                name = selection.name.value
+                fragment = self.context.get_fragment(name)
+                if fragment is None or name in fragments:
+                    continue
+                field_cost, field_depth = self.selection_set(
+                    fragment.selection_set,
+                    self.schema.get_type(fragment.type_condition.name.value),
+                    inherited_size,
+                    fragments | {name},
+                )
+            else:
+                continue
+            cost += field_cost
+            depth = max(depth, field_depth)
+        return cost, depth
+
+    def field(self, node, parent_type, inherited_size, fragments):
+        name = node.name.value
+        if name.startswith('__'):
+            return 0, 0
+        field_def = getattr(parent_type, 'fields', {}).get(name)
+        if field_def is None:
+            return 1, 1
+
+        page_size = _page_size(node, field_def, MAX_PAGE_SIZES.get(f'{parent_type.name}.{name}'))
+        is_list = is_list_type(get_nullable_type(field_def.type))
+        if is_list:
+            multiplier = next(
+                size for size in (page_size, inherited_size, settings.GRAPHQL_LIST_SIZE) if size is not None
+            )
+            child_size = None
+        else:
+            multiplier = 1
+            child_size = page_size if page_size is not None else inherited_size
+
+        if not node.selection_set:
+            return 1, 1
+        child_cost, child_depth = self.selection_set(
+            node.selection_set, get_named_type(field_def.type), child_size, fragments
+        )
+        return 1 + multiplier * child_cost, 1 + child_depth
+
+
+def query_cost_rule(report=None):
+    """
+    Build a validation rule enforcing the configured budgets.
+
+    `report(cost, depth)` is called with the largest operation's figures.
+    """
+
+    class QueryCostRule(ValidationRule):
+        def enter_document(self, node, *args):
+            cost = depth = 0
+            calculator = QueryCost(self.context)
+            for definition in node.definitions:
+                if getattr(definition, 'operation', None) is None:
+                    continue
+                operation_cost, operation_depth = calculator.operation(definition)
+                cost, depth = max(cost, operation_cost), max(depth, operation_depth)
+                if operation_depth > settings.GRAPHQL_MAX_DEPTH:
+                    self.report_error(GraphQLError(
+                        f"Query depth {operation_depth} exceeds the maximum of {settings.GRAPHQL_MAX_DEPTH}",
+                        definition,
+                    ))
+                if operation_cost > settings.GRAPHQL_MAX_COST:
+                    self.report_error(GraphQLError(
+                        f"Query cost {operation_cost} exceeds the maximum of {settings.GRAPHQL_MAX_COST}",
+                        definition,
+                    ))
+            if report is not None:
+                report(cost, depth)
+
+    return QueryCostRule
@@ -0,0 +1,80 @@
+"""
+Shared cache for GraphQL resolvers that return public data.
+
+`@cached_resolver(tags=...)` stores a root resolver's result in the Django
+cache keyed by the field name and its arguments, never by the user, so
+anonymous and signed-in clients share entries. Tags are format strings over
+the arguments ('chef:{id}'); each tag has a generation counter that is part
+of the key, and bumping it with `invalidate_tags` orphans every entry
+carrying the tag. Signals bump the tags when chefs or menu items change,
+once the change is committed. Counters and entries live in the default
+cache, which must be shared by all workers (see core.checks).
+
+Only the resolver's own rows are cached. Nested fields are resolved per
+request through the loaders, so they are never stale.
+"""
+import functools
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import QuerySet
+
+from .versions import bump_shared_version, shared_version
+
+
+TAG_KEY_PREFIX = 'core:resolver_cache:tag'
+RESULT_KEY_PREFIX = 'core:resolver_cache:result'
+
+_MISSING = object()
+
+
+def _tag_key(tag):
+    return f'{TAG_KEY_PREFIX}:{tag}'
+
+
+def invalidate_tags(*tags):
+    """
+    Orphan every entry carrying one of the tags once the current transaction
+    commits; a reader that caches rows before then is orphaned too.
+    """
+    def bump():
+        for tag in tags:
+            bump_shared_version(_tag_key(tag))
+
+    transaction.on_commit(bump)
+
+
+def cache_key(field_name, arguments, tags):
+    digest = hashlib.sha1(json.dumps(arguments, sort_keys=True, default=str).encode()).hexdigest()
+    versions = ':'.join(str(shared_version(_tag_key(tag))) for tag in tags)
+    return f'{RESULT_KEY_PREFIX}:{field_name}:{versions}:{digest}'
+
+
+def cached_resolver(tags=(), timeout=None):
+    """
+    Cache a root resolver's result across requests and users.
+
+    `timeout` defaults to GRAPHQL_RESOLVER_CACHE_TIMEOUT. QuerySets are
+    evaluated before they are stored.
+    """
+
+    def decorator(resolver):
+        @functools.wraps(resolver)
+        def wrapper(root, info, **arguments):
+            key = cache_key(info.field_name, arguments, [tag.format(**arguments) for tag in tags])
+            result = cache.get(key, _MISSING)
+            if result is _MISSING:
+                result = resolver(root, info, **arguments)
+                if isinstance(result, QuerySet):
+                    result = list(result)
+                cache.set(
+                    key, result,
+                    timeout=timeout if timeout is not None else settings.GRAPHQL_RESOLVER_CACHE_TIMEOUT,
+                )
+            return result
+        return wrapper
+
+    return decorator
@@ -1,20 +1,37 @@
 import graphene
 from graphene_django import DjangoObjectType
-from graphene_django.filter import DjangoFilterConnectionField
+from graphql import GraphQLError
 from django.contrib.auth import authenticate, login, logout
-import math
 from django.utils import timezone
-from django.db import models
+from django.db import models, transaction
 from decimal import Decimal
-import stripe
-from django.conf import settings
 
 from .models import (
-    User, ChefProfile, MenuItem, Order, OrderItem, Review,
+    User, ChefProfile, MenuItem, Order, OrderItem, PaymentIntentOutbox, Review,
     ChefAvailabilitySchedule, ChefUnavailableDate
 )
-
-stripe.api_key = settings.STRIPE_SECRET_KEY
+from .dietary import filter_chefs, parse_filter
+from .loaders import load_related
+from .pagination import decode_cursor, encode_cursor, keyset_page
+from .payment_outbox import enqueue_payment_intent
+from .discovery import (
+    chef_ids_delivering_to, chefs_delivering_to, encode_distance_cursor, nearest_chefs_page,
+)
+from .pricing import delivery_fee as get_delivery_fee
+from .projection import project
+from .query_cost import MAX_PAGE_SIZES
+from .resolver_cache import cached_resolver
+from .search import search_chef_ids
+from .snapshot import chef_snapshot
+
+MAX_NEARBY_CHEFS_PAGE_SIZE = 50
+MAX_ORDERS_PAGE_SIZE = 50
+MAX_PAGE_SIZES.update({
+    'Query.nearbyChefs': MAX_NEARBY_CHEFS_PAGE_SIZE,
+    'Query.myOrders': MAX_ORDERS_PAGE_SIZE,
+    'Query.chefOrders': MAX_ORDERS_PAGE_SIZE,
+})
+ORDER_PAGE_ORDERING = ('-created_at', '-id')
 
 
 # GraphQL Types
@@ -34,18 +51,71 @@ class ChefProfileType(DjangoObjectType):
     def resolve_distance_km(self, info):
         # This will be set by the resolver when calculating distance
         return getattr(self, '_distance_km', None)
+    
+    # Related rows are batched across sibling chefs (see core.loaders)
+    def resolve_user(self, info):
+        return load_related(info, 'users', self, 'user_id')
+    
+    def resolve_menu_items(self, info):
+        return load_related(info, 'menu_items_by_chef', self, 'id')
+    
+    def resolve_reviews_received(self, info):
+        return load_related(info, 'reviews_by_chef', self, 'id')
+
+
+class NearbyChefConnection(graphene.relay.Connection):
+    class Meta:
+        node = ChefProfileType
+    
+    class Edge:
+        distance_km = graphene.Float()
 
 
 class MenuItemType(DjangoObjectType):
     class Meta:
         model = MenuItem
         fields = '__all__'
+    
+    def resolve_chef_profile(self, info):
+        return load_related(info, 'chef_profiles', self, 'chef_profile_id')
 
 
 class OrderType(DjangoObjectType):
     class Meta:
         model = Order
         fields = '__all__'
+    
+    def resolve_client(self, info):
+        return load_related(info, 'users', self, 'client_id')
+    
+    def resolve_chef_profile(self, info):
+        return load_related(info, 'chef_profiles', self, 'chef_profile_id')
+    
+    def resolve_items(self, info):
+        return load_related(info, 'order_items_by_order', self, 'id')
+    
+    def resolve_review(self, info):
+        return load_related(info, 'review_by_order', self, 'id')
+    
+    def resolve_payment(self, info):
+        # The client secret is only for the client paying
+        if self.client_id != info.context.user.pk:
+            return None
+        return load_related(info, 'payment_by_order', self, 'id')
+
+
+class OrderPaymentType(DjangoObjectType):
+    class Meta:
+        model = PaymentIntentOutbox
+        fields = ('order', 'status', 'client_secret', 'sent_at')
+    
+    def resolve_order(self, info):
+        return load_related(info, 'orders', self, 'order_id')
+
+
+class OrderConnection(graphene.relay.Connection):
+    class Meta:
+        node = OrderType
 
 
 class OrderItemType(DjangoObjectType):
@@ -57,12 +127,27 @@ class OrderItemType(DjangoObjectType):
     
     def resolve_total_price(self, info):
         return self.total_price
+    
+    def resolve_order(self, info):
+        return load_related(info, 'orders', self, 'order_id')
+    
+    def resolve_menu_item(self, info):
+        return load_related(info, 'menu_items', self, 'menu_item_id')
 
 
 class ReviewType(DjangoObjectType):
     class Meta:
         model = Review
         fields = '__all__'
+    
+    def resolve_order(self, info):
+        return load_related(info, 'orders', self, 'order_id')
+    
+    def resolve_client(self, info):
+        return load_related(info, 'users', self, 'client_id')
+    
+    def resolve_chef_profile(self, info):
+        return load_related(info, 'chef_profiles', self, 'chef_profile_id')
 
 
 class ChefAvailabilityScheduleType(DjangoObjectType):
@@ -99,6 +184,44 @@ class AuthPayload(graphene.ObjectType):
     message = graphene.String()
 
 
+def _order_connection(info, orders, first, after, status, created_after, created_before):
+    """One keyset page of `orders`, newest first, so deep pages cost the same as the first"""
+    first = max(1, min(first, MAX_ORDERS_PAGE_SIZE))
+    try:
+        # Connections only page forwards
+        backwards = bool(after) and decode_cursor(after)[1]
+    except ValueError:
+        backwards = True
+    if backwards:
+        raise GraphQLError("Invalid cursor")
+
+    if status:
+        orders = orders.filter(status=status)
+    if created_after:
+        orders = orders.filter(created_at__gte=created_after)
+    if created_before:
+        orders = orders.filter(created_at__lt=created_before)
+    orders = project(orders, info, ('edges', 'node'), required=('created_at',))
+
+    try:
+        page = keyset_page(orders, ORDER_PAGE_ORDERING, first, after)
+    except ValueError:
+        raise GraphQLError("Invalid cursor")
+    edges = [
+        OrderConnection.Edge(node=order, cursor=encode_cursor([order.created_at, order.id]))
+        for order in page
+    ]
+    return OrderConnection(
+        edges=edges,
+        page_info=graphene.relay.PageInfo(
+            has_next_page=page.has_next,
+            has_previous_page=page.has_previous,
+            start_cursor=edges[0].cursor if edges else None,
+            end_cursor=edges[-1].cursor if edges else None,
+        )
+    )
+
+
 # Queries
 class Query(graphene.ObjectType):
     # Chef discovery
@@ -106,7 +229,19 @@ class Query(graphene.ObjectType):
         ChefProfileType,
         lat=graphene.Float(required=True),
         long=graphene.Float(required=True),
-        radius=graphene.Int(default_value=10)
+        radius=graphene.Int(default_value=10),
+        delivers_to_me=graphene.Boolean(default_value=True)
+    )
+    
+    # Paginated nearest-first chef stream
+    nearby_chefs = graphene.Field(
+        NearbyChefConnection,
+        lat=graphene.Float(required=True),
+        long=graphene.Float(required=True),
+        radius=graphene.Int(default_value=10),
+        first=graphene.Int(default_value=20),
+        after=graphene.String(),
+        delivers_to_me=graphene.Boolean(default_value=True)
     )
     
     # Individual chef profile
@@ -115,11 +250,25 @@ class Query(graphene.ObjectType):
     # Menu for specific chef
     menu_for_chef = graphene.List(MenuItemType, chef_id=graphene.ID(required=True))
     
-    # Client orders
-    my_orders = graphene.List(OrderType)
+    # Client orders, newest first
+    my_orders = graphene.Field(
+        OrderConnection,
+        first=graphene.Int(default_value=20),
+        after=graphene.String(),
+        status=graphene.String(),
+        created_after=graphene.DateTime(),
+        created_before=graphene.DateTime()
+    )
     
-    # Chef orders
-    chef_orders = graphene.List(OrderType, status=graphene.String())
+    # Chef orders, newest first
+    chef_orders = graphene.Field(
+        OrderConnection,
+        first=graphene.Int(default_value=20),
+        after=graphene.String(),
+        status=graphene.String(),
+        created_after=graphene.DateTime(),
+        created_before=graphene.DateTime()
+    )
     
     # Current user
     me = graphene.Field(UserType)
@@ -132,88 +281,99 @@ class Query(graphene.ObjectType):
         dietary_filter=graphene.String()
     )
     
-    def resolve_chefs_near_me(self, info, lat, long, radius):
+    def resolve_chefs_near_me(self, info, lat, long, radius, delivers_to_me=True):
         """Find chefs within specified radius of given coordinates"""
-        def calculate_distance(lat1, lon1, lat2, lon2):
-            """Calculate distance between two coordinates in kilometers"""
-            R = 6371  # Earth's radius in kilometers
-            lat1_rad = math.radians(lat1)
-            lat2_rad = math.radians(lat2)
-            delta_lat = math.radians(lat2 - lat1)
-            delta_lon = math.radians(lon2 - lon1)
-            
-            a = (math.sin(delta_lat/2) * math.sin(delta_lat/2) +
-                 math.cos(lat1_rad) * math.cos(lat2_rad) *
-                 math.sin(delta_lon/2) * math.sin(delta_lon/2))
-            c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
-            
-            return R * c
-        
-        # Get all available chefs
-        all_chefs = ChefProfile.objects.filter(
-            is_available=True,
-            is_verified=True,
-            latitude__isnull=False,
-            longitude__isnull=False
-        )
+        # Rank candidates from the in-process snapshot, then load only the matches
+        ranked = chef_snapshot.nearest(lat, long, radius)
+        if delivers_to_me:
+            delivering = chef_ids_delivering_to(lat, long)
+            ranked = [(chef_id, distance) for chef_id, distance in ranked if chef_id in delivering]
+        chefs = project(ChefProfile.objects.all(), info).in_bulk([chef_id for chef_id, _ in ranked])
         
-        # Filter by distance
         nearby_chefs = []
-        for chef in all_chefs:
-            distance = calculate_distance(lat, long, chef.latitude, chef.longitude)
-            if distance <= radius:
+        for chef_id, distance in ranked:
+            chef = chefs.get(chef_id)
+            if chef is not None:
                 chef._distance_km = round(distance, 2)
                 nearby_chefs.append(chef)
         
-        # Sort by distance
-        nearby_chefs.sort(key=lambda x: x._distance_km)
-        
         return nearby_chefs
     
+    def resolve_nearby_chefs(self, info, lat, long, radius, first=20, after=None, delivers_to_me=True):
+        """Nearest chefs first, one page at a time, resumable from an opaque cursor"""
+        first = max(1, min(first, MAX_NEARBY_CHEFS_PAGE_SIZE))
+        candidates = ChefProfile.objects.filter(is_available=True, is_verified=True)
+        if delivers_to_me:
+            candidates = chefs_delivering_to(lat, long, candidates)
+        candidates = project(candidates, info, ('edges', 'node'), required=('latitude', 'longitude'))
+        
+        chefs, has_next_page = nearest_chefs_page(lat, long, radius, first, after, candidates)
+        
+        edges = []
+        for chef in chefs:
+            cursor = encode_distance_cursor(chef._distance_km, chef.id)
+            chef._distance_km = round(chef._distance_km, 2)
+            edges.append(NearbyChefConnection.Edge(node=chef, cursor=cursor, distance_km=chef._distance_km))
+        
+        return NearbyChefConnection(
+            edges=edges,
+            page_info=graphene.relay.PageInfo(
+                has_next_page=has_next_page,
+                has_previous_page=bool(after),
+                start_cursor=edges[0].cursor if edges else None,
+                end_cursor=edges[-1].cursor if edges else None,
+            )
+        )
+    
+    @cached_resolver(tags=('chef:{id}',))
     def resolve_chef_profile(self, info, id):
         try:
             return ChefProfile.objects.get(id=id, is_verified=True)
         except ChefProfile.DoesNotExist:
             return None
     
+    @cached_resolver(tags=('menu:{chef_id}',))
     def resolve_menu_for_chef(self, info, chef_id):
         return MenuItem.objects.filter(chef_profile_id=chef_id, is_available=True)
     
-    def resolve_my_orders(self, info):
-        if not info.context.user.is_authenticated:
-            return []
-        return Order.objects.filter(client=info.context.user).order_by('-created_at')
+    def resolve_my_orders(self, info, first=20, after=None, status=None, created_after=None, created_before=None):
+        orders = Order.objects.none()
+        if info.context.user.is_authenticated:
+            orders = Order.objects.filter(client=info.context.user)
+        return _order_connection(info, orders, first, after, status, created_after, created_before)
     
-    def resolve_chef_orders(self, info, status=None):
+    def resolve_chef_orders(self, info, first=20, after=None, status=None, created_after=None, created_before=None):
         user = info.context.user
-        if not user.is_authenticated or user.role != 'chef':
-            return []
-        
-        try:
-            chef_profile = user.chef_profile
-            orders = Order.objects.filter(chef_profile=chef_profile)
-            if status:
-                orders = orders.filter(status=status)
-            return orders.order_by('-created_at')
-        except ChefProfile.DoesNotExist:
-            return []
+        orders = Order.objects.none()
+        if user.is_authenticated and user.role == 'chef':
+            try:
+                orders = Order.objects.filter(chef_profile=user.chef_profile)
+            except ChefProfile.DoesNotExist:
+                pass
+        return _order_connection(info, orders, first, after, status, created_after, created_before)
     
     def resolve_me(self, info):
         if info.context.user.is_authenticated:
             return info.context.user
         return None
     
+    @cached_resolver(tags=('chefs', 'menus'))
     def resolve_search_chefs(self, info, query=None, cuisine_type=None, dietary_filter=None):
         chefs = ChefProfile.objects.filter(is_available=True, is_verified=True)
         
+        if dietary_filter:
+            # Raises ValueError (reported as a GraphQL error) for unknown names
+            chefs = filter_chefs(chefs, parse_filter(dietary_filter))
+        
+        if cuisine_type:
+            chefs = chefs.filter(cuisine_type=cuisine_type.lower())
+        
         if query:
-            chefs = chefs.filter(
-                models.Q(user__first_name__icontains=query) |
-                models.Q(user__last_name__icontains=query) |
-                models.Q(bio__icontains=query)
-            )
+            # Ranked full-text match over names, bios and menu items
+            ranked_ids = search_chef_ids(query)
+            chefs_by_id = chefs.in_bulk(ranked_ids)
+            return [chefs_by_id[chef_id] for chef_id in ranked_ids if chef_id in chefs_by_id]
         
-        # Additional filtering can be implemented based on menu items
         return chefs
 
 
@@ -320,55 +480,58 @@ class CreateOrder(graphene.Mutation):
         items = graphene.List(OrderItemInput, required=True)
         delivery_address = graphene.String(required=True)
         delivery_instructions = graphene.String()
+        delivery_lat = graphene.Float()
+        delivery_long = graphene.Float()
     
     order = graphene.Field(OrderType)
     success = graphene.Boolean()
     message = graphene.String()
     
-    def mutate(self, info, chef_id, items, delivery_address, delivery_instructions=None):
+    def mutate(self, info, chef_id, items, delivery_address, delivery_instructions=None,
+               delivery_lat=None, delivery_long=None):
         user = info.context.user
         if not user.is_authenticated:
             return CreateOrder(success=False, message="Authentication required")
         
         try:
-            chef_profile = ChefProfile.objects.get(id=chef_id, is_available=True)
+            # The user is joined for the new order notification
+            chef_profile = ChefProfile.objects.select_related('user').get(id=chef_id, is_available=True)
+            
+            # Every cart item in one query
+            menu_items = {
+                str(pk): menu_item
+                for pk, menu_item in MenuItem.objects.filter(is_available=True).in_bulk(
+                    [item_input.menu_item_id for item_input in items]
+                ).items()
+            }
             
             # Calculate order totals
             subtotal = Decimal('0.00')
-            order_items_data = []
+            order_items = []
             
             for item_input in items:
-                menu_item = MenuItem.objects.get(id=item_input.menu_item_id, is_available=True)
-                if menu_item.chef_profile != chef_profile:
+                menu_item = menu_items.get(str(item_input.menu_item_id))
+                if menu_item is None:
+                    raise MenuItem.DoesNotExist
+                if menu_item.chef_profile_id != chef_profile.id:
                     return CreateOrder(success=False, message="All items must be from the same chef")
                 
                 item_total = menu_item.price * item_input.quantity
                 subtotal += item_total
                 
-                order_items_data.append({
-                    'menu_item': menu_item,
-                    'quantity': item_input.quantity,
-                    'unit_price': menu_item.price,
-                    'customizations': item_input.customizations or {}
-                })
+                order_items.append(OrderItem(
+                    menu_item=menu_item,
+                    quantity=item_input.quantity,
+                    unit_price=menu_item.price,
+                    customizations=item_input.customizations or {}
+                ))
             
             # Calculate fees
-            delivery_fee = Decimal('2.99')  # This could be dynamic based on distance
+            delivery_fee = get_delivery_fee(chef_profile, delivery_address, delivery_lat, delivery_long)
             platform_fee = subtotal * Decimal('0.10')  # 10% platform commission
             total_amount = subtotal + delivery_fee + platform_fee
             
-            # Create Stripe payment intent
-            payment_intent = stripe.PaymentIntent.create(
-                amount=int(total_amount * 100),  # Convert to cents
-                currency='usd',
-                metadata={
-                    'chef_id': str(chef_id),
-                    'client_id': str(user.id)
-                }
-            )
-            
-            # Create order
-            order = Order.objects.create(
+            order = Order(
                 client=user,
                 chef_profile=chef_profile,
                 subtotal=subtotal,
@@ -376,16 +539,9 @@ class CreateOrder(graphene.Mutation):
                 platform_fee=platform_fee,
                 total_amount=total_amount,
                 delivery_address=delivery_address,
-                delivery_instructions=delivery_instructions or '',
-                stripe_payment_intent_id=payment_intent.id
+                delivery_instructions=delivery_instructions or ''
             )
-            
-            # Create order items
-            for item_data in order_items_data:
-                OrderItem.objects.create(
-                    order=order,
-                    **item_data
-                )
+            CreateOrder.save_order(order, order_items)
             
             return CreateOrder(order=order, success=True, message="Order created successfully")
             
@@ -395,6 +551,20 @@ class CreateOrder(graphene.Mutation):
             return CreateOrder(success=False, message="Menu item not found")
         except Exception as e:
             return CreateOrder(success=False, message=str(e))
+    
+    @staticmethod
+    @transaction.atomic
+    def save_order(order, order_items):
+        """
+        Insert the order, all of its items and its queued PaymentIntent
+        together or not at all. Stripe is called later by
+        drain_payment_outbox, so placing an order never waits on it.
+        """
+        order.save()
+        for order_item in order_items:
+            order_item.order = order
+        OrderItem.objects.bulk_create(order_items)
+        enqueue_payment_intent(order)
 
 
 class UpdateOrderStatus(graphene.Mutation):
@@ -573,4 +743,70 @@ class Mutation(graphene.ObjectType):
     submit_review = SubmitReview.Field()
 
 
-schema = graphene.Schema(query=Query, mutation=Mutation)
\ No newline at end of file
+# Subscriptions (served over WebSockets by core.consumers.GraphQLConsumer)
+class OrderEvent(graphene.ObjectType):
+    """A pushed change to one order"""
+    order = graphene.Field(OrderType)
+    status = graphene.String()
+    message = graphene.String()
+
+
+async def _order_events(messages, order_id=None):
+    """Turn channel-layer order notifications into OrderEvents, reloading each order"""
+    try:
+        async for message in messages:
+            if order_id and message['order_id'] != str(order_id):
+                continue
+            order = await Order.objects.filter(pk=message['order_id']).afirst()
+            if order is not None:
+                yield OrderEvent(order=order, status=order.status, message=message['message'])
+    finally:
+        await messages.aclose()
+
+
+async def _payment_events(messages, order_id=None):
+    """Turn channel-layer payment_ready messages into the orders' payments"""
+    try:
+        async for message in messages:
+            if order_id and message['order_id'] != str(order_id):
+                continue
+            payment = await PaymentIntentOutbox.objects.filter(order_id=message['order_id']).afirst()
+            if payment is not None:
+                yield payment
+    finally:
+        await messages.aclose()
+
+
+class Subscription(graphene.ObjectType):
+    # Status changes to the signed-in client's orders
+    order_status_changed = graphene.Field(OrderEvent, order_id=graphene.ID())
+    
+    # Orders placed with the signed-in chef
+    new_order_for_chef = graphene.Field(OrderEvent)
+    
+    # PaymentIntents created for the signed-in client's orders
+    payment_ready = graphene.Field(OrderPaymentType, order_id=graphene.ID())
+    
+    async def subscribe_order_status_changed(root, info, order_id=None):
+        user = info.context.user
+        if not user.is_authenticated:
+            raise GraphQLError("Authentication required")
+        messages = await info.context.consumer.listen(f'client_{user.id}', 'order_status_update')
+        return _order_events(messages, order_id)
+    
+    async def subscribe_new_order_for_chef(root, info):
+        user = info.context.user
+        if not user.is_authenticated or user.role != 'chef':
+            raise GraphQLError("Chef account required")
+        messages = await info.context.consumer.listen(f'chef_{user.id}', 'new_order')
+        return _order_events(messages)
+    
+    async def subscribe_payment_ready(root, info, order_id=None):
+        user = info.context.user
+        if not user.is_authenticated:
+            raise GraphQLError("Authentication required")
+        messages = await info.context.consumer.listen(f'client_{user.id}', 'payment_ready')
+        return _payment_events(messages, order_id)
+
+
+schema = graphene.Schema(query=Query, mutation=Mutation, subscription=Subscription)
\ No newline at end of file
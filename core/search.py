@@ -0,0 +1,171 @@
+"""
+Full-text search index over chefs and their menus.
+
+One document per chef combines the chef's name, menu item names and
+descriptions, and bio. SQLite uses an FTS5 virtual table (ranked with bm25),
+PostgreSQL a weighted tsvector column with a GIN index (ranked with
+ts_rank_cd). The index lives in the `core_chef_search` table created by
+migration 0009 and is kept in sync by signals in core.signals.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+
+SEARCH_TABLE = 'core_chef_search'
+
+_TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def search_backend():
+    """Return 'fts5', 'postgres' or None when the database has no full-text index"""
+    if connection.vendor == 'sqlite':
+        return 'fts5'
+    if connection.vendor == 'postgresql':
+        return 'postgres'
+    return None
+
+
+def create_index(schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5("
+            "name, menu, bio, tokenize = 'porter unicode61')"
+        )
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            f"CREATE TABLE {SEARCH_TABLE} ("
+            "chef_id bigint PRIMARY KEY REFERENCES core_chefprofile(id) ON DELETE CASCADE, "
+            "document tsvector NOT NULL)"
+        )
+        schema_editor.execute(
+            f"CREATE INDEX {SEARCH_TABLE}_document_idx ON {SEARCH_TABLE} USING GIN (document)"
+        )
+
+
+def drop_index(schema_editor):
+    if schema_editor.connection.vendor in ('sqlite', 'postgresql'):
+        schema_editor.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+
+
+def build_document(first_name, last_name, bio, menu_items):
+    """Return (name, menu, bio) text for a chef; menu_items is [(name, description)]"""
+    name = ' '.join(part for part in (first_name, last_name) if part)
+    menu = ' '.join(f"{item_name} {description}" for item_name, description in menu_items)
+    return name, menu, bio or ''
+
+
+def write_document(cursor, vendor, chef_id, document):
+    name, menu, bio = document
+    if vendor == 'sqlite':
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [chef_id])
+        cursor.execute(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, name, menu, bio) VALUES (%s, %s, %s, %s)",
+            [chef_id, name, menu, bio]
+        )
+    elif vendor == 'postgresql':
+        cursor.execute(
+            f"INSERT INTO {SEARCH_TABLE} (chef_id, document) VALUES (%s, "
+            "setweight(to_tsvector('english', %s), 'A') || "
+            "setweight(to_tsvector('english', %s), 'B') || "
+            "setweight(to_tsvector('english', %s), 'C')) "
+            "ON CONFLICT (chef_id) DO UPDATE SET document = EXCLUDED.document",
+            [chef_id, name, menu, bio]
+        )
+
+
+def index_chef(chef_id):
+    """(Re)index one chef from the database"""
+    from .models import ChefProfile, MenuItem
+
+    backend = search_backend()
+    if backend is None:
+        return
+    chef = ChefProfile.objects.filter(id=chef_id).values_list(
+        'user__first_name', 'user__last_name', 'bio'
+    ).first()
+    if chef is None:
+        remove_chef(chef_id)
+        return
+    menu_items = MenuItem.objects.filter(
+        chef_profile_id=chef_id, is_available=True
+    ).values_list('name', 'description')
+    with connection.cursor() as cursor:
+        write_document(cursor, connection.vendor, chef_id, build_document(*chef, menu_items))
+
+
+def remove_chef(chef_id):
+    """Drop a chef from the index"""
+    backend = search_backend()
+    if backend is None:
+        return
+    key = 'rowid' if backend == 'fts5' else 'chef_id'
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE {key} = %s", [chef_id])
+
+
+def rebuild_index():
+    """Reindex every chef; returns the number of chefs indexed"""
+    from .models import ChefProfile
+
+    chef_ids = list(ChefProfile.objects.values_list('id', flat=True))
+    for chef_id in chef_ids:
+        index_chef(chef_id)
+    return len(chef_ids)
+
+
+def search_terms(query):
+    return [term.lower() for term in _TERM_RE.findall(query or '')]
+
+
+def search_chef_ids(query, limit=None):
+    """
+    Return chef ids matching every term of the query, best match first.
+
+    Terms are prefix-matched so partially typed words still hit.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return []
+    backend = search_backend()
+    if backend is None:
+        return _scan_chef_ids(terms, limit)
+
+    if backend == 'fts5':
+        sql = (
+            f"SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s "
+            f"ORDER BY bm25({SEARCH_TABLE}, 10.0, 5.0, 1.0), rowid"
+        )
+        params = [' '.join(f'"{term}"*' for term in terms)]
+    else:
+        sql = (
+            f"SELECT chef_id FROM {SEARCH_TABLE}, to_tsquery('english', %s) query "
+            "WHERE document @@ query ORDER BY ts_rank_cd(document, query) DESC, chef_id"
+        )
+        params = [' & '.join(f"{term}:*" for term in terms)]
+    if limit is not None:
+        sql += " LIMIT %s"
+        params.append(limit)
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _scan_chef_ids(terms, limit):
+    """Unranked fallback for databases without a full-text index"""
+    from .models import ChefProfile
+
+    chefs = ChefProfile.objects.all()
+    for term in terms:
+        chefs = chefs.filter(
+            Q(user__first_name__icontains=term) |
+            Q(user__last_name__icontains=term) |
+            Q(bio__icontains=term) |
+            Q(menu_items__name__icontains=term) |
+            Q(menu_items__description__icontains=term)
+        )
+    ids = list(dict.fromkeys(chefs.values_list('id', flat=True)))
+    return ids[:limit] if limit is not None else ids
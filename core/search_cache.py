@@ -0,0 +1,102 @@
+"""
+Cache of chef discovery results keyed by the normalized filter set.
+
+Entries hold ordered chef ids (plus distances and facet counts), never
+rendered HTML, so every page of a popular search is served from one entry.
+Keys embed two generation counters: one bumped when a chef changes a column
+discovery reads (ChefProfile.DISCOVERY_FIELDS or their name), one when a menu
+item changes a column search reads (MenuItem.SEARCH_FIELDS). Price, image or
+social link edits leave cached results alone.
+
+Generations are bumped once the change commits, so results computed from
+rows read before the commit are orphaned too. Counters and entries live in
+the default cache, which must be shared by all workers (see core.checks).
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from . import dietary
+from .addresses import normalize_city, normalize_state
+from .search import search_terms
+from .versions import bump_shared_version, shared_version
+
+
+CHEF_GENERATION_KEY = 'core:chef_search:chefs'
+MENU_GENERATION_KEY = 'core:chef_search:menus'
+RESULT_KEY_PREFIX = 'core:chef_search:result'
+
+SORTS = ('rating', 'reviews', 'distance')
+
+# Rounding for browser coordinates (~100 m) so nearby visitors share entries
+COORDINATE_PRECISION = 3
+
+
+def _float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def normalize_filters(params):
+    """
+    Reduce chef_list GET parameters to a canonical dict.
+
+    Equivalent searches ("Pizza " vs "pizza", "ny" vs "NY", dietary options
+    in any order) normalize to the same dict and so share a cache entry.
+    """
+    try:
+        diet_mask = dietary.parse_filter(','.join(params.getlist('dietary')))
+    except ValueError:
+        diet_mask = 0
+
+    lat, lng = _float(params.get('lat')), _float(params.get('lng'))
+    located = lat is not None and lng is not None
+    sort = params.get('sort', '')
+
+    return {
+        'q': ' '.join(search_terms(params.get('q', ''))),
+        'city': normalize_city(params.get('city')),
+        'state': normalize_state(params.get('state')),
+        'cuisine': params.get('cuisine', '').lower(),
+        'category': params.get('category', ''),
+        'dietary': diet_mask,
+        'rating': _float(params.get('rating')),
+        'available_now': bool(params.get('available_now')),
+        'lat': round(lat, COORDINATE_PRECISION) if located else None,
+        'lng': round(lng, COORDINATE_PRECISION) if located else None,
+        'distance': (_float(params.get('distance')) or 10) if located else None,
+        'sort': sort if sort in SORTS else ('default' if sort else ''),
+    }
+
+
+def cache_key(filters):
+    digest = hashlib.sha1(json.dumps(filters, sort_keys=True).encode()).hexdigest()
+    return '{}:{}:{}:{}'.format(
+        RESULT_KEY_PREFIX,
+        shared_version(CHEF_GENERATION_KEY),
+        shared_version(MENU_GENERATION_KEY),
+        digest,
+    )
+
+
+def cached_results(filters, compute):
+    """Return the cached results for a filter set, computing and storing them on a miss"""
+    key = cache_key(filters)
+    results = cache.get(key)
+    if results is None:
+        results = compute()
+        cache.set(key, results, timeout=settings.CHEF_SEARCH_CACHE_TIMEOUT)
+    return results
+
+
+def invalidate_chefs():
+    transaction.on_commit(lambda: bump_shared_version(CHEF_GENERATION_KEY))
+
+
+def invalidate_menus():
+    transaction.on_commit(lambda: bump_shared_version(MENU_GENERATION_KEY))
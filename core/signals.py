@@ -1,8 +1,13 @@
-from django.db.models.signals import post_save, pre_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
-from .models import Order, Review
+from .models import ChefProfile, MenuItem, Order, Review, User
+from . import dietary, facets, search, search_cache
+from .resolver_cache import invalidate_tags
+from .snapshot import chef_snapshot
+from .typeahead import typeahead_index
 import json
 
 
@@ -13,55 +18,57 @@ channel_layer = get_channel_layer()
 def order_created_notification(sender, instance, created, **kwargs):
     """
     Send real-time notification when a new order is created
+    
+    Sent once the order is committed, so chefs never hear of an order that
+    rolls back and subscribers that reload it can see it.
     """
     if created:
         # Notify chef of new order
-        async_to_sync(channel_layer.group_send)(
-            f'chef_{instance.chef_profile.user.id}',
-            {
-                'type': 'new_order',
-                'message': f'New order #{str(instance.id)[:8]} received!',
-                'order_id': str(instance.id),
-                'client_name': instance.client.get_full_name() or instance.client.username,
-                'total_amount': str(instance.total_amount),
-            }
-        )
+        group = f'chef_{instance.chef_profile.user.id}'
+        message = {
+            'type': 'new_order',
+            'message': f'New order #{str(instance.id)[:8]} received!',
+            'order_id': str(instance.id),
+            'client_name': instance.client.get_full_name() or instance.client.username,
+            'total_amount': str(instance.total_amount),
+        }
+        transaction.on_commit(lambda: async_to_sync(channel_layer.group_send)(group, message))
 
 
-@receiver(pre_save, sender=Order)
-def order_status_changed_notification(sender, instance, **kwargs):
+@receiver(post_save, sender=Order)
+def order_status_changed_notification(sender, instance, created, **kwargs):
     """
     Send real-time notification when order status changes
+    
+    Sent once the save is committed, so subscribers that reload the order see
+    the new status and status changes that roll back are never announced.
     """
-    if instance.pk:  # Only for existing orders
-        try:
-            old_instance = Order.objects.get(pk=instance.pk)
-            if old_instance.status != instance.status:
-                # Status changed, notify client
-                status_messages = {
-                    'confirmed': f'Your order has been confirmed by {instance.chef_profile.user.get_full_name() or instance.chef_profile.user.username}!',
-                    'in_progress': 'Your order is being prepared in the kitchen.',
-                    'ready': 'Your order is ready for pickup/delivery!',
-                    'out_for_delivery': 'Your order is on the way!',
-                    'delivered': 'Your order has been delivered. Enjoy your meal!',
-                    'cancelled': 'Your order has been cancelled.',
-                    'rejected': 'Sorry, your order was rejected by the chef.',
-                }
-                
-                message = status_messages.get(instance.status, f'Order status updated to {instance.status}')
-                
-                async_to_sync(channel_layer.group_send)(
-                    f'client_{instance.client.id}',
-                    {
-                        'type': 'order_status_update',
-                        'message': message,
-                        'order_id': str(instance.id),
-                        'status': instance.status,
-                        'chef_name': instance.chef_profile.user.get_full_name() or instance.chef_profile.user.username,
-                    }
-                )
-        except Order.DoesNotExist:
-            pass
+    previous_status = getattr(instance, '_loaded_status', None)
+    instance._loaded_status = instance.status
+    if created or previous_status is None or previous_status == instance.status:
+        return
+    
+    status_messages = {
+        'confirmed': f'Your order has been confirmed by {instance.chef_profile.user.get_full_name() or instance.chef_profile.user.username}!',
+        'in_progress': 'Your order is being prepared in the kitchen.',
+        'ready': 'Your order is ready for pickup/delivery!',
+        'out_for_delivery': 'Your order is on the way!',
+        'delivered': 'Your order has been delivered. Enjoy your meal!',
+        'cancelled': 'Your order has been cancelled.',
+        'rejected': 'Sorry, your order was rejected by the chef.',
+    }
+    
+    message = status_messages.get(instance.status, f'Order status updated to {instance.status}')
+    
+    group = f'client_{instance.client.id}'
+    event = {
+        'type': 'order_status_update',
+        'message': message,
+        'order_id': str(instance.id),
+        'status': instance.status,
+        'chef_name': instance.chef_profile.user.get_full_name() or instance.chef_profile.user.username,
+    }
+    transaction.on_commit(lambda: async_to_sync(channel_layer.group_send)(group, event))
 
 
 @receiver(post_save, sender=Review)
@@ -81,4 +88,190 @@ def review_created_notification(sender, instance, created, **kwargs):
                 'message': message,
                 'order_id': str(instance.order.id),
             }
-        )
\ No newline at end of file
+        )
+
+
+@receiver(post_save, sender=ChefProfile)
+def chef_coverage_update(sender, instance, created, **kwargs):
+    """
+    Keep delivery coverage cells in sync with the chef's location and radius
+    """
+    if created or getattr(instance, '_loaded_coverage_key', None) != instance.coverage_key:
+        instance.rebuild_coverage()
+
+
+
+@receiver(post_save, sender=ChefProfile)
+def chef_snapshot_update(sender, instance, created, **kwargs):
+    """
+    Patch the in-process discovery snapshot once the save commits, if a snapshot column changed
+    """
+    snapshot_key = instance.snapshot_key
+    if created or getattr(instance, '_loaded_snapshot_key', None) != snapshot_key:
+        def patch():
+            # Only a committed save is what the snapshot holds; a rolled-back one is retried
+            instance._loaded_snapshot_key = snapshot_key
+            chef_snapshot.patch(instance)
+
+        transaction.on_commit(patch)
+
+
+@receiver(post_delete, sender=ChefProfile)
+def chef_snapshot_remove(sender, instance, **kwargs):
+    """
+    Drop a deleted chef from the in-process discovery snapshot
+    """
+    chef_id = instance.id
+    transaction.on_commit(lambda: chef_snapshot.remove(chef_id))
+
+
+
+@receiver(post_save, sender=ChefProfile)
+def chef_search_index_update(sender, instance, raw=False, **kwargs):
+    """
+    Reindex a chef's full-text search document
+    """
+    if not raw:
+        search.index_chef(instance.id)
+
+
+@receiver(post_delete, sender=ChefProfile)
+def chef_search_index_remove(sender, instance, **kwargs):
+    search.remove_chef(instance.id)
+
+
+@receiver(post_save, sender=MenuItem)
+@receiver(post_delete, sender=MenuItem)
+def menu_item_search_index_update(sender, instance, raw=False, **kwargs):
+    """
+    Menu item names and descriptions are part of the chef's search document
+    """
+    if not raw:
+        search.index_chef(instance.chef_profile_id)
+
+
+@receiver(post_save, sender=MenuItem)
+@receiver(post_delete, sender=MenuItem)
+def menu_item_dietary_flags_update(sender, instance, raw=False, **kwargs):
+    """
+    Keep the chef's dietary bitmask in step with their menu
+    """
+    if not raw:
+        dietary.update_chef_flags(instance.chef_profile_id)
+
+
+@receiver(post_save, sender=ChefProfile)
+def chef_facets_update(sender, instance, raw=False, **kwargs):
+    """
+    Cuisine, rating and availability facets come from the chef row
+    """
+    if not raw:
+        facets.update_chef_facets(instance.id)
+
+
+@receiver(post_save, sender=MenuItem)
+@receiver(post_delete, sender=MenuItem)
+def menu_item_facets_update(sender, instance, raw=False, **kwargs):
+    """
+    Category and dietary facets come from the menu (runs after the dietary bitmask update)
+    """
+    if not raw:
+        facets.update_chef_facets(instance.chef_profile_id)
+
+
+@receiver(post_save, sender=ChefProfile)
+def chef_search_cache_update(sender, instance, created, raw=False, **kwargs):
+    """
+    Drop cached discovery results only when a column discovery reads changed
+    """
+    if not raw and (created or getattr(instance, '_loaded_discovery_key', None) != instance.discovery_key):
+        search_cache.invalidate_chefs()
+    instance._loaded_discovery_key = instance.discovery_key
+
+
+@receiver(post_delete, sender=ChefProfile)
+def chef_search_cache_remove(sender, instance, **kwargs):
+    search_cache.invalidate_chefs()
+
+
+@receiver(post_save, sender=MenuItem)
+def menu_item_search_cache_update(sender, instance, created, raw=False, **kwargs):
+    """
+    Price, image and prep time edits do not affect search results
+    """
+    if not raw and (created or getattr(instance, '_loaded_search_key', None) != instance.search_key):
+        search_cache.invalidate_menus()
+    instance._loaded_search_key = instance.search_key
+
+
+@receiver(post_delete, sender=MenuItem)
+def menu_item_search_cache_remove(sender, instance, **kwargs):
+    search_cache.invalidate_menus()
+
+
+@receiver(post_save, sender=User)
+def chef_user_search_index_update(sender, instance, raw=False, **kwargs):
+    """
+    Chef names live on the user record
+    """
+    update_fields = kwargs.get('update_fields')
+    if raw or instance.role != 'chef':
+        return
+    if update_fields is not None and not {'first_name', 'last_name'} & set(update_fields):
+        return
+    name = (instance.first_name, instance.last_name)
+    if getattr(instance, '_loaded_name', None) != name:
+        chef_id = ChefProfile.objects.filter(user=instance).values_list('id', flat=True).first()
+        if chef_id is not None:
+            search.index_chef(chef_id)
+            typeahead_index.update_chef(chef_id)
+            search_cache.invalidate_chefs()
+    instance._loaded_name = name
+
+
+@receiver(post_save, sender=ChefProfile)
+def chef_typeahead_update(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """
+    Verification decides whether a chef and their dishes are suggested
+    """
+    if raw or (update_fields is not None and 'is_verified' not in update_fields):
+        return
+    if created or getattr(instance, '_loaded_is_verified', None) != instance.is_verified:
+        typeahead_index.update_chef(instance.id)
+    instance._loaded_is_verified = instance.is_verified
+
+
+@receiver(post_delete, sender=ChefProfile)
+def chef_typeahead_remove(sender, instance, **kwargs):
+    typeahead_index.remove_chef(instance.id)
+
+
+@receiver(post_save, sender=MenuItem)
+def menu_item_typeahead_update(sender, instance, raw=False, **kwargs):
+    if not raw:
+        typeahead_index.update_item(instance)
+
+
+@receiver(post_delete, sender=MenuItem)
+def menu_item_typeahead_remove(sender, instance, **kwargs):
+    typeahead_index.remove_item(instance.id)
+
+
+@receiver(post_save, sender=ChefProfile)
+@receiver(post_delete, sender=ChefProfile)
+def chef_resolver_cache_invalidate(sender, instance, raw=False, **kwargs):
+    """
+    Expire cached chefProfile and searchChefs results
+    """
+    if not raw:
+        invalidate_tags('chefs', f'chef:{instance.id}')
+
+
+@receiver(post_save, sender=MenuItem)
+@receiver(post_delete, sender=MenuItem)
+def menu_item_resolver_cache_invalidate(sender, instance, raw=False, **kwargs):
+    """
+    Expire cached menus and searches; the chef's dietary flags follow the menu too
+    """
+    if not raw:
+        invalidate_tags('menus', f'menu:{instance.chef_profile_id}', f'chef:{instance.chef_profile_id}')
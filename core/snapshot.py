@@ -0,0 +1,149 @@
+"""
+In-process, array-backed snapshot of chef discovery data.
+
+Each worker keeps one compact copy of the columns discovery needs (ids,
+coordinates, rating, review count, availability flags) so home, list and
+near-me reads can rank chefs without querying the database. The snapshot is
+built lazily on first use and patched in place from ChefProfile signals
+once the saving transaction commits, so rolled-back changes never reach it.
+
+A shared version counter lives in the Django cache, which must be shared by
+all workers (Redis in production). Every committed change bumps it; a worker
+whose local version no longer matches reloads on its next read, and a worker
+whose own bump is not the next version after its copy drops the copy rather
+than patch over a change it has not seen. A snapshot
+older than CHEF_SNAPSHOT_MAX_AGE is reloaded regardless, which bounds how
+stale a worker can get if the counter is evicted or a bump is lost.
+"""
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+
+from .geo import haversine_km_many
+from .versions import bump_shared_version, shared_version
+
+
+VERSION_CACHE_KEY = 'core:chef_snapshot:version'
+
+_COLUMNS = ('id', 'latitude', 'longitude', 'average_rating', 'total_reviews', 'is_available', 'is_verified')
+
+
+class ChefSnapshot:
+    """Columnar copy of discoverable chef data for one worker process"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._arrays = None
+        self._positions = {}
+        self.version = None
+        self.loaded_at = None
+
+    # Lifecycle
+
+    def invalidate(self):
+        """Drop the local copy; it is rebuilt on next read"""
+        with self._lock:
+            self._arrays = None
+            self._positions = {}
+            self.version = None
+            self.loaded_at = None
+
+    def rebuild(self):
+        """Reload every chef from the database"""
+        from .models import ChefProfile
+
+        with self._lock:
+            version = shared_version(VERSION_CACHE_KEY)
+            rows = list(ChefProfile.objects.values_list(*_COLUMNS))
+            self._load(rows)
+            self.version = version
+            self.loaded_at = time.monotonic()
+
+    def _load(self, rows):
+        columns = list(zip(*rows)) if rows else [()] * len(_COLUMNS)
+        self._arrays = {
+            'id': np.array(columns[0], dtype=np.int64),
+            'latitude': np.array(columns[1], dtype=np.float64),
+            'longitude': np.array(columns[2], dtype=np.float64),
+            'average_rating': np.array(columns[3], dtype=np.float64),
+            'total_reviews': np.array(columns[4], dtype=np.int64),
+            'is_available': np.array(columns[5], dtype=bool),
+            'is_verified': np.array(columns[6], dtype=bool),
+        }
+        self._positions = {chef_id: i for i, chef_id in enumerate(columns[0])}
+
+    def arrays(self):
+        """Return the current column arrays, reloading if this worker is stale or too old"""
+        with self._lock:
+            if (self._arrays is None or self.version != shared_version(VERSION_CACHE_KEY)
+                    or time.monotonic() - self.loaded_at > settings.CHEF_SNAPSHOT_MAX_AGE):
+                self.rebuild()
+            return self._arrays
+
+    # Incremental maintenance
+
+    def patch(self, chef):
+        """Apply a committed ChefProfile to the snapshot and bump the shared version"""
+        with self._lock:
+            version = bump_shared_version(VERSION_CACHE_KEY)
+            if self._arrays is None or version != self.version + 1:
+                # Another worker changed data we have not seen; reload lazily
+                self.invalidate()
+                return
+            row = (chef.id, chef.latitude, chef.longitude, float(chef.average_rating),
+                   chef.total_reviews, chef.is_available, chef.is_verified)
+            position = self._positions.get(chef.id)
+            if position is None:
+                rows = list(zip(*(self._arrays[c].tolist() for c in _COLUMNS)))
+                self._load(rows + [row])
+            else:
+                for column, value in zip(_COLUMNS, row):
+                    self._arrays[column][position] = value
+            self.version = version
+
+    def remove(self, chef_id):
+        """Drop a chef whose deletion committed and bump the shared version"""
+        with self._lock:
+            version = bump_shared_version(VERSION_CACHE_KEY)
+            if self._arrays is None or version != self.version + 1:
+                self.invalidate()
+                return
+            if chef_id in self._positions:
+                keep = self._arrays['id'] != chef_id
+                rows = list(zip(*(self._arrays[c][keep].tolist() for c in _COLUMNS)))
+                self._load(rows)
+            self.version = version
+
+    # Reads
+
+    def discoverable_ids(self):
+        """Ids of chefs that are both verified and available"""
+        arrays = self.arrays()
+        return arrays['id'][arrays['is_verified'] & arrays['is_available']].tolist()
+
+    def count(self, verified=True):
+        arrays = self.arrays()
+        return int(arrays['is_verified'].sum()) if verified else len(arrays['id'])
+
+    def top_rated(self, limit, min_rating=0):
+        """Ids of discoverable chefs ordered by rating, then review count"""
+        arrays = self.arrays()
+        mask = arrays['is_verified'] & arrays['is_available'] & (arrays['average_rating'] >= min_rating)
+        ids = arrays['id'][mask]
+        order = np.lexsort((-arrays['total_reviews'][mask], -arrays['average_rating'][mask]))
+        return ids[order][:limit].tolist()
+
+    def nearest(self, lat, lng, radius_km):
+        """(id, distance_km) of discoverable chefs within a radius, nearest first"""
+        arrays = self.arrays()
+        mask = arrays['is_verified'] & arrays['is_available']
+        distances = haversine_km_many(lat, lng, arrays['latitude'][mask], arrays['longitude'][mask])
+        order = np.argsort(distances, kind='stable')
+        order = order[distances[order] <= radius_km]
+        ids = arrays['id'][mask]
+        return [(int(ids[i]), float(distances[i])) for i in order]
+
+
+chef_snapshot = ChefSnapshot()
@@ -0,0 +1,163 @@
+"""
+Per-resolver timing and SQL counts for GraphQL requests.
+
+ResolverTraceMiddleware records, for every non-scalar field, the wall time
+of its resolver, the SQL queries it ran and the rows it returned. Entries are
+grouped by response path with list indexes dropped, so `myOrders.chefProfile`
+resolved for twenty orders is one entry with twenty calls; an entry whose
+query count grows with its calls is an N+1.
+
+The views start a ResolverTrace per operation when GRAPHQL_TRACE_RESOLVERS is
+on (it is off by default). With DEBUG it is returned in the response
+`extensions`; either way it is folded into `field_histograms`, keyed by
+schema coordinate (`OrderType.chefProfile`), which staff can read at
+/graphql/metrics/. The histograms live in the memory of each worker
+process, so that endpoint reports only the worker that happens to answer;
+sum them across workers (e.g. by scraping each one) for a full picture.
+
+Queries are counted on the connection of the thread running the resolver,
+so SQL issued by async resolvers through sync_to_async is not attributed.
+"""
+import threading
+import time
+from bisect import bisect_left
+from inspect import isawaitable
+
+from django.db import connection
+from graphql import get_named_type, is_leaf_type
+
+
+# Upper bounds (ms) of the per-request field time histogram buckets; the last bucket is unbounded
+DURATION_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+
+class _QueryCounter:
+    """connection.execute_wrapper() hook counting the queries it sees"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def _row_count(result):
+    if result is None:
+        return 0
+    if isinstance(result, (list, tuple)):
+        return len(result)
+    edges = getattr(result, 'edges', None)
+    if isinstance(edges, (list, tuple)):
+        return len(edges)
+    return 1
+
+
+class ResolverTrace:
+    """Resolver timings for one operation, by response path"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.fields = {}
+
+    def add(self, info, duration, queries, rows):
+        path = '.'.join(str(key) for key in info.path.as_list() if not isinstance(key, int))
+        with self._lock:
+            entry = self.fields.get(path)
+            if entry is None:
+                entry = self.fields[path] = {
+                    'field': f'{info.parent_type.name}.{info.field_name}',
+                    'calls': 0, 'duration': 0.0, 'queries': 0, 'rows': 0,
+                }
+            entry['calls'] += 1
+            entry['duration'] += duration
+            entry['queries'] += queries
+            entry['rows'] += rows
+
+    def as_extensions(self):
+        return [
+            {
+                'path': path,
+                'field': entry['field'],
+                'calls': entry['calls'],
+                'durationMs': round(entry['duration'] * 1000, 3),
+                'sqlQueries': entry['queries'],
+                'rows': entry['rows'],
+            }
+            for path, entry in self.fields.items()
+        ]
+
+
+class FieldHistograms:
+    """Per-field aggregates of the operations traced by this worker process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._fields = {}
+
+    def record(self, trace):
+        # One request's time, queries and rows per field, summed over its paths
+        totals = {}
+        for entry in trace.fields.values():
+            total = totals.setdefault(entry['field'], {'calls': 0, 'duration': 0.0, 'queries': 0, 'rows': 0})
+            for key in total:
+                total[key] += entry[key]
+
+        with self._lock:
+            for field, total in totals.items():
+                stats = self._fields.get(field)
+                if stats is None:
+                    stats = self._fields[field] = {
+                        'requests': 0, 'calls': 0, 'sqlQueries': 0, 'rows': 0, 'maxSqlQueries': 0,
+                        'durationMs': [0] * (len(DURATION_BUCKETS_MS) + 1),
+                    }
+                stats['requests'] += 1
+                stats['calls'] += total['calls']
+                stats['sqlQueries'] += total['queries']
+                stats['rows'] += total['rows']
+                stats['maxSqlQueries'] = max(stats['maxSqlQueries'], total['queries'])
+                stats['durationMs'][bisect_left(DURATION_BUCKETS_MS, total['duration'] * 1000)] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'buckets': [*DURATION_BUCKETS_MS, None],
+                'fields': {
+                    field: {**stats, 'durationMs': list(stats['durationMs'])}
+                    for field, stats in sorted(self._fields.items())
+                },
+            }
+
+    def clear(self):
+        with self._lock:
+            self._fields.clear()
+
+
+class ResolverTraceMiddleware:
+    """
+    Times resolvers into request.graphql_trace. Must sit outside
+    LoaderMiddleware, which evaluates the QuerySets, and inside
+    ResolverThreadMiddleware, so it runs on the thread that queries.
+    """
+
+    def resolve(self, next, root, info, **args):
+        trace = getattr(info.context, 'graphql_trace', None)
+        if trace is None or is_leaf_type(get_named_type(info.return_type)):
+            return next(root, info, **args)
+
+        counter = _QueryCounter()
+        start = time.perf_counter()
+        with connection.execute_wrapper(counter):
+            result = next(root, info, **args)
+        if isawaitable(result):
+            return self._trace_async(result, trace, info, start, counter)
+        trace.add(info, time.perf_counter() - start, counter.count, _row_count(result))
+        return result
+
+    async def _trace_async(self, result, trace, info, start, counter):
+        result = await result
+        trace.add(info, time.perf_counter() - start, counter.count, _row_count(result))
+        return result
+
+
+field_histograms = FieldHistograms()
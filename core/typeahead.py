@@ -0,0 +1,200 @@
+"""
+In-process prefix index for search-box autocomplete.
+
+Chef names, menu item names and menu categories are kept in a sorted array
+of lowercase keys, one key per word boundary ("lentil curry", "curry"), so a
+typed prefix is answered with two bisects and a short scan. Like the chef
+snapshot, each worker builds its copy lazily, patches it from signals once
+the change commits and reloads when the shared version in the Django cache
+(shared by all workers in production) moves on.
+"""
+import bisect
+import re
+import threading
+
+from django.db import transaction
+
+from .versions import bump_shared_version, shared_version
+
+
+VERSION_CACHE_KEY = 'core:typeahead:version'
+
+DEFAULT_LIMIT = 8
+MAX_LIMIT = 20
+
+# Keys inspected per lookup; keeps one-letter prefixes cheap on large indexes
+_SCAN_LIMIT = 200
+
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def normalize(text):
+    return ' '.join(_WORD_RE.findall((text or '').lower()))
+
+
+def _keys(label):
+    """Every suffix of the label starting at a word boundary"""
+    words = normalize(label).split()
+    return [' '.join(words[i:]) for i in range(len(words))]
+
+
+class TypeaheadIndex:
+    """Sorted-array prefix index over chef, dish and category names"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._entries = None
+        self._keys = []
+        # Item entry keys per chef id, so a chef's dishes are found without a scan
+        self._chef_items = {}
+        self.version = None
+
+    # Lifecycle
+
+    def invalidate(self):
+        """Drop the local copy; it is rebuilt on next lookup"""
+        with self._lock:
+            self._entries = None
+            self._keys = []
+            self._chef_items = {}
+            self.version = None
+
+    def rebuild(self):
+        """Reload every entry from the database"""
+        from .models import ChefProfile, MenuItem
+
+        with self._lock:
+            version = shared_version(VERSION_CACHE_KEY)
+            self._entries = {}
+            self._keys = []
+            self._chef_items = {}
+            for value, label in MenuItem.CATEGORY_CHOICES:
+                self._add(('category', value), {'type': 'category', 'id': value, 'label': label})
+            for chef_id, first_name, last_name in ChefProfile.objects.filter(
+                is_verified=True
+            ).values_list('id', 'user__first_name', 'user__last_name'):
+                self._add_chef(chef_id, first_name, last_name)
+            for item_id, name, chef_id in MenuItem.objects.filter(
+                is_available=True, chef_profile__is_verified=True
+            ).values_list('id', 'name', 'chef_profile_id'):
+                self._add_item(item_id, name, chef_id)
+            self._keys.sort()
+            self.version = version
+
+    def _current(self):
+        if self._entries is None or self.version != shared_version(VERSION_CACHE_KEY):
+            self.rebuild()
+
+    def _add(self, entry_key, entry, sort=False):
+        self._entries[entry_key] = entry
+        for key in _keys(entry['label']):
+            if sort:
+                bisect.insort(self._keys, (key, entry_key))
+            else:
+                self._keys.append((key, entry_key))
+
+    def _remove(self, entry_key):
+        entry = self._entries.pop(entry_key, None)
+        if entry is None:
+            return
+        if 'chef_id' in entry:
+            chef_items = self._chef_items[entry['chef_id']]
+            chef_items.discard(entry_key)
+            if not chef_items:
+                del self._chef_items[entry['chef_id']]
+        for key in _keys(entry['label']):
+            position = bisect.bisect_left(self._keys, (key, entry_key))
+            if position < len(self._keys) and self._keys[position] == (key, entry_key):
+                del self._keys[position]
+
+    def _add_chef(self, chef_id, first_name, last_name, sort=False):
+        label = ' '.join(part for part in (first_name, last_name) if part)
+        if label:
+            self._add(('chef', chef_id), {'type': 'chef', 'id': chef_id, 'label': label}, sort)
+
+    def _add_item(self, item_id, name, chef_id, sort=False):
+        self._chef_items.setdefault(chef_id, set()).add(('item', item_id))
+        self._add(('item', item_id), {'type': 'item', 'id': item_id, 'label': name, 'chef_id': chef_id}, sort)
+
+    # Incremental maintenance
+
+    def _patch(self, apply):
+        """Run `apply` on the local copy and bump the shared version once the current transaction commits"""
+        transaction.on_commit(lambda: self._apply(apply))
+
+    def _apply(self, apply):
+        with self._lock:
+            version = bump_shared_version(VERSION_CACHE_KEY)
+            if self._entries is None or version != self.version + 1:
+                # Another worker changed data we have not seen; reload lazily
+                self.invalidate()
+                return
+            apply()
+            self.version = version
+
+    def update_chef(self, chef_id):
+        """Re-read a chef's name and menu from the database"""
+        from .models import ChefProfile, MenuItem
+
+        def apply():
+            chef = ChefProfile.objects.filter(id=chef_id, is_verified=True).values_list(
+                'user__first_name', 'user__last_name'
+            ).first()
+            items = MenuItem.objects.filter(chef_profile_id=chef_id, is_available=True).values_list('id', 'name')
+            self._remove(('chef', chef_id))
+            for entry_key in list(self._chef_items.get(chef_id, ())):
+                self._remove(entry_key)
+            if chef is not None:
+                self._add_chef(chef_id, *chef, sort=True)
+                for item_id, name in items:
+                    self._add_item(item_id, name, chef_id, sort=True)
+
+        self._patch(apply)
+
+    def update_item(self, item):
+        """Apply a saved MenuItem"""
+        def apply():
+            self._remove(('item', item.id))
+            if item.is_available and item.chef_profile.is_verified:
+                self._add_item(item.id, item.name, item.chef_profile_id, sort=True)
+
+        self._patch(apply)
+
+    def remove_item(self, item_id):
+        self._patch(lambda: self._remove(('item', item_id)))
+
+    def remove_chef(self, chef_id):
+        def apply():
+            self._remove(('chef', chef_id))
+            for entry_key in list(self._chef_items.get(chef_id, ())):
+                self._remove(entry_key)
+
+        self._patch(apply)
+
+    # Reads
+
+    def suggest(self, query, limit=DEFAULT_LIMIT):
+        """
+        Entries with a word starting with the query, best match first.
+
+        Labels that start with the query rank ahead of mid-label matches.
+        """
+        prefix = normalize(query)
+        if not prefix:
+            return []
+        with self._lock:
+            self._current()
+            start = bisect.bisect_left(self._keys, (prefix,))
+            matches = {}
+            for key, entry_key in self._keys[start:start + _SCAN_LIMIT]:
+                if not key.startswith(prefix):
+                    break
+                entry = self._entries[entry_key]
+                leading = normalize(entry['label']) == key
+                if entry_key not in matches or leading:
+                    matches[entry_key] = (not leading, key, entry)
+        ranked = sorted(matches.values(), key=lambda match: match[:2])
+        return [dict(entry) for _, _, entry in ranked[:limit]]
+
+
+typeahead_index = TypeaheadIndex()
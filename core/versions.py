@@ -0,0 +1,25 @@
+"""
+Shared version counters in the Django cache.
+
+The chef snapshot, typeahead index, search cache and resolver cache each keep
+a counter that workers compare against their local state. Counters live in
+the default cache, which must be shared by all workers (see core.checks). A
+missing counter reads as 0; the first bump creates it.
+"""
+from django.core.cache import cache
+
+
+def shared_version(key):
+    """Current value of a counter, 0 if it has never been bumped or was evicted"""
+    return cache.get(key, 0)
+
+
+def bump_shared_version(key):
+    """Increment a counter and return its new value"""
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # First bump, or the counter was evicted
+        if cache.add(key, 1, timeout=None):
+            return 1
+        return cache.incr(key)
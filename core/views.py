@@ -1,3 +1,218 @@
-from django.shortcuts import render
+import json
+import os
 
-# Create your views here.
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.db import connection, transaction
+from django.http import HttpResponseBadRequest, HttpResponseNotAllowed, JsonResponse
+from graphene_django.constants import MUTATION_ERRORS_FLAG
+from graphene_django.settings import graphene_settings
+from graphene_django.views import GraphQLView, HttpError
+from graphql import ExecutionResult, GraphQLError, OperationType, execute, get_operation_ast, parse, validate_schema
+from graphql.validation import specified_rules, validate
+
+from .loaders import reset_loaders
+from .persisted_queries import (
+    PERSISTED_QUERY_NOT_ALLOWED, PERSISTED_QUERY_NOT_FOUND, document_cache, manifest, query_hash, requested_hash,
+)
+from .query_cost import query_cost_rule
+from .tracing import ResolverTrace, field_histograms
+
+
+class TekaGraphQLView(GraphQLView):
+    """
+    GraphQL endpoint with query budgets and persisted queries.
+
+    Parsed and validated documents are cached by the SHA-256 of their text,
+    so clients may send just the hash (see core.persisted_queries). The
+    computed cost is returned in the response `extensions`, as is the
+    resolver trace in DEBUG (see core.tracing).
+
+    A JSON array of operations is executed as a batch and answered with an
+    array of results. The operations run in order against the same request,
+    so they share its loaders and lookups are batched across them. Their
+    costs are summed and the whole batch is rejected above GRAPHQL_MAX_COST.
+    """
+
+    def parse_body(self, request):
+        if self.get_content_type(request) != 'application/json':
+            return super().parse_body(request)
+        try:
+            data = json.loads(request.body.decode('utf-8'))
+        except ValueError:
+            raise HttpError(HttpResponseBadRequest("POST body sent invalid JSON."))
+
+        if isinstance(data, list):
+            if not data:
+                raise HttpError(HttpResponseBadRequest("Received an empty list in the batch request."))
+            if len(data) > settings.GRAPHQL_MAX_BATCH_SIZE:
+                raise HttpError(HttpResponseBadRequest(
+                    f"Batch requests are limited to {settings.GRAPHQL_MAX_BATCH_SIZE} operations."
+                ))
+            if not all(isinstance(entry, dict) for entry in data):
+                raise HttpError(HttpResponseBadRequest("The received data is not a valid JSON query."))
+            self.check_batch_cost(request, data)
+            # Views are instantiated per request, so this only switches this request to batch responses
+            self.batch = True
+        elif not isinstance(data, dict):
+            raise HttpError(HttpResponseBadRequest("The received data is not a valid JSON query."))
+        return data
+
+    def load_document(self, request, data, query):
+        """
+        Return (document, cost) for the query or persisted hash in `data`,
+        parsed and validated through the document cache, or the
+        ExecutionResult that reports why it cannot run.
+        """
+        persisted_hash = requested_hash(request, data)
+        if persisted_hash and query and query_hash(query) != persisted_hash:
+            return ExecutionResult(errors=[GraphQLError('provided sha does not match query')])
+        key = persisted_hash or query_hash(query)
+        if settings.GRAPHQL_PERSISTED_QUERIES_ONLY and key not in manifest():
+            return ExecutionResult(errors=[GraphQLError(PERSISTED_QUERY_NOT_ALLOWED)])
+
+        schema = self.schema.graphql_schema
+        schema_validation_errors = validate_schema(schema)
+        if schema_validation_errors:
+            return ExecutionResult(data=None, errors=schema_validation_errors)
+
+        cached = document_cache.get(key)
+        if cached is not None:
+            return cached
+
+        query = query or manifest().get(key)
+        if not query:
+            return ExecutionResult(errors=[GraphQLError(PERSISTED_QUERY_NOT_FOUND)])
+        try:
+            document = parse(query)
+        except Exception as e:
+            return ExecutionResult(errors=[e])
+
+        reported = {}
+
+        def report(cost, depth):
+            reported.update(cost=cost, depth=depth)
+
+        validation_errors = validate(
+            schema,
+            document,
+            (*specified_rules, query_cost_rule(report)),
+            graphene_settings.MAX_VALIDATION_ERRORS,
+        )
+        if validation_errors:
+            return ExecutionResult(data=None, errors=validation_errors)
+        loaded = (document, reported or None)
+        document_cache.set(key, loaded)
+        return loaded
+
+    def check_batch_cost(self, request, batch):
+        """
+        Reject a batch whose operations together cost more than GRAPHQL_MAX_COST,
+        before any of them runs. Operations that fail to load are left to
+        report their own errors.
+        """
+        total = 0
+        for entry in batch:
+            query = self.get_graphql_params(request, entry)[0]
+            if not query and not requested_hash(request, entry):
+                continue
+            loaded = self.load_document(request, entry, query)
+            if isinstance(loaded, tuple) and loaded[1] is not None:
+                total += loaded[1]['cost']
+        if total > settings.GRAPHQL_MAX_COST:
+            raise HttpError(HttpResponseBadRequest(
+                f"Batch cost {total} exceeds the maximum of {settings.GRAPHQL_MAX_COST}."
+            ))
+
+    def prepare_document(self, request, data, query, operation_name, show_graphiql=False):
+        """
+        Return (document, operation_ast) ready to execute, or the
+        ExecutionResult (or None, for GraphiQL) that ends the request early.
+        """
+        request.graphql_cost = None
+        request.graphql_trace = ResolverTrace() if settings.GRAPHQL_TRACE_RESOLVERS else None
+        if not query and not requested_hash(request, data):
+            if show_graphiql:
+                return None
+            raise HttpError(HttpResponseBadRequest("Must provide query string."))
+
+        loaded = self.load_document(request, data, query)
+        if not isinstance(loaded, tuple):
+            return loaded
+        document, request.graphql_cost = loaded
+
+        operation_ast = get_operation_ast(document, operation_name)
+        # Batched operations share loaders, except that a mutation and the operation after it start afresh
+        mutation = operation_ast is not None and operation_ast.operation == OperationType.MUTATION
+        if mutation or getattr(request, 'graphql_after_mutation', False):
+            reset_loaders(request)
+        request.graphql_after_mutation = mutation
+        if (
+            request.method.lower() == 'get'
+            and operation_ast is not None
+            and operation_ast.operation != OperationType.QUERY
+        ):
+            if show_graphiql:
+                return None
+            raise HttpError(HttpResponseNotAllowed(
+                ['POST'], f"Can only perform a {operation_ast.operation.value} operation from a POST request."
+            ))
+
+        return document, operation_ast
+
+    def execute_graphql_request(self, request, data, query, variables, operation_name, show_graphiql=False):
+        prepared = self.prepare_document(request, data, query, operation_name, show_graphiql)
+        if not isinstance(prepared, tuple):
+            return prepared
+        document, operation_ast = prepared
+        schema = self.schema.graphql_schema
+
+        try:
+            execute_options = {
+                'root_value': self.get_root_value(request),
+                'context_value': self.get_context(request),
+                'variable_values': variables,
+                'operation_name': operation_name,
+                'middleware': self.get_middleware(request),
+            }
+            if self.execution_context_class:
+                execute_options['execution_context_class'] = self.execution_context_class
+
+            if (
+                operation_ast is not None
+                and operation_ast.operation == OperationType.MUTATION
+                and (
+                    graphene_settings.ATOMIC_MUTATIONS is True
+                    or connection.settings_dict.get('ATOMIC_MUTATIONS', False) is True
+                )
+            ):
+                with transaction.atomic():
+                    result = execute(schema, document, **execute_options)
+                    if getattr(request, MUTATION_ERRORS_FLAG, False) is True:
+                        transaction.set_rollback(True)
+                return result
+
+            return execute(schema, document, **execute_options)
+        except Exception as e:
+            return ExecutionResult(errors=[e])
+
+    def json_encode(self, request, d, pretty=False):
+        cost = getattr(request, 'graphql_cost', None)
+        if cost is not None:
+            d = {**d, 'extensions': {**d.get('extensions', {}), 'cost': cost}}
+        trace = getattr(request, 'graphql_trace', None)
+        if trace is not None:
+            request.graphql_trace = None
+            field_histograms.record(trace)
+            if settings.DEBUG:
+                d = {**d, 'extensions': {**d.get('extensions', {}), 'resolvers': trace.as_extensions()}}
+        return super().json_encode(request, d, pretty)
+
+
+@staff_member_required
+def graphql_metrics(request):
+    """
+    Per-field resolver histograms collected by core.tracing since this worker
+    process started; other workers keep their own, so `pid` says whose these are
+    """
+    return JsonResponse({'pid': os.getpid(), **field_histograms.snapshot()})
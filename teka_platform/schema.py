@@ -1,5 +1,5 @@
 import graphene
-from core.schema import Query as CoreQuery, Mutation as CoreMutation
+from core.schema import Query as CoreQuery, Mutation as CoreMutation, Subscription as CoreSubscription
 
 
 class Query(CoreQuery):
@@ -10,4 +10,8 @@ class Mutation(CoreMutation):
     pass
 
 
-schema = graphene.Schema(query=Query, mutation=Mutation)
\ No newline at end of file
+class Subscription(CoreSubscription):
+    pass
+
+
+schema = graphene.Schema(query=Query, mutation=Mutation, subscription=Subscription)
\ No newline at end of file
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
 import os
+from decimal import Decimal
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -160,9 +161,34 @@ AUTH_USER_MODEL = 'core.User'
 
 # GraphQL Configuration
 GRAPHENE = {
-    'SCHEMA': 'teka_platform.schema.schema'
+    'SCHEMA': 'teka_platform.schema.schema',
+    'MIDDLEWARE': [
+        'core.loaders.LoaderMiddleware',
+        'core.tracing.ResolverTraceMiddleware',
+        'core.async_resolvers.ResolverThreadMiddleware',  # Outermost, so the middleware above runs in its thread
+    ],
 }
 
+# GraphQL query budgets (see core.query_cost)
+GRAPHQL_MAX_DEPTH = 10
+GRAPHQL_MAX_COST = 5000
+GRAPHQL_LIST_SIZE = 20  # Assumed length of list fields with no first/last/limit argument
+
+# Operations accepted in one batched (JSON array) GraphQL request
+GRAPHQL_MAX_BATCH_SIZE = 10
+
+# Shared cache for public GraphQL resolvers (see core.resolver_cache)
+GRAPHQL_RESOLVER_CACHE_TIMEOUT = 300
+
+# Per-resolver timing and SQL counts, aggregated per worker process; returned in
+# `extensions` when DEBUG (see core.tracing). Costs a query counter per field, so off by default
+GRAPHQL_TRACE_RESOLVERS = False
+
+# Persisted queries (see core.persisted_queries)
+GRAPHQL_DOCUMENT_CACHE_SIZE = 500
+GRAPHQL_PERSISTED_QUERIES_ONLY = False  # Only execute queries listed in the manifest
+GRAPHQL_PERSISTED_QUERY_MANIFEST = None  # Path to a JSON file of name -> query
+
 # CORS Configuration
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",  # For React dev server if needed
@@ -189,14 +215,49 @@ if os.environ.get('USE_REDIS', '0') != '1':
         }
     }
 
+# Shared cache: the version counters of the in-process discovery snapshot and
+# typeahead index, and the cached search and resolver results, must be seen by
+# every worker (see core.checks)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ.get('REDIS_CACHE_URL', 'redis://127.0.0.1:6379/1'),
+    },
+}
+
+# Use a per-process cache when Redis isn't available (development/test)
+if os.environ.get('USE_REDIS', '0') != '1':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'
+        }
+    }
+
 # Stripe Configuration (use environment variables in production)
 STRIPE_PUBLISHABLE_KEY = os.environ.get('STRIPE_PUBLISHABLE_KEY', 'pk_test_your_key_here')
 STRIPE_SECRET_KEY = os.environ.get('STRIPE_SECRET_KEY', 'sk_test_your_key_here')
 STRIPE_WEBHOOK_SECRET = os.environ.get('STRIPE_WEBHOOK_SECRET', 'whsec_your_webhook_secret_here')
 
+# PaymentIntents queued by createOrder and sent by drain_payment_outbox (see core.payment_outbox)
+PAYMENT_OUTBOX_MAX_ATTEMPTS = 8
+PAYMENT_OUTBOX_RETRY_SECONDS = 30  # Doubled after each failed attempt
+PAYMENT_OUTBOX_LEASE_SECONDS = 60  # How long a drain holds the rows it claimed
+
 # Platform fee (10%)
 PLATFORM_FEE_PERCENTAGE = 0.10
 
+# Delivery fees (priced from the zone matrix built by `manage.py build_delivery_zones`)
+DELIVERY_FEE_BASE = Decimal('2.99')
+DELIVERY_FEE_PER_KM = Decimal('0.50')
+DEFAULT_DELIVERY_FEE = Decimal('5.00')  # Used by both order paths when the address is unknown or outside every zone
+DELIVERY_LOCATION_TOLERANCE_KM = 5  # How far client coordinates may be from their delivery address
+
+# Chef discovery results are cached per filter set until a relevant chef or menu change (seconds)
+CHEF_SEARCH_CACHE_TIMEOUT = 300
+
+# Workers reload their discovery snapshot at least this often, even if no change reached them (seconds)
+CHEF_SNAPSHOT_MAX_AGE = 300
+
 # Login URLs
 LOGIN_URL = '/auth/login/'
 LOGIN_REDIRECT_URL = '/'
@@ -18,12 +18,13 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
-from graphene_django.views import GraphQLView
 from django.views.decorators.csrf import csrf_exempt
+from core.views import TekaGraphQLView, graphql_metrics
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('graphql/', csrf_exempt(GraphQLView.as_view(graphiql=True))),
+    path('graphql/', csrf_exempt(TekaGraphQLView.as_view(graphiql=True))),
+    path('graphql/metrics/', graphql_metrics),
     path('', include('client_portal.urls')),
     path('chef/', include('chef_portal.urls')),
     path('payments/', include('payments.urls')),
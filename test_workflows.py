@@ -9,6 +9,7 @@ import django
 from django.test import TestCase, Client
 from django.contrib.auth import get_user_model
 from django.urls import reverse
+from django.core.cache import cache
 from django.core.management import call_command
 from decimal import Decimal
 import json
@@ -18,6 +19,8 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'teka_platform.settings')
 django.setup()
 
 from core.models import User, ChefProfile, MenuItem, Order, OrderItem, Review
+from core.snapshot import chef_snapshot
+from core.typeahead import typeahead_index
 
 
 class TekaPlatformWorkflowTests(TestCase):
@@ -27,6 +30,12 @@ class TekaPlatformWorkflowTests(TestCase):
         """Set up test data"""
         self.client = Client()
         
+        # Test transactions roll back without signals, so start from fresh in-memory indexes
+        # and version counters
+        cache.clear()
+        chef_snapshot.invalidate()
+        typeahead_index.invalidate()
+        
         # Create test users
         self.client_user = User.objects.create_user(
             username='testclient',
@@ -362,6 +371,1366 @@ class TekaPlatformWorkflowTests(TestCase):
             return False
 
 
+    def test_chefs_near_me_grid_index(self):
+        """Test 12: Nearby chef discovery via the spatial grid index"""
+        print("🗺️ Testing chefs near me...")
+        
+        from core.geo import grid_cell
+        from teka_platform.schema import schema
+        
+        self.chef_profile.refresh_from_db()
+        self.assertEqual(
+            self.chef_profile.geo_cell,
+            grid_cell(self.chef_profile.latitude, self.chef_profile.longitude)
+        )
+        
+        far_user = User.objects.create_user(username='farchef', password='testpass123', role='chef')
+        ChefProfile.objects.create(
+            user=far_user, bio="Far away", address="Boston, MA",
+            latitude=42.3601, longitude=-71.0589, is_available=True, is_verified=True
+        )
+        
+        query = """
+            query { chefsNearMe(lat: 40.72, long: -74.0, radius: 10) { id distanceKm } }
+        """
+        result = schema.execute(query, context_value=Client().request().wsgi_request)
+        self.assertIsNone(result.errors)
+        chefs = result.data['chefsNearMe']
+        self.assertEqual([c['id'] for c in chefs], [str(self.chef_profile.id)])
+        self.assertLess(chefs[0]['distanceKm'], 10)
+        print("✅ Chefs near me uses the grid index correctly")
+
+
+    def test_chef_list_distance_sorting(self):
+        """Test 13: Chef list distance filtering and sorting"""
+        print("📏 Testing chef list distance sorting...")
+        
+        near_user = User.objects.create_user(
+            username='nearchef', password='testpass123', role='chef',
+            first_name='Nearby', last_name='Cook'
+        )
+        ChefProfile.objects.create(
+            user=near_user, bio="Around the corner", address="New York, NY",
+            latitude=40.7300, longitude=-73.9950, is_available=True, is_verified=True
+        )
+        
+        response = self.client.get(
+            reverse('client_portal:chef_list') + '?lat=40.7306&lng=-73.9952&distance=5&sort=distance'
+        )
+        self.assertEqual(response.status_code, 200)
+        chefs = list(response.context['chefs'])
+        self.assertEqual([c.user.username for c in chefs], ['nearchef', 'testchef'])
+        self.assertLess(chefs[0].distance, chefs[1].distance)
+        
+        response = self.client.get(
+            reverse('client_portal:chef_list') + '?lat=40.7306&lng=-73.9952&distance=0.5'
+        )
+        self.assertEqual([c.user.username for c in response.context['chefs']], ['nearchef'])
+        print("✅ Chef list distance filtering works correctly")
+
+
+    def test_delivery_radius_matching(self):
+        """Test 14: Only chefs who deliver to the client are discovered"""
+        print("🚚 Testing delivery radius matching...")
+        
+        from core.discovery import chef_ids_delivering_to
+        
+        # ~3km from the chef, inside the default 5km delivery radius
+        self.assertIn(self.chef_profile.id, chef_ids_delivering_to(40.7400, -74.0060))
+        # ~8km away: within a 10km search radius but outside delivery range
+        self.assertNotIn(self.chef_profile.id, chef_ids_delivering_to(40.7850, -74.0060))
+        
+        self.chef_profile.delivery_radius_km = 10
+        self.chef_profile.save()
+        self.assertIn(self.chef_profile.id, chef_ids_delivering_to(40.7850, -74.0060))
+        print("✅ Delivery radius matching works correctly")
+
+
+    def test_nearby_chefs_cursor_pagination(self):
+        """Test 15: Nearest-first chef stream with cursor pagination"""
+        print("📡 Testing nearby chefs pagination...")
+        
+        from teka_platform.schema import schema
+        
+        for i in range(4):
+            user = User.objects.create_user(username=f'ringchef{i}', password='testpass123', role='chef')
+            ChefProfile.objects.create(
+                user=user, bio="Ring chef", address="New York, NY",
+                latitude=40.7128 + 0.01 * (i + 1), longitude=-74.0060,
+                is_available=True, is_verified=True, delivery_radius_km=20
+            )
+        
+        query = """
+            query($after: String) {
+                nearbyChefs(lat: 40.7128, long: -74.0060, radius: 15, first: 2, after: $after) {
+                    edges { cursor distanceKm node { id } }
+                    pageInfo { hasNextPage endCursor }
+                }
+            }
+        """
+        request = Client().request().wsgi_request
+        seen, after, pages = [], None, 0
+        while True:
+            result = schema.execute(query, variable_values={'after': after}, context_value=request)
+            self.assertIsNone(result.errors)
+            connection = result.data['nearbyChefs']
+            seen += [edge['distanceKm'] for edge in connection['edges']]
+            pages += 1
+            if not connection['pageInfo']['hasNextPage']:
+                break
+            after = connection['pageInfo']['endCursor']
+        
+        self.assertEqual(len(seen), 5)
+        self.assertEqual(seen, sorted(seen))
+        self.assertEqual(pages, 3)
+        print("✅ Nearby chefs pagination works correctly")
+
+
+    def test_discovery_snapshot(self):
+        """Test 16: In-process discovery snapshot stays fresh"""
+        print("🧊 Testing discovery snapshot...")
+        
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from core.snapshot import VERSION_CACHE_KEY
+        from core.versions import bump_shared_version, shared_version
+        
+        self.assertEqual(chef_snapshot.top_rated(6), [self.chef_profile.id])
+        
+        # Steady-state reads do not touch the database
+        with CaptureQueriesContext(connection) as queries:
+            chef_snapshot.nearest(40.7128, -74.0060, 5)
+            chef_snapshot.top_rated(6)
+        self.assertEqual(len(queries), 0)
+        
+        # A save that rolls back never reaches the snapshot
+        from django.db import transaction
+        version = chef_snapshot.version
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    self.chef_profile.is_available = False
+                    self.chef_profile.save()
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertEqual(chef_snapshot.version, version)
+        self.assertEqual(chef_snapshot.top_rated(6), [self.chef_profile.id])
+        
+        # Committed saves patch the snapshot in place and bump the shared version
+        with self.captureOnCommitCallbacks(execute=True):
+            self.chef_profile.save()
+        self.assertGreater(chef_snapshot.version, version)
+        self.assertEqual(chef_snapshot.top_rated(6), [])
+        
+        # Saves that leave the snapshot columns alone do not bump it
+        version = chef_snapshot.version
+        with self.captureOnCommitCallbacks(execute=True):
+            self.chef_profile.bio = 'Updated bio'
+            self.chef_profile.save()
+            ChefProfile.objects.get(pk=self.chef_profile.pk).save(update_fields=['bio'])
+        self.assertEqual(chef_snapshot.version, version)
+        self.assertEqual(shared_version(VERSION_CACHE_KEY), version)
+        
+        # A worker that missed the change reloads from the database
+        stale = type(chef_snapshot)()
+        stale.rebuild()
+        ChefProfile.objects.filter(pk=self.chef_profile.pk).update(is_available=True)
+        bump_shared_version(VERSION_CACHE_KEY)
+        self.assertEqual(stale.top_rated(6), [self.chef_profile.id])
+        
+        # Past the max age a worker reloads even without a version bump
+        ChefProfile.objects.filter(pk=self.chef_profile.pk).update(is_available=False)
+        self.assertEqual(stale.top_rated(6), [self.chef_profile.id])
+        with self.settings(CHEF_SNAPSHOT_MAX_AGE=-1):
+            self.assertEqual(stale.top_rated(6), [])
+        
+        # A patch that lands after another worker's bump reloads instead of patching over it
+        chef_snapshot.top_rated(6)
+        bump_shared_version(VERSION_CACHE_KEY)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.chef_profile.is_available = True
+            self.chef_profile.save()
+        self.assertIsNone(chef_snapshot.version)
+        self.assertEqual(chef_snapshot.top_rated(6), [self.chef_profile.id])
+        print("✅ Discovery snapshot works correctly")
+
+
+    def test_region_filters(self):
+        """Test 17: Structured region filters"""
+        print("🏙️ Testing region filters...")
+        
+        self.chef_profile.refresh_from_db()
+        self.assertEqual(
+            (self.chef_profile.region.city, self.chef_profile.region.state, self.chef_profile.region.postal_code),
+            ('New York', 'NY', '10001')
+        )
+        
+        response = self.client.get(reverse('client_portal:chef_list') + '?city=new%20york&state=ny')
+        self.assertContains(response, self.chef_profile.user.get_full_name())
+        response = self.client.get(reverse('client_portal:chef_list') + '?state=CA')
+        self.assertNotContains(response, self.chef_profile.user.get_full_name())
+        
+        # Backfill picks up chefs whose region was never assigned
+        from core import search_cache
+        from core.versions import shared_version
+        ChefProfile.objects.filter(pk=self.chef_profile.pk).update(region=None)
+        generation = shared_version(search_cache.CHEF_GENERATION_KEY)
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('backfill_regions', stdout=open(os.devnull, 'w'))
+        self.chef_profile.refresh_from_db()
+        self.assertEqual(self.chef_profile.region.city, 'New York')
+        # The bulk update skips signals, so the command expires cached chef results itself
+        self.assertGreater(shared_version(search_cache.CHEF_GENERATION_KEY), generation)
+        print("✅ Region filters work correctly")
+
+
+    def test_zone_delivery_fee(self):
+        """Test 18: Delivery fee priced from the zone matrix"""
+        print("💲 Testing zone delivery fees...")
+        
+        from core.models import DeliveryZone, DeliveryZoneFee, Region
+        from core.pricing import delivery_fee, rebuild_zone_tables
+        
+        newark = '1 Market St, Newark, NJ 07102'
+        Region.objects.filter(pk=self.chef_profile.region_id).update(latitude=40.7128, longitude=-74.0060)
+        
+        # Outside every zone: fall back to the default fee
+        self.assertEqual(delivery_fee(self.chef_profile, self.chef_profile.address), Decimal('5.00'))
+        
+        DeliveryZone.objects.create(name='Manhattan', latitude=40.7128, longitude=-74.0060)
+        DeliveryZone.objects.create(name='Newark', latitude=40.7357, longitude=-74.1724)
+        rebuild_zone_tables()
+        
+        # The destination is located from the delivery address's region on the server
+        self.assertEqual(delivery_fee(self.chef_profile, self.chef_profile.address), Decimal('2.99'))
+        cross_zone = DeliveryZoneFee.objects.get(origin__name='Manhattan', destination__name='Newark').fee
+        self.assertGreater(cross_zone, Decimal('2.99'))
+        
+        # A region without a staff-set centroid is priced at the default fee, never at the
+        # chef's own zone, and other users' rows in that city do not locate it
+        for i in range(3):
+            ChefProfile.objects.create(
+                user=User.objects.create_user(username=f'newarkchef{i}', password='testpass123', role='chef'),
+                address='9 Broad St, Newark, NJ 07102',
+                latitude=40.7128,
+                longitude=-74.0060,
+            )
+        self.assertEqual(delivery_fee(self.chef_profile, newark), Decimal('5.00'))
+        self.assertEqual(delivery_fee(self.chef_profile, newark, 40.7128, -74.0060), Decimal('5.00'))
+        
+        Region.objects.filter(city='Newark', state='NJ').update(latitude=40.7357, longitude=-74.1724)
+        self.assertEqual(delivery_fee(self.chef_profile, newark), cross_zone)
+        self.assertEqual(delivery_fee(self.chef_profile, newark, '40.7360', '-74.1720'), cross_zone)
+        
+        # Coordinates far from the address are ignored; malformed ones are rejected
+        self.assertEqual(delivery_fee(self.chef_profile, newark, 40.7128, -74.0060), cross_zone)
+        with self.assertRaises(ValueError):
+            delivery_fee(self.chef_profile, newark, 'north', -74.1724)
+        with self.assertRaises(ValueError):
+            delivery_fee(self.chef_profile, newark, 140.0, -74.1724)
+        
+        # The client portal order flow uses the same table
+        self.client.login(username='testclient', password='testpass123')
+        order_data = {
+            'items': [{'id': str(self.menu_items[0].id), 'quantity': 1}],
+            'delivery_address': newark,
+            'delivery_lat': 40.7128,
+            'delivery_lng': -74.0060,
+        }
+        response = self.client.post(
+            reverse('client_portal:create_order'),
+            data=json.dumps(order_data),
+            content_type='application/json'
+        )
+        self.assertTrue(response.json()['success'], response.json())
+        order = Order.objects.get(id=response.json()['order_id'])
+        self.assertEqual(order.delivery_fee, cross_zone)
+        
+        response = self.client.post(
+            reverse('client_portal:create_order'),
+            data=json.dumps({**order_data, 'delivery_lat': 'north'}),
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+        print("✅ Zone delivery fees work correctly")
+
+
+    def test_full_text_search(self):
+        """Test 19: Ranked full-text chef search"""
+        print("🔎 Testing full-text search...")
+        
+        from core.search import search_chef_ids
+        
+        other_user = User.objects.create_user(
+            username='tacochef', password='testpass123', role='chef',
+            first_name='Rosa', last_name='Pizzaiolo'
+        )
+        other_chef = ChefProfile.objects.create(
+            user=other_user, bio="Street tacos and salsas", address="Queens, NY",
+            latitude=40.73, longitude=-73.79, is_available=True, is_verified=True
+        )
+        
+        # Menu items, names and bios are all indexed; name matches rank first
+        self.assertEqual(search_chef_ids('pizza'), [other_chef.id, self.chef_profile.id])
+        self.assertEqual(search_chef_ids('tiramisu'), [self.chef_profile.id])
+        self.assertEqual(search_chef_ids('tac'), [other_chef.id])
+        
+        # The index follows menu changes and deletions
+        self.menu_items[2].delete()
+        self.assertEqual(search_chef_ids('tiramisu'), [])
+        MenuItem.objects.create(
+            chef_profile=other_chef, name="Churros", description="Cinnamon sugar", price=Decimal('6.00')
+        )
+        self.assertEqual(search_chef_ids('cinnamon'), [other_chef.id])
+        
+        # Renames are reindexed; logins and other user saves are not
+        from unittest import mock
+        with mock.patch('core.search.index_chef') as index_chef:
+            self.client.login(username='tacochef', password='testpass123')
+            other_user = User.objects.get(pk=other_user.pk)
+            other_user.phone_number = '555-0100'
+            other_user.save()
+        index_chef.assert_not_called()
+        other_user.last_name = 'Taquera'
+        other_user.save(update_fields=['last_name'])
+        self.assertEqual(search_chef_ids('taquera'), [other_chef.id])
+        
+        response = self.client.get(reverse('client_portal:chef_list') + '?q=churros')
+        self.assertEqual([c.id for c in response.context['chefs']], [other_chef.id])
+        print("✅ Full-text search works correctly")
+    
+    def test_dietary_filter_index(self):
+        """Test 20: Dietary bitmask filtering in searchChefs"""
+        print("🥗 Testing dietary filters...")
+        
+        from core import dietary
+        from teka_platform.schema import schema
+        
+        self.chef_profile.refresh_from_db()
+        self.assertFalse(self.chef_profile.dietary_flags & dietary.VEGETARIAN)
+        self.assertTrue(self.chef_profile.dietary_flags & dietary.FLAGS['nuts_free'])
+        
+        query = """
+            query($diet: String) {
+                searchChefs(dietaryFilter: $diet) { id }
+            }
+        """
+        request = Client().request().wsgi_request
+        
+        def search(diet):
+            result = schema.execute(query, variable_values={'diet': diet}, context_value=request)
+            self.assertIsNone(result.errors)
+            return [int(chef['id']) for chef in result.data['searchChefs']]
+        
+        self.assertEqual(search('vegan'), [])
+        self.assertEqual(search('nuts_free'), [self.chef_profile.id])
+        
+        # Adding a vegan dish sets the bits; removing it clears them again
+        vegan_item = MenuItem.objects.create(
+            chef_profile=self.chef_profile, name="Lentil Curry", price=Decimal('11.00'),
+            is_vegan=True, allergens=['Tree Nuts']
+        )
+        self.assertEqual(search('vegan, gluten-free'), [])
+        self.assertEqual(search('Vegan'), [self.chef_profile.id])
+        vegan_item.delete()
+        self.assertEqual(search('vegetarian'), [])
+        
+        result = schema.execute(query, variable_values={'diet': 'keto'}, context_value=request)
+        self.assertIn('Unknown dietary filter', str(result.errors[0]))
+        print("✅ Dietary filters work correctly")
+    
+    def test_typeahead(self):
+        """Test 21: In-memory typeahead suggestions"""
+        print("⌨️ Testing typeahead...")
+        
+        url = reverse('client_portal:ajax_typeahead')
+        labels = lambda response: [(r['type'], r['label']) for r in response.json()['results']]
+        
+        # Warm the index, then lookups need no queries
+        self.client.get(url, {'q': 'a'})
+        with self.assertNumQueries(0):
+            response = self.client.get(url, {'q': 'ja'})
+        self.assertEqual(labels(response), [('chef', 'Jane Chef')])
+        
+        # Word-boundary matches, with labels starting with the prefix first
+        with self.captureOnCommitCallbacks(execute=True):
+            MenuItem.objects.create(chef_profile=self.chef_profile, name="Salad Nicoise", price=Decimal('9.00'))
+        response = self.client.get(url, {'q': 'sal'})
+        self.assertEqual(labels(response), [('item', 'Salad Nicoise'), ('item', 'Caesar Salad')])
+        self.assertEqual(response.json()['results'][0]['url'],
+                         reverse('client_portal:chef_detail', args=[self.chef_profile.id]))
+        self.assertEqual(labels(self.client.get(url, {'q': 'dess'})), [('category', 'Dessert')])
+        
+        # Unavailable dishes and unverified chefs drop out once the change commits
+        with self.captureOnCommitCallbacks(execute=True):
+            self.menu_items[2].is_available = False
+            self.menu_items[2].save()
+        self.assertEqual(labels(self.client.get(url, {'q': 'tira'})), [])
+        
+        # Logins and unrelated chef edits leave the index alone; renames patch it
+        from core.typeahead import VERSION_CACHE_KEY
+        from core.versions import shared_version
+        version = shared_version(VERSION_CACHE_KEY)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.login(username='testchef', password='testpass123')
+            self.chef_profile.is_available = False
+            self.chef_profile.save()
+            ChefProfile.objects.get(pk=self.chef_profile.pk).save(update_fields=['bio'])
+        self.assertEqual(shared_version(VERSION_CACHE_KEY), version)
+        with self.captureOnCommitCallbacks(execute=True):
+            chef_user = User.objects.get(pk=self.chef_user.pk)
+            chef_user.first_name = 'Janet'
+            chef_user.save()
+        self.assertEqual(labels(self.client.get(url, {'q': 'jan'})), [('chef', 'Janet Chef')])
+        
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.chef_profile.is_verified = False
+            self.chef_profile.save()
+        self.assertEqual(labels(self.client.get(url, {'q': 'pizza'})), [('item', 'Margherita Pizza')])
+        for callback in callbacks:
+            callback()
+        self.assertEqual(labels(self.client.get(url, {'q': 'pizza'})), [])
+        print("✅ Typeahead works correctly")
+    
+    def test_facet_counts(self):
+        """Test 22: Faceted chef list with precomputed counts"""
+        print("🗂️ Testing search facets...")
+        
+        from core.facets import facet_counts, rebuild_facets
+        
+        other_user = User.objects.create_user(username='sushichef', password='testpass123', role='chef')
+        other_chef = ChefProfile.objects.create(
+            user=other_user, bio="Omakase at home", address="Brooklyn, NY", cuisine_type='japanese',
+            latitude=40.68, longitude=-73.94, is_available=False, is_verified=True
+        )
+        MenuItem.objects.create(
+            chef_profile=other_chef, name="Miso Soup", price=Decimal('5.00'),
+            category='appetizer', is_vegan=True
+        )
+        self.chef_profile.cuisine_type = 'italian'
+        self.chef_profile.save()
+        
+        url = reverse('client_portal:chef_list')
+        # Facet counts come from one grouped query, however many options there are
+        with self.assertNumQueries(1):
+            counts = facet_counts(ChefProfile.objects.filter(is_verified=True))
+        self.assertEqual(counts['cuisine'], {'italian': 1, 'japanese': 1})
+        self.assertEqual(counts['category']['appetizer'], 2)
+        self.assertEqual(counts['dietary']['vegan'], 1)
+        self.assertEqual(counts['rating'], {'3': 1, '4': 1, '4.5': 1})
+        self.assertEqual(counts['availability'], {'available': 1})
+        
+        response = self.client.get(url)
+        self.assertIn(('japanese', 'Japanese', 1), response.context['cuisine_types'])
+        self.assertEqual(response.context['available_count'], 1)
+        
+        # The previously broken cuisine filter, plus category and dietary filters
+        response = self.client.get(url, {'cuisine': 'Italian'})
+        self.assertEqual([c.id for c in response.context['chefs']], [self.chef_profile.id])
+        response = self.client.get(url, {'category': 'dessert'})
+        self.assertEqual([c.id for c in response.context['chefs']], [self.chef_profile.id])
+        response = self.client.get(url, {'dietary': ['vegan']})
+        self.assertEqual([c.id for c in response.context['chefs']], [other_chef.id])
+        
+        # The scheduled rebuild matches the incrementally maintained rows
+        rebuild_facets()
+        self.assertEqual(facet_counts(ChefProfile.objects.all()), counts)
+        
+        # Chefs can only pick a listed cuisine, so facet values stay canonical
+        self.client.login(username='testchef', password='testpass123')
+        self.client.post(reverse('chef_portal:profile'), {'cuisine_type': 'Italian '})
+        response = self.client.post(reverse('chef_portal:ajax_update_profile'), {'cuisine_type': 'pizza'})
+        self.assertFalse(response.json()['success'])
+        self.chef_profile.refresh_from_db()
+        self.assertEqual(self.chef_profile.cuisine_type, 'italian')
+        print("✅ Search facets work correctly")
+    
+    def test_search_result_cache(self):
+        """Test 23: Cached discovery results with targeted invalidation"""
+        print("🗄️ Testing search result cache...")
+        
+        from unittest import mock
+        from client_portal import views as client_views
+        
+        url = reverse('client_portal:chef_list')
+        with mock.patch.object(client_views, '_discover_chefs', wraps=client_views._discover_chefs) as discover:
+            # Equivalent filter sets share one entry
+            response = self.client.get(url, {'q': 'Pizza ', 'rating': '4', 'sort': 'rating'})
+            self.assertEqual([c.id for c in response.context['chefs']], [self.chef_profile.id])
+            self.client.get(url, {'q': 'pizza', 'rating': '4.0', 'sort': 'rating', 'page': '1'})
+            self.assertEqual(discover.call_count, 1)
+            
+            # Edits that cannot change results keep the entry
+            with self.captureOnCommitCallbacks(execute=True):
+                self.menu_items[0].price = Decimal('19.99')
+                self.menu_items[0].save()
+                self.chef_profile.instagram_url = 'https://instagram.com/janechef'
+                self.chef_profile.save()
+            self.client.get(url, {'q': 'pizza', 'rating': '4', 'sort': 'rating'})
+            self.assertEqual(discover.call_count, 1)
+            
+            # Menu and chef changes that can, drop it once they commit
+            with self.captureOnCommitCallbacks(execute=True):
+                self.menu_items[0].name = 'Margherita Flatbread'
+                self.menu_items[0].description = 'Wood-fired'
+                self.menu_items[0].save()
+            response = self.client.get(url, {'q': 'pizza', 'rating': '4', 'sort': 'rating'})
+            self.assertEqual(discover.call_count, 2)
+            self.assertEqual(len(response.context['chefs']), 0)
+            with self.captureOnCommitCallbacks(execute=True):
+                self.chef_profile.is_verified = False
+                self.chef_profile.save()
+            response = self.client.get(url, {'q': 'flatbread'})
+            self.assertEqual(len(response.context['chefs']), 0)
+            self.assertEqual(discover.call_count, 3)
+        print("✅ Search result cache works correctly")
+    
+    def test_keyset_pagination(self):
+        """Test 24: Keyset pagination of order lists"""
+        print("📄 Testing keyset pagination...")
+        
+        from datetime import timedelta
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from django.utils import timezone
+        
+        now = timezone.now()
+        for i in range(25):
+            order = Order.objects.create(
+                client=self.client_user, chef_profile=self.chef_profile, delivery_address="789 Test Avenue",
+                subtotal=Decimal('25.00'), delivery_fee=Decimal('5.00'), platform_fee=Decimal('3.00'),
+                total_amount=Decimal('33.00'), status='pending'
+            )
+            # Pairs of orders share a timestamp so the id tie-breaker matters
+            Order.objects.filter(id=order.id).update(created_at=now - timedelta(minutes=i // 2))
+        expected = list(Order.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        
+        self.client.login(username='testclient', password='testpass123')
+        url = reverse('client_portal:order_history')
+        seen, cursor, pages = [], None, []
+        while True:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url, {'cursor': cursor} if cursor else {})
+            self.assertFalse(any('OFFSET' in q['sql'] for q in queries.captured_queries))
+            page = response.context['page_obj']
+            self.assertEqual(page.approximate_total, 25)
+            seen += [order.id for order in page]
+            pages.append(page)
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+        self.assertEqual(seen, expected)
+        self.assertEqual(len(pages), 3)
+        
+        # Walking back from the last page returns the middle page unchanged
+        response = self.client.get(url, {'cursor': pages[-1].previous_cursor})
+        self.assertEqual([order.id for order in response.context['page_obj']], expected[10:20])
+        self.assertTrue(response.context['page_obj'].has_previous)
+        
+        # Garbage cursors, or ones that do not match the ordering, are rejected
+        from core.pagination import encode_cursor
+        self.assertEqual(self.client.get(url, {'cursor': 'not-a-cursor'}).status_code, 404)
+        self.assertEqual(self.client.get(url, {'cursor': encode_cursor([expected[0]])}).status_code, 404)
+        self.assertEqual(self.client.get(url, {'cursor': encode_cursor(['yesterday', 1])}).status_code, 404)
+        
+        self.client.login(username='testchef', password='testpass123')
+        response = self.client.get(reverse('chef_portal:orders'), {'status': 'pending'})
+        self.assertEqual(len(response.context['orders']), 20)
+        self.assertTrue(response.context['orders'].has_next)
+        print("✅ Keyset pagination works correctly")
+    
+    def test_graphql_dataloaders(self):
+        """Test 25: Nested GraphQL fields are batched by DataLoaders"""
+        print("🧺 Testing GraphQL DataLoaders...")
+        
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        def place_orders(count):
+            for _ in range(count):
+                order = Order.objects.create(
+                    client=self.client_user, chef_profile=self.chef_profile, delivery_address="789 Test Avenue",
+                    subtotal=Decimal('25.00'), delivery_fee=Decimal('5.00'), platform_fee=Decimal('3.00'),
+                    total_amount=Decimal('33.00'), status='pending'
+                )
+                for item in self.menu_items:
+                    OrderItem.objects.create(order=order, menu_item=item, quantity=1, price=item.price)
+        
+        query = """
+            { myOrders { edges { node {
+                id client { username } chefProfile { user { firstName } menuItems { name } }
+                items { quantity menuItem { name chefProfile { id } } } review { rating } } } } }
+        """
+        self.client.login(username='testclient', password='testpass123')
+        
+        def run():
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post('/graphql/', {'query': query}, content_type='application/json')
+            result = response.json()
+            self.assertNotIn('errors', result)
+            return [edge['node'] for edge in result['data']['myOrders']['edges']], len(queries)
+        
+        place_orders(2)
+        orders, few_orders_queries = run()
+        self.assertEqual(len(orders), 2)
+        place_orders(8)
+        orders, many_orders_queries = run()
+        self.assertEqual(len(orders), 10)
+        self.assertEqual(orders[0]['chefProfile']['user']['firstName'], 'Jane')
+        self.assertEqual(len(orders[0]['items']), 3)
+        self.assertEqual(orders[0]['items'][0]['menuItem']['chefProfile']['id'], str(self.chef_profile.id))
+        
+        # Query count depends on nesting depth, not on list length
+        self.assertEqual(few_orders_queries, many_orders_queries)
+        print(f"✅ Nested query runs in {many_orders_queries} SQL statements for 10 orders")
+    
+    def test_graphql_query_cost_limits(self):
+        """Test 26: GraphQL cost and depth budgets"""
+        print("🧮 Testing GraphQL query cost limits...")
+        
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        def post(query):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post('/graphql/', {'query': query}, content_type='application/json')
+            return response, len(queries)
+        
+        # Connection page sizes flow down to the edges list: nearbyChefs + edges + 3 * (node + id)
+        response, _ = post('{ nearbyChefs(lat: 40.7128, long: -74.0060, first: 3) { edges { node { id } } } }')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['extensions']['cost'], {'cost': 8, 'depth': 4})
+        
+        # Pages are priced as served: oversized literals at the field's maximum, variables at the maximum
+        from core.schema import MAX_ORDERS_PAGE_SIZE
+        served = {'cost': 2 + MAX_ORDERS_PAGE_SIZE * 2, 'depth': 4}
+        response, _ = post('{ myOrders(first: 1000) { edges { node { id } } } }')
+        self.assertEqual(response.json()['extensions']['cost'], served)
+        response = self.client.post('/graphql/', {
+            'query': 'query($first: Int) { myOrders(first: $first) { edges { node { id } } } }',
+            'variables': {'first': 5},
+        }, content_type='application/json')
+        self.assertEqual(response.json()['extensions']['cost'], served)
+        
+        # Unbounded lists nested three deep blow the cost budget
+        wide = '{ chefsNearMe(lat: 40.7, long: -74.0) { menuItems { chefProfile { menuItems { id } } } } }'
+        response, query_count = post(wide)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Query cost', response.json()['errors'][0]['message'])
+        self.assertEqual(query_count, 0)
+        
+        # A cheap but deep chain of single objects is still rejected
+        deep = '{ myOrders { edges { node { ' + 'review { order { ' * 5 + 'id' + ' } }' * 5 + ' } } } }'
+        response, query_count = post(deep)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Query depth', response.json()['errors'][0]['message'])
+        self.assertEqual(query_count, 0)
+        print("✅ Query cost limits work correctly")
+
+    def test_persisted_queries(self):
+        """Test 27: Persisted queries and the parsed-document cache"""
+        print("📌 Testing persisted GraphQL queries...")
+        
+        import tempfile
+        from unittest import mock
+        from django.test import override_settings
+        from core import views as core_views
+        from core.persisted_queries import document_cache, query_hash, reset_manifest
+        
+        document_cache.clear()
+        query = '{ nearbyChefs(lat: 40.7128, long: -74.0060, first: 3) { edges { node { id } } } }'
+        sha = query_hash(query)
+        
+        def post(payload):
+            return self.client.post('/graphql/', payload, content_type='application/json')
+        
+        def persisted(sha):
+            return {'extensions': {'persistedQuery': {'version': 1, 'sha256Hash': sha}}}
+        
+        # An unknown hash asks the client to resend the full text
+        response = post(persisted(sha))
+        self.assertEqual(response.json()['errors'][0]['message'], 'PersistedQueryNotFound')
+        
+        # A mismatched hash is refused
+        response = post({'query': query, **persisted('0' * 64)})
+        self.assertIn('does not match', response.json()['errors'][0]['message'])
+        
+        # Sending text plus hash registers the document; afterwards the hash alone suffices, without re-parsing
+        response = post({'query': query, **persisted(sha)})
+        self.assertEqual(response.status_code, 200)
+        with mock.patch.object(core_views, 'parse', wraps=core_views.parse) as parse:
+            response = post(persisted(sha))
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('nearbyChefs', response.json()['data'])
+            self.assertEqual(response.json()['extensions']['cost'], {'cost': 8, 'depth': 4})
+            post({'query': query})
+            self.assertEqual(parse.call_count, 0)
+        
+        # The cache is a bounded LRU
+        with override_settings(GRAPHQL_DOCUMENT_CACHE_SIZE=2):
+            for first in (1, 2, 4):
+                post({'query': query.replace('first: 3', f'first: {first}')})
+            self.assertEqual(len(document_cache), 2)
+            self.assertIsNone(document_cache.get(sha))
+        
+        # Allow-list mode only runs manifest queries, by hash or by text
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as f:
+            json.dump({'NearbyChefs': query}, f)
+        self.addCleanup(os.remove, f.name)
+        self.addCleanup(reset_manifest)
+        reset_manifest()
+        document_cache.clear()
+        with override_settings(GRAPHQL_PERSISTED_QUERIES_ONLY=True, GRAPHQL_PERSISTED_QUERY_MANIFEST=f.name):
+            response = post(persisted(sha))
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('nearbyChefs', response.json()['data'])
+            response = post({'query': '{ __typename }'})
+            self.assertEqual(response.json()['errors'][0]['message'], 'PersistedQueryNotAllowed')
+        print("✅ Persisted queries work correctly")
+
+    def test_graphql_resolver_cache(self):
+        """Test 28: Shared resolver cache for public GraphQL queries"""
+        print("🗃️ Testing GraphQL resolver cache...")
+        
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        menu = '{ menuForChef(chefId: %d) { name } }' % self.chef_profile.id
+        profile = '{ chefProfile(id: %d) { bio } }' % self.chef_profile.id
+        
+        def post(query, client=None):
+            with CaptureQueriesContext(connection) as queries:
+                response = (client or self.client).post('/graphql/', {'query': query}, content_type='application/json')
+            return response.json()['data'], [q['sql'] for q in queries]
+        
+        def names(data):
+            return sorted(item['name'] for item in data['menuForChef'])
+        
+        data, _ = post(menu)
+        self.assertEqual(names(data), ['Caesar Salad', 'Margherita Pizza', 'Tiramisu'])
+        
+        # A signed-in client is served the entry an anonymous visitor filled
+        signed_in = Client()
+        signed_in.login(username='testclient', password='testpass123')
+        data, sql = post(menu, signed_in)
+        self.assertEqual(names(data), ['Caesar Salad', 'Margherita Pizza', 'Tiramisu'])
+        self.assertFalse([statement for statement in sql if 'core_menuitem' in statement])
+        
+        # Saving a menu item expires that chef's menu once the save commits
+        item = self.menu_items[0]
+        item.name = 'Marinara Pizza'
+        with self.captureOnCommitCallbacks() as callbacks:
+            item.save()
+        data, _ = post(menu)
+        self.assertNotIn('Marinara Pizza', names(data))
+        for callback in callbacks:
+            callback()
+        data, _ = post(menu)
+        self.assertIn('Marinara Pizza', names(data))
+        
+        # Chef profiles are cached and expired the same way
+        post(profile)
+        _, sql = post(profile)
+        self.assertEqual(sql, [])
+        self.chef_profile.bio = 'Updated bio'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.chef_profile.save()
+        data, _ = post(profile)
+        self.assertEqual(data['chefProfile']['bio'], 'Updated bio')
+        print("✅ Resolver cache works correctly")
+
+    def test_graphql_create_order(self):
+        """Test 29: Placing orders through GraphQL"""
+        print("⚡ Testing GraphQL order placement...")
+        
+        from unittest import mock
+        
+        mutation = """
+            mutation($chefId: ID!, $menuItemId: ID!) {
+                createOrder(chefId: $chefId, items: [{menuItemId: $menuItemId, quantity: 2}],
+                            deliveryAddress: "1 Test St") {
+                    success
+                    message
+                    order { totalAmount chefProfile { user { firstName } } items { menuItem { name } } }
+                }
+            }
+        """
+        variables = {'chefId': str(self.chef_profile.id), 'menuItemId': str(self.menu_items[0].id)}
+        self.client.login(username='testclient', password='testpass123')
+        
+        # Stripe is left to the payment outbox, so placing orders never waits on it
+        with mock.patch('stripe.PaymentIntent.create') as payment_intent:
+            responses = [
+                self.client.post('/graphql/', {'query': mutation, 'variables': variables}, content_type='application/json')
+                for _ in range(2)
+            ]
+        payment_intent.assert_not_called()
+        for response in responses:
+            result = response.json()['data']['createOrder']
+            self.assertTrue(result['success'], result['message'])
+            self.assertEqual(result['order']['chefProfile']['user']['firstName'], 'Jane')
+            self.assertEqual(result['order']['items'][0]['menuItem']['name'], 'Margherita Pizza')
+        self.assertEqual(Order.objects.filter(client=self.client_user, payment__status='pending').count(), 2)
+        
+        # Anonymous visitors cannot order
+        self.client.logout()
+        response = self.client.post('/graphql/', {'query': mutation, 'variables': variables}, content_type='application/json')
+        self.assertEqual(response.json()['data']['createOrder']['message'], 'Authentication required')
+        print("✅ GraphQL order placement works correctly")
+
+    def test_graphql_subscriptions(self):
+        """Test 30: GraphQL subscriptions over WebSockets"""
+        print("📡 Testing GraphQL subscriptions...")
+        
+        from asgiref.sync import async_to_sync, sync_to_async
+        from channels.routing import URLRouter
+        from django.db import transaction
+        from channels.testing import WebsocketCommunicator
+        from core.routing import websocket_urlpatterns
+        
+        order = Order.objects.create(
+            client=self.client_user,
+            chef_profile=self.chef_profile,
+            subtotal=Decimal('18.99'),
+            total_amount=Decimal('23.99'),
+            delivery_address='1 Test St',
+        )
+        subscription = """
+            subscription($orderId: ID) {
+                orderStatusChanged(orderId: $orderId) { status message order { id chefProfile { user { firstName } } } }
+            }
+        """
+        
+        async def connect(user):
+            communicator = WebsocketCommunicator(
+                URLRouter(websocket_urlpatterns), '/ws/graphql/', subprotocols=['graphql-transport-ws']
+            )
+            communicator.scope['user'] = user
+            connected, subprotocol = await communicator.connect()
+            self.assertTrue(connected)
+            self.assertEqual(subprotocol, 'graphql-transport-ws')
+            await communicator.send_json_to({'type': 'connection_init'})
+            self.assertEqual(await communicator.receive_json_from(), {'type': 'connection_ack'})
+            return communicator
+        
+        async def subscribe(communicator, query, variables=None):
+            await communicator.send_json_to({
+                'type': 'subscribe', 'id': '1', 'payload': {'query': query, 'variables': variables or {}},
+            })
+            # The subscription is listening once the next message has been handled
+            await communicator.send_json_to({'type': 'ping'})
+            return await communicator.receive_json_from()
+        
+        def commit(save, **kwargs):
+            # Notifications are sent on commit, which TestCase never reaches on its own
+            with self.captureOnCommitCallbacks(execute=True):
+                return save(**kwargs)
+        
+        async def scenario():
+            client_socket = await connect(self.client_user)
+            self.assertEqual(await subscribe(client_socket, subscription, {'orderId': str(order.id)}), {'type': 'pong'})
+            
+            order.status = 'confirmed'
+            await sync_to_async(commit)(order.save)
+            event = await client_socket.receive_json_from()
+            self.assertEqual(event['type'], 'next')
+            payload = event['payload']['data']['orderStatusChanged']
+            self.assertEqual(payload['status'], 'confirmed')
+            self.assertEqual(payload['order']['id'], str(order.id))
+            self.assertEqual(payload['order']['chefProfile']['user']['firstName'], 'Jane')
+            
+            # Saving without a status change pushes nothing
+            await sync_to_async(commit)(order.save)
+            self.assertTrue(await client_socket.receive_nothing())
+            
+            await client_socket.send_json_to({'type': 'complete', 'id': '1'})
+            await client_socket.disconnect()
+            
+            # Chefs get new orders; clients may not subscribe to them
+            chef_socket = await connect(self.chef_user)
+            self.assertEqual(await subscribe(chef_socket, 'subscription { newOrderForChef { order { id } } }'), {'type': 'pong'})
+            new_order = await sync_to_async(commit)(
+                Order.objects.create,
+                client=self.client_user,
+                chef_profile=self.chef_profile,
+                subtotal=Decimal('8.99'),
+                total_amount=Decimal('12.99'),
+                delivery_address='1 Test St',
+            )
+            event = await chef_socket.receive_json_from()
+            self.assertEqual(event['payload']['data']['newOrderForChef']['order']['id'], str(new_order.id))
+            
+            # Orders that roll back are never announced
+            def rolled_back():
+                with transaction.atomic():
+                    Order.objects.create(
+                        client=self.client_user,
+                        chef_profile=self.chef_profile,
+                        subtotal=Decimal('8.99'),
+                        total_amount=Decimal('12.99'),
+                        delivery_address='1 Test St',
+                    )
+                    transaction.set_rollback(True)
+            await sync_to_async(commit)(rolled_back)
+            self.assertTrue(await chef_socket.receive_nothing())
+            await chef_socket.disconnect()
+            
+            denied_socket = await connect(self.client_user)
+            error = await subscribe(denied_socket, 'subscription { newOrderForChef { status } }')
+            self.assertEqual(error['type'], 'error')
+            self.assertEqual(error['payload'][0]['message'], 'Chef account required')
+            await denied_socket.disconnect()
+            
+            # A subscribe message without an id closes the socket as invalid
+            invalid_socket = await connect(self.client_user)
+            await invalid_socket.send_json_to({'type': 'subscribe', 'payload': {'query': subscription}})
+            self.assertEqual(await invalid_socket.receive_output(), {'type': 'websocket.close', 'code': 4400})
+        
+        async_to_sync(scenario)()
+        print("✅ GraphQL subscriptions work correctly")
+
+    def test_graphql_column_projection(self):
+        """Test 31: GraphQL resolvers load only the requested columns"""
+        print("✂️ Testing GraphQL column projection...")
+        
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        def post(query):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post('/graphql/', {'query': query}, content_type='application/json')
+            result = response.json()
+            self.assertNotIn('errors', result)
+            return result['data'], [q['sql'] for q in queries]
+        
+        # Narrow selections skip the wide columns
+        data, sql = post('{ nearbyChefs(lat: 40.7128, long: -74.0060, first: 5) { edges { node { id distanceKm } } } }')
+        self.assertEqual(data['nearbyChefs']['edges'][0]['node']['id'], str(self.chef_profile.id))
+        chef_queries = [statement for statement in sql if 'FROM "core_chefprofile"' in statement]
+        self.assertTrue(chef_queries)
+        for statement in chef_queries:
+            self.assertNotIn('"bio"', statement)
+            self.assertNotIn('"verification_documents"', statement)
+        
+        # Fragments count, and requested columns are still served
+        data, sql = post("""
+            { chefsNearMe(lat: 40.7128, long: -74.0060) { ...chef } }
+            fragment chef on ChefProfileType { id bio }
+        """)
+        self.assertEqual(data['chefsNearMe'][0]['bio'], self.chef_profile.bio)
+        
+        # Forward relations are joined and projected in the same statement
+        Order.objects.create(
+            client=self.client_user, chef_profile=self.chef_profile, delivery_address="1 Test St",
+            subtotal=Decimal('25.00'), total_amount=Decimal('30.00'),
+        )
+        self.client.login(username='testclient', password='testpass123')
+        data, sql = post('{ myOrders { edges { node { totalAmount chefProfile { user { firstName } } } } } }')
+        self.assertEqual(data['myOrders']['edges'][0]['node']['chefProfile']['user']['firstName'], 'Jane')
+        order_queries = [statement for statement in sql if 'FROM "core_order"' in statement]
+        self.assertEqual(len(order_queries), 1)
+        self.assertIn('INNER JOIN "core_user"', order_queries[0])
+        self.assertNotIn('"delivery_address"', order_queries[0])
+        self.assertNotIn('"bio"', order_queries[0])
+        self.assertFalse([statement for statement in sql if 'FROM "core_chefprofile"' in statement])
+        print("✅ Column projection works correctly")
+
+    def test_graphql_resolver_tracing(self):
+        """Test 32: GraphQL resolver timing and SQL counts"""
+        print("⏱️ Testing GraphQL resolver tracing...")
+        
+        from django.test import override_settings
+        from core.tracing import field_histograms
+        
+        field_histograms.clear()
+        for menu_item in self.menu_items:
+            order = Order.objects.create(
+                client=self.client_user, chef_profile=self.chef_profile, delivery_address="1 Test St",
+                subtotal=menu_item.price, total_amount=menu_item.price,
+            )
+            order.items.create(menu_item=menu_item, quantity=1, unit_price=menu_item.price)
+        self.client.login(username='testclient', password='testpass123')
+        query = '{ myOrders { edges { node { id items { quantity menuItem { name } } } } } }'
+        
+        # Tracing is off unless enabled
+        with override_settings(DEBUG=True):
+            result = self.client.post('/graphql/', {'query': query}, content_type='application/json').json()
+        self.assertNotIn('resolvers', result.get('extensions', {}))
+        self.assertEqual(field_histograms.snapshot()['fields'], {})
+        
+        # DEBUG responses carry the trace, one entry per path with list indexes dropped
+        tracing = override_settings(GRAPHQL_TRACE_RESOLVERS=True)
+        tracing.enable()
+        self.addCleanup(tracing.disable)
+        with override_settings(DEBUG=True):
+            result = self.client.post('/graphql/', {'query': query}, content_type='application/json').json()
+        self.assertNotIn('errors', result)
+        trace = {entry['path']: entry for entry in result['extensions']['resolvers']}
+        self.assertEqual(trace['myOrders']['field'], 'Query.myOrders')
+        self.assertEqual(trace['myOrders']['rows'], 3)
+        self.assertEqual(trace['myOrders.edges']['rows'], 3)
+        self.assertGreaterEqual(trace['myOrders']['sqlQueries'], 1)
+        self.assertEqual(trace['myOrders.edges.node.items']['calls'], 3)
+        self.assertEqual(trace['myOrders.edges.node.items.menuItem']['calls'], 3)
+        self.assertEqual(trace['myOrders.edges.node.items.menuItem']['rows'], 3)
+        # Batched by the loaders rather than one query per order
+        self.assertLessEqual(trace['myOrders.edges.node.items']['sqlQueries'], 1)
+        self.assertNotIn('myOrders.edges.node.id', trace)
+        
+        # Outside DEBUG the trace only feeds the histograms
+        result = self.client.post('/graphql/', {'query': query}, content_type='application/json').json()
+        self.assertNotIn('resolvers', result.get('extensions', {}))
+        
+        # Staff can read the per-field histograms of the worker that answers
+        response = self.client.get('/graphql/metrics/')
+        self.assertEqual(response.status_code, 302)
+        self.client_user.is_staff = True
+        self.client_user.save()
+        metrics = self.client.get('/graphql/metrics/').json()
+        self.assertEqual(metrics['pid'], os.getpid())
+        stats = metrics['fields']['OrderType.items']
+        self.assertEqual(stats['requests'], 2)
+        self.assertEqual(stats['calls'], 6)
+        self.assertEqual(sum(stats['durationMs']), 2)
+        self.assertEqual(len(stats['durationMs']), len(metrics['buckets']))
+        print("✅ Resolver tracing works correctly")
+
+    def test_graphql_order_connections(self):
+        """Test 33: Relay connections for order history"""
+        print("📚 Testing order connections...")
+        
+        from datetime import timedelta
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from django.utils import timezone
+        from core.schema import MAX_ORDERS_PAGE_SIZE
+        
+        now = timezone.now()
+        orders = Order.objects.bulk_create([
+            Order(
+                client=self.client_user, chef_profile=self.chef_profile, delivery_address="1 Test St",
+                subtotal=Decimal('25.00'), total_amount=Decimal('30.00'),
+                status='delivered' if i % 2 else 'placed',
+            )
+            for i in range(MAX_ORDERS_PAGE_SIZE + 5)
+        ])
+        # auto_now_add ignores assigned values, so spread the history out afterwards
+        for i, order in enumerate(orders):
+            Order.objects.filter(id=order.id).update(created_at=now - timedelta(days=i))
+        
+        def post(query, variables=None):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(
+                    '/graphql/', {'query': query, 'variables': variables or {}}, content_type='application/json'
+                )
+            return response.json(), len(queries)
+        
+        page_query = """
+            query($first: Int, $after: String, $status: String, $before: DateTime) {
+              myOrders(first: $first, after: $after, status: $status, createdBefore: $before) {
+                edges { cursor node { id status createdAt } }
+                pageInfo { hasNextPage hasPreviousPage endCursor }
+              }
+            }
+        """
+        
+        # Anonymous users get an empty page
+        result, _ = post(page_query)
+        self.assertEqual(result['data']['myOrders']['edges'], [])
+        
+        self.client.login(username='testclient', password='testpass123')
+        result, first_page_queries = post(page_query, {'first': 2})
+        connection_data = result['data']['myOrders']
+        self.assertEqual([edge['node']['id'] for edge in connection_data['edges']], [str(o.id) for o in orders[:2]])
+        self.assertTrue(connection_data['pageInfo']['hasNextPage'])
+        self.assertFalse(connection_data['pageInfo']['hasPreviousPage'])
+        
+        # Following the cursor continues where the page ended, at the same cost
+        result, next_page_queries = post(page_query, {'first': 2, 'after': connection_data['pageInfo']['endCursor']})
+        connection_data = result['data']['myOrders']
+        self.assertEqual([edge['node']['id'] for edge in connection_data['edges']], [str(o.id) for o in orders[2:4]])
+        self.assertTrue(connection_data['pageInfo']['hasPreviousPage'])
+        self.assertEqual(first_page_queries, next_page_queries)
+        
+        # Page sizes are capped
+        result, _ = post(page_query, {'first': 1000})
+        self.assertEqual(len(result['data']['myOrders']['edges']), MAX_ORDERS_PAGE_SIZE)
+        
+        # Status and date filters are applied in the database
+        result, _ = post(page_query, {'status': 'delivered', 'before': (now - timedelta(days=10)).isoformat()})
+        nodes = [edge['node'] for edge in result['data']['myOrders']['edges']]
+        self.assertTrue(nodes)
+        self.assertTrue(all(node['status'] == 'DELIVERED' for node in nodes))
+        self.assertEqual(nodes[0]['id'], str(orders[11].id))
+        
+        # Malformed cursors are reported rather than restarting from the top
+        from core.pagination import encode_cursor
+        for cursor in ('not-a-cursor', encode_cursor([orders[0].id]), encode_cursor([orders[0].created_at, 'x'])):
+            result, _ = post(page_query, {'after': cursor})
+            self.assertEqual(result['errors'][0]['message'], 'Invalid cursor')
+        
+        # Chefs page through the orders they received
+        self.client.login(username='testchef', password='testpass123')
+        result, _ = post('{ chefOrders(first: 3, status: "placed") { edges { node { id status } } } }')
+        nodes = [edge['node'] for edge in result['data']['chefOrders']['edges']]
+        self.assertEqual([node['id'] for node in nodes], [str(orders[0].id), str(orders[2].id), str(orders[4].id)])
+        print("✅ Order connections work correctly")
+
+    def test_graphql_batched_operations(self):
+        """Test 34: Several GraphQL operations in one request"""
+        print("📦 Testing batched GraphQL operations...")
+        
+        from django.db import connection
+        from django.test import override_settings
+        from django.test.utils import CaptureQueriesContext
+        
+        order = Order.objects.create(
+            client=self.client_user, chef_profile=self.chef_profile, delivery_address="1 Test St",
+            subtotal=Decimal('25.00'), total_amount=Decimal('30.00'),
+        )
+        order.items.create(menu_item=self.menu_items[0], quantity=1, unit_price=self.menu_items[0].price)
+        self.client.login(username='testclient', password='testpass123')
+        
+        operations = [
+            {'query': '{ me { firstName } }', 'id': 'me'},
+            {'query': '{ chefsNearMe(lat: 40.7128, long: -74.0060) { id } }', 'id': 'chefs'},
+            {
+                'query': 'query($chefId: ID!) { menuForChef(chefId: $chefId) { name chefProfile { bio } } }',
+                'variables': {'chefId': str(self.chef_profile.id)},
+                'id': 'menu',
+            },
+            {'query': '{ myOrders { edges { node { items { menuItem { chefProfile { bio } } } } } } }', 'id': 'orders'},
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/graphql/', operations, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        results = response.json()
+        self.assertEqual([result['id'] for result in results], ['me', 'chefs', 'menu', 'orders'])
+        self.assertTrue(all(result['status'] == 200 and 'errors' not in result for result in results))
+        self.assertEqual(results[0]['data']['me']['firstName'], 'John')
+        self.assertEqual(results[1]['data']['chefsNearMe'][0]['id'], str(self.chef_profile.id))
+        self.assertEqual(len(results[2]['data']['menuForChef']), 3)
+        node = results[3]['data']['myOrders']['edges'][0]['node']
+        self.assertEqual(node['items'][0]['menuItem']['chefProfile']['bio'], self.chef_profile.bio)
+        
+        # The operations share the request's loaders: the chef loaded for the menu serves the orders too
+        bio_queries = [q['sql'] for q in queries if '"core_chefprofile"."bio"' in q['sql']]
+        self.assertEqual(len(bio_queries), 1)
+        
+        # Single operations are answered as before
+        response = self.client.post('/graphql/', operations[0], content_type='application/json')
+        self.assertEqual(response.json()['data']['me']['firstName'], 'John')
+        
+        # Empty and oversized batches are refused
+        response = self.client.post('/graphql/', [], content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        with override_settings(GRAPHQL_MAX_BATCH_SIZE=2):
+            response = self.client.post('/graphql/', operations, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('limited to 2', response.json()['errors'][0]['message'])
+        
+        # Costs add up across the batch: operations that are each within budget
+        # are refused together, before any of them runs
+        menu_cost = results[2]['extensions']['cost']['cost']
+        with override_settings(GRAPHQL_MAX_COST=menu_cost * 2):
+            response = self.client.post('/graphql/', [operations[2]] * 2, content_type='application/json')
+            self.assertEqual(response.status_code, 200)
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post('/graphql/', [operations[2]] * 3, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(f'Batch cost {menu_cost * 3} exceeds', response.json()['errors'][0]['message'])
+        self.assertFalse([q['sql'] for q in queries if 'core_menuitem' in q['sql']])
+        print("✅ Batched operations work correctly")
+
+    def test_order_creation_statement_count(self):
+        """Test 35: Order placement runs a constant number of statements"""
+        print("🧾 Testing batched order creation...")
+        
+        import uuid
+        from unittest import mock
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        self.client.login(username='testclient', password='testpass123')
+        
+        def portal_order(menu_items):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(
+                    reverse('client_portal:create_order'),
+                    data=json.dumps({
+                        'items': [{'id': str(item.id), 'quantity': 2} for item in menu_items],
+                        'delivery_address': '1 Test St',
+                    }),
+                    content_type='application/json'
+                )
+            self.assertTrue(response.json()['success'], response.json())
+            return Order.objects.get(id=response.json()['order_id']), len(queries)
+        
+        mutation = """
+            mutation($chefId: ID!, $items: [OrderItemInput]!) {
+                createOrder(chefId: $chefId, items: $items, deliveryAddress: "1 Test St") { success message order { id } }
+            }
+        """
+        
+        def graphql_order(menu_items):
+            variables = {
+                'chefId': str(self.chef_profile.id),
+                'items': [{'menuItemId': str(item.id), 'quantity': 2} for item in menu_items],
+            }
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(
+                    '/graphql/', {'query': mutation, 'variables': variables}, content_type='application/json'
+                )
+            result = response.json()['data']['createOrder']
+            self.assertTrue(result['success'], result['message'])
+            return Order.objects.get(id=result['order']['id']), len(queries)
+        
+        for place_order in (portal_order, graphql_order):
+            small_order, small_cart_queries = place_order(self.menu_items[:1])
+            large_order, large_cart_queries = place_order(self.menu_items)
+            self.assertEqual(small_cart_queries, large_cart_queries)
+            self.assertEqual(small_order.items.count(), 1)
+            self.assertEqual(large_order.items.count(), 3)
+            self.assertEqual(
+                large_order.subtotal, sum(item.price * 2 for item in self.menu_items)
+            )
+        
+        # Unknown items are reported without writing anything
+        orders_before = Order.objects.count()
+        response = self.client.post(
+            reverse('client_portal:create_order'),
+            data=json.dumps({
+                'items': [{'id': str(self.menu_items[0].id), 'quantity': 1}, {'id': str(uuid.uuid4()), 'quantity': 1}],
+                'delivery_address': '1 Test St',
+            }),
+            content_type='application/json'
+        )
+        self.assertEqual(response.json()['error'], 'Menu item not found')
+        
+        # A failed item insert leaves no order behind
+        with mock.patch.object(OrderItem.objects, 'bulk_create', side_effect=RuntimeError('insert failed')):
+            response = self.client.post(
+                reverse('client_portal:create_order'),
+                data=json.dumps({'items': [{'id': str(self.menu_items[0].id), 'quantity': 1}], 'delivery_address': '1 Test St'}),
+                content_type='application/json'
+            )
+        self.assertFalse(response.json()['success'])
+        self.assertEqual(Order.objects.count(), orders_before)
+        print(f"✅ Orders are placed in {large_cart_queries} statements regardless of cart size")
+
+    def test_payment_intent_outbox(self):
+        """Test 36: Stripe PaymentIntents go through a transactional outbox"""
+        print("📮 Testing payment intent outbox...")
+        
+        from datetime import timedelta
+        from types import SimpleNamespace
+        from unittest import mock
+        from django.conf import settings
+        from django.utils import timezone
+        from core.models import PaymentIntentOutbox
+        
+        self.client.login(username='testclient', password='testpass123')
+        mutation = """
+            mutation($chefId: ID!, $menuItemId: ID!) {
+                createOrder(chefId: $chefId, items: [{menuItemId: $menuItemId, quantity: 2}],
+                            deliveryAddress: "1 Test St") { success message order { id } }
+            }
+        """
+        variables = {'chefId': str(self.chef_profile.id), 'menuItemId': str(self.menu_items[0].id)}
+        
+        # Placing the order queues the intent without calling Stripe
+        with mock.patch('stripe.PaymentIntent.create') as payment_intent:
+            response = self.client.post('/graphql/', {'query': mutation, 'variables': variables}, content_type='application/json')
+        payment_intent.assert_not_called()
+        order = Order.objects.get(id=response.json()['data']['createOrder']['order']['id'])
+        entry = PaymentIntentOutbox.objects.get(order=order)
+        self.assertEqual(entry.status, 'pending')
+        self.assertEqual(entry.amount, int(order.total_amount * 100))
+        self.assertEqual(entry.metadata['order_id'], str(order.id))
+        
+        payment_query = 'query { myOrders { edges { node { id payment { status clientSecret } } } } }'
+        
+        def payment():
+            result = self.client.post('/graphql/', {'query': payment_query}, content_type='application/json').json()
+            self.assertNotIn('errors', result)
+            return result['data']['myOrders']['edges'][0]['node']['payment']
+        
+        self.assertEqual(payment(), {'status': 'PENDING', 'clientSecret': ''})
+        
+        # Transient failures are retried later with the same idempotency key
+        with mock.patch('stripe.PaymentIntent.create', side_effect=ConnectionError('timeout')) as payment_intent:
+            call_command('drain_payment_outbox', stdout=open(os.devnull, 'w'))
+        entry.refresh_from_db()
+        self.assertEqual((entry.status, entry.attempts), ('pending', 1))
+        self.assertGreater(entry.next_attempt_at, timezone.now())
+        self.assertEqual(payment_intent.call_args.kwargs['idempotency_key'], str(entry.idempotency_key))
+        
+        # Rows are not sent again before they are due
+        with mock.patch('stripe.PaymentIntent.create') as payment_intent:
+            call_command('drain_payment_outbox', stdout=open(os.devnull, 'w'))
+        payment_intent.assert_not_called()
+        
+        PaymentIntentOutbox.objects.filter(pk=entry.pk).update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+        intent = SimpleNamespace(id='pi_test_outbox', client_secret='pi_test_outbox_secret')
+        with mock.patch('stripe.PaymentIntent.create', return_value=intent) as payment_intent:
+            call_command('drain_payment_outbox', stdout=open(os.devnull, 'w'))
+        self.assertEqual(payment_intent.call_args.kwargs['idempotency_key'], str(entry.idempotency_key))
+        order.refresh_from_db()
+        self.assertEqual(order.stripe_payment_intent, 'pi_test_outbox')
+        self.assertEqual(payment(), {'status': 'SENT', 'clientSecret': 'pi_test_outbox_secret'})
+        
+        # A claimed row is leased: a later drain skips it until it is sent or retried
+        from core.payment_outbox import claim_due
+        self.client.post('/graphql/', {'query': mutation, 'variables': variables}, content_type='application/json')
+        claimed = claim_due(10)
+        self.assertEqual(len(claimed), 1)
+        self.assertEqual(claim_due(10), [])
+        PaymentIntentOutbox.objects.filter(pk=claimed[0].pk).delete()
+        
+        # Payments are batched, not read per order
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        def payment_queries():
+            with CaptureQueriesContext(connection) as queries:
+                result = self.client.post('/graphql/', {'query': payment_query}, content_type='application/json').json()
+            self.assertNotIn('errors', result)
+            return len(queries)
+        
+        two_orders = payment_queries()
+        for _ in range(3):
+            self.client.post('/graphql/', {'query': mutation, 'variables': variables}, content_type='application/json')
+        self.assertEqual(payment_queries(), two_orders)
+        
+        # Only the paying client sees the client secret
+        self.client.login(username='testchef', password='testpass123')
+        result = self.client.post(
+            '/graphql/', {'query': 'query { chefOrders { edges { node { payment { clientSecret } } } } }'},
+            content_type='application/json'
+        ).json()
+        self.assertIsNone(result['data']['chefOrders']['edges'][0]['node']['payment'])
+        
+        # Giving up after the last attempt marks the order's payment as failed
+        self.client.login(username='testclient', password='testpass123')
+        response = self.client.post('/graphql/', {'query': mutation, 'variables': variables}, content_type='application/json')
+        failing = PaymentIntentOutbox.objects.get(order_id=response.json()['data']['createOrder']['order']['id'])
+        PaymentIntentOutbox.objects.filter(pk=failing.pk).update(attempts=settings.PAYMENT_OUTBOX_MAX_ATTEMPTS - 1)
+        with mock.patch('stripe.PaymentIntent.create', side_effect=ConnectionError('timeout')):
+            call_command('drain_payment_outbox', stdout=open(os.devnull, 'w'))
+        failing.refresh_from_db()
+        self.assertEqual(failing.status, 'failed')
+        self.assertEqual(failing.order.payment_status, 'failed')
+        
+        # An order whose items cannot be written leaves no outbox row behind
+        entries_before = PaymentIntentOutbox.objects.count()
+        with mock.patch.object(OrderItem.objects, 'bulk_create', side_effect=RuntimeError('insert failed')):
+            response = self.client.post('/graphql/', {'query': mutation, 'variables': variables}, content_type='application/json')
+        self.assertFalse(response.json()['data']['createOrder']['success'])
+        self.assertEqual(PaymentIntentOutbox.objects.count(), entries_before)
+        print("✅ Payment intent outbox works correctly")
+
+
 def run_workflow_tests():
     """Main function to run workflow tests"""
     from django.test.utils import get_runner